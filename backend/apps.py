@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+class BackendConfig(AppConfig):
+    name = 'backend'
+
+    def ready(self):
+        from . import signals
+        from .instrumentation import instrument_serializers
+        instrument_serializers()
+        post_migrate.connect(signals.install_search_index, sender=self)
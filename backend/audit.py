@@ -0,0 +1,208 @@
+import atexit
+import contextvars
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+Action = AuditLog.AuditActionType
+
+# Set by AuditContextMiddleware. DRF copies the authenticated user onto the wrapped
+# HttpRequest, so the acting user is known here even with JWT authentication.
+current_request = contextvars.ContextVar('audit_current_request', default=None)
+
+
+def get_actor():
+    request = current_request.get()
+    user = getattr(request, 'user', None) if request is not None else None
+    return user if user is not None and user.is_authenticated else None
+
+
+def get_client_ip(request):
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded:
+        return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR')
+
+
+class AuditWriter:
+    """
+    Drains queued AuditLog rows with ``bulk_create`` from a background thread.
+
+    Events are appended with ``put`` (no database work on the request path); the
+    writer inserts up to ``batch_size`` rows at a time, at least every ``interval``
+    seconds. ``stop`` drains whatever is left and is registered to run at exit.
+
+    At most ``max_queued`` events wait in memory: while the database is unreachable the
+    writer backs off (up to ``max_backoff`` seconds between attempts) and events beyond
+    the limit are dropped and counted in ``dropped``.
+    """
+
+    def __init__(self, batch_size=200, interval=1.0, max_queued=100000, max_backoff=60.0):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+        self._failures = 0
+
+    def put(self, entry):
+        self._enqueue(entry)
+        self._ensure_thread()
+
+    def _enqueue(self, entry):
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                dropped = self.dropped
+            # Once per thousand, so a long outage does not flood the log.
+            if dropped % 1000 == 1:
+                logger.error("Audit queue is full; %d events dropped so far", dropped)
+
+    def _take_batch(self, block):
+        batch = []
+        try:
+            batch.append(self._queue.get(block=block, timeout=self.interval if block else None))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _save_one(self, entry):
+        try:
+            with transaction.atomic():
+                entry.save(force_insert=True)
+        except IntegrityError:
+            entry.user = None
+            with transaction.atomic():
+                entry.save(force_insert=True)
+
+    def _write(self, batch):
+        if not batch:
+            return 0
+        with self._write_lock:
+            try:
+                AuditLog.objects.bulk_create(batch, batch_size=self.batch_size)
+            except IntegrityError:
+                # Usually a user deleted while their event was queued; write rows one by one
+                # and detach the missing user instead of retrying the whole batch forever.
+                for entry in batch:
+                    try:
+                        self._save_one(entry)
+                    except Exception:
+                        logger.exception("Dropping an audit event (%s) that cannot be written", entry.actionType)
+                        with self._lock:
+                            self.dropped += 1
+            except Exception:
+                self._failures += 1
+                if self._failures == 1:
+                    logger.exception("Writing %d audit events failed; requeueing", len(batch))
+                else:
+                    logger.warning("Writing %d audit events failed again (%d attempts); requeueing",
+                                   len(batch), self._failures)
+                for entry in batch:
+                    self._enqueue(entry)
+                return 0
+            self._failures = 0
+        return len(batch)
+
+    def backoff(self):
+        """Seconds to wait after ``_failures`` consecutive failed writes."""
+        return min(self.interval * 2 ** (self._failures - 1), self.max_backoff)
+
+    def flush(self):
+        """Writes everything queued so far in the calling thread."""
+        written = 0
+        while True:
+            batch = self._take_batch(block=False)
+            if not batch:
+                return written
+            count = self._write(batch)
+            if not count:
+                return written
+            written += count
+
+    def _ensure_thread(self):
+        if self.interval <= 0 or self._stopped.is_set():
+            return
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                batch = self._take_batch(block=True)
+                if batch:
+                    close_old_connections()
+                    self._write(batch)
+            except Exception:
+                logger.exception("Audit writer failed")
+            if self._failures:
+                self._stopped.wait(self.backoff())
+
+    def stop(self):
+        self._stopped.set()
+        self.flush()
+
+
+writer = AuditWriter(
+    batch_size=getattr(settings, 'AUDIT_BATCH_SIZE', 200),
+    interval=getattr(settings, 'AUDIT_FLUSH_INTERVAL', 1.0),
+    max_queued=getattr(settings, 'AUDIT_MAX_QUEUED', 100000),
+)
+atexit.register(writer.stop)
+
+
+def build_event(action_type, user=None, target=None, details=None, target_type=None, target_id=None):
+    if user is None:
+        user = get_actor()
+    if target is not None:
+        target_type = target_type or target.__class__.__name__
+        target_id = target_id or target.pk
+    details = dict(details or {})
+    request = current_request.get()
+    if request is not None and 'ip' not in details:
+        details['ip'] = get_client_ip(request)
+    return AuditLog(
+        user=user,
+        actionType=action_type,
+        timestamp=timezone.now(),
+        details=details,
+        targetEntityType=target_type,
+        targetEntityId=target_id,
+    )
+
+
+def log_events(entries):
+    """Queues prebuilt AuditLog rows once the surrounding transaction commits."""
+    entries = list(entries)
+
+    def enqueue():
+        for entry in entries:
+            writer.put(entry)
+
+    if entries:
+        transaction.on_commit(enqueue)
+
+
+def log_event(action_type, user=None, target=None, details=None, target_type=None, target_id=None):
+    log_events([build_event(action_type, user, target, details, target_type, target_id)])
@@ -0,0 +1,319 @@
+import gzip
+import heapq
+import itertools
+import json
+import os
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .caching import TTLCache
+from .models import AuditArchiveSegment, AuditLog, User
+
+ARCHIVE_FIELDS = ('id', 'user_id', 'actionType', 'timestamp', 'details', 'targetEntityType', 'targetEntityId')
+# The sidecar index keeps a posting list (value -> block numbers) for each of these columns.
+INDEXED_FIELDS = ('user_id', 'actionType', 'targetEntityType', 'targetEntityId')
+DELETE_CHUNK_SIZE = 1000
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Index files are never rewritten in place (every archive run writes new names), so they can be cached.
+_indexes = TTLCache(maxsize=64, ttl=3600)
+
+
+def archive_dir():
+    default = os.path.join(str(getattr(settings, 'BASE_DIR', os.getcwd())), 'audit_archive')
+    return getattr(settings, 'AUDIT_ARCHIVE_DIR', default)
+
+
+def archive_path(name):
+    return os.path.join(archive_dir(), name)
+
+
+def event_key(timestamp, pk):
+    """Total order of audit events as integers: (microseconds since epoch, id)."""
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    return (timestamp - EPOCH) // timedelta(microseconds=1), pk
+
+
+def month_bounds(month):
+    start = datetime(month.year, month.month, 1)
+    end = datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+    if settings.USE_TZ:
+        start, end = timezone.make_aware(start), timezone.make_aware(end)
+    return start, end
+
+
+def first_hot_month(keep_months=None):
+    """The oldest month that stays in the AuditLog table; everything before it is archived."""
+    if keep_months is None:
+        keep_months = getattr(settings, 'AUDIT_HOT_MONTHS', 3)
+    today = timezone.localdate() if settings.USE_TZ else date.today()
+    index = today.year * 12 + today.month - 1 - max(keep_months - 1, 0)
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def months_to_archive(keep_months=None):
+    start, _ = month_bounds(first_hot_month(keep_months))
+    months = AuditLog.objects.filter(timestamp__lt=start).datetimes('timestamp', 'month')
+    return sorted({value.date() for value in months})
+
+
+class SegmentWriter:
+    """
+    Writes rows (newest first) as a series of independently gzipped blocks.
+
+    Concatenated gzip members are still one valid ``.gz`` file, but the sidecar index
+    records each block's byte range, key range and posting lists, so readers only
+    seek to and decompress the blocks they need.
+    """
+
+    def __init__(self, handle, block_size):
+        self.handle = handle
+        self.block_size = block_size
+        self.blocks = []
+        self.postings = {field: defaultdict(list) for field in INDEXED_FIELDS}
+        self.pending = []
+        self.row_count = 0
+
+    def add(self, row):
+        self.pending.append(row)
+        if len(self.pending) >= self.block_size:
+            self.flush_block()
+
+    def flush_block(self):
+        rows, self.pending = self.pending, []
+        if not rows:
+            return
+        number = len(self.blocks)
+        lines = ''.join(json.dumps(encode_row(row), separators=(',', ':'), default=str) + '\n' for row in rows)
+        payload = gzip.compress(lines.encode('utf-8'))
+        offset = self.handle.tell()
+        self.handle.write(payload)
+        ids = [row['id'] for row in rows]
+        self.blocks.append({
+            'offset': offset,
+            'length': len(payload),
+            'rows': len(rows),
+            'newest': event_key(rows[0]['timestamp'], rows[0]['id']),
+            'oldest': event_key(rows[-1]['timestamp'], rows[-1]['id']),
+            'min_id': min(ids),
+            'max_id': max(ids),
+        })
+        for field in INDEXED_FIELDS:
+            for value in {row[field] for row in rows if row[field] is not None}:
+                self.postings[field][str(value)].append(number)
+        self.row_count += len(rows)
+
+    def index(self, month):
+        self.flush_block()
+        return {'month': f'{month:%Y-%m}', 'rows': self.row_count, 'blocks': self.blocks, 'postings': self.postings}
+
+
+def encode_row(row):
+    return dict(row, timestamp=row['timestamp'].isoformat())
+
+
+def decode_row(row):
+    row['timestamp'] = parse_datetime(row['timestamp'])
+    return row
+
+
+def load_index(segment):
+    index = _indexes.get(segment.index_file)
+    if index is None:
+        with open(archive_path(segment.index_file), encoding='utf-8') as handle:
+            index = json.load(handle)
+        _indexes.set(segment.index_file, index)
+    return index
+
+
+def read_block(handle, block):
+    handle.seek(block['offset'])
+    data = gzip.decompress(handle.read(block['length']))
+    return [decode_row(json.loads(line)) for line in data.splitlines()]
+
+
+def candidate_blocks(index, filters):
+    selected = None
+    for field, value in filters.items():
+        blocks = set(index['postings'][field].get(str(value), ()))
+        selected = blocks if selected is None else selected & blocks
+    if selected is None:
+        return list(range(len(index['blocks'])))
+    return sorted(selected)
+
+
+def iter_segment(segment, filters=None, cursor=None, descending=True):
+    """Yields the segment's rows matching ``filters`` strictly after ``cursor``, in key order."""
+    filters = filters or {}
+    index = load_index(segment)
+    after = event_key(*cursor) if cursor else None
+    blocks = candidate_blocks(index, filters)
+    if not descending:
+        blocks.reverse()
+    with open(archive_path(segment.data_file), 'rb') as handle:
+        for number in blocks:
+            block = index['blocks'][number]
+            # Blocks are stored newest first, so whole blocks behind the cursor are skipped unread.
+            if after is not None and (
+                (descending and tuple(block['oldest']) >= after) or
+                (not descending and tuple(block['newest']) <= after)
+            ):
+                continue
+            rows = read_block(handle, block)
+            if not descending:
+                rows.reverse()
+            for row in rows:
+                if after is not None:
+                    key = event_key(row['timestamp'], row['id'])
+                    if (key >= after) if descending else (key <= after):
+                        continue
+                if all(row[field] == value for field, value in filters.items()):
+                    yield row
+
+
+def archive_month(month, block_size=None):
+    """
+    Moves one month of AuditLog rows into a new segment (merged with the month's existing
+    segment, if any) and deletes them from the table. Returns the number of rows moved.
+    """
+    block_size = block_size or getattr(settings, 'AUDIT_ARCHIVE_BLOCK_SIZE', 500)
+    start, end = month_bounds(month)
+    existing = AuditArchiveSegment.objects.filter(month=month).first()
+    moved_ids = []
+
+    def table_rows():
+        rows = AuditLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+        for row in rows.order_by('-timestamp', '-id').values(*ARCHIVE_FIELDS).iterator(chunk_size=2000):
+            moved_ids.append(row['id'])
+            yield row
+
+    sources = [table_rows()]
+    if existing is not None:
+        sources.append(iter_segment(existing))
+
+    os.makedirs(archive_dir(), exist_ok=True)
+    stem = f'{month:%Y-%m}-{uuid.uuid4().hex[:8]}'
+    data_file, index_file = f'{stem}.jsonl.gz', f'{stem}.index.json'
+    seen = set()
+    with open(archive_path(data_file), 'wb') as handle:
+        writer = SegmentWriter(handle, block_size)
+        for row in heapq.merge(*sources, key=lambda row: event_key(row['timestamp'], row['id']), reverse=True):
+            # A row left in the table by an interrupted run is already in the old segment.
+            if row['id'] in seen:
+                continue
+            seen.add(row['id'])
+            writer.add(row)
+        index = writer.index(month)
+
+    if not moved_ids:
+        os.remove(archive_path(data_file))
+        return 0
+    with open(archive_path(index_file), 'w', encoding='utf-8') as handle:
+        json.dump(index, handle, separators=(',', ':'))
+
+    blocks = index['blocks']
+    newest, oldest = blocks[0]['newest'], blocks[-1]['oldest']
+    try:
+        with transaction.atomic():
+            AuditArchiveSegment.objects.update_or_create(month=month, defaults={
+                'data_file': data_file,
+                'index_file': index_file,
+                'row_count': index['rows'],
+                'newest_at': EPOCH + timedelta(microseconds=newest[0]),
+                'newest_id': newest[1],
+                'oldest_at': EPOCH + timedelta(microseconds=oldest[0]),
+                'oldest_id': oldest[1],
+                'min_id': min(block['min_id'] for block in blocks),
+                'max_id': max(block['max_id'] for block in blocks),
+            })
+            for offset in range(0, len(moved_ids), DELETE_CHUNK_SIZE):
+                AuditLog.objects.filter(pk__in=moved_ids[offset:offset + DELETE_CHUNK_SIZE]).delete()
+    except Exception:
+        remove_files(data_file, index_file)
+        raise
+    if existing is not None:
+        transaction.on_commit(lambda: remove_files(existing.data_file, existing.index_file))
+    return len(moved_ids)
+
+
+def remove_files(*names):
+    for name in names:
+        try:
+            os.remove(archive_path(name))
+        except FileNotFoundError:
+            pass
+
+
+def archive_old_months(keep_months=None, block_size=None):
+    """Archives every month older than the hot window; returns ``{month: rows moved}``."""
+    return {month: archive_month(month, block_size) for month in months_to_archive(keep_months)}
+
+
+def read_audit_log(table_rows, filters, cursor, descending, limit):
+    """
+    Merges rows already read from the table (in key order, at most ``limit``) with the
+    archive. A segment is only opened once the merge reaches its key range, so a page
+    that the table fills on its own never touches the archive.
+    """
+    def rank(key):
+        return (-key[0], -key[1]) if descending else key
+
+    after = event_key(*cursor) if cursor else None
+    pending = []
+    for segment in AuditArchiveSegment.objects.all():
+        newest = event_key(segment.newest_at, segment.newest_id)
+        oldest = event_key(segment.oldest_at, segment.oldest_id)
+        if after is not None and ((descending and oldest >= after) or (not descending and newest <= after)):
+            continue
+        pending.append((rank(newest if descending else oldest), segment))
+    pending.sort(key=lambda item: item[0])
+
+    counter = itertools.count()
+    heap = []
+
+    def push(entries):
+        entry = next(entries, None)
+        if entry is not None:
+            heapq.heappush(heap, (rank(event_key(entry.timestamp, entry.pk)), next(counter), entry, entries))
+
+    push(iter(table_rows))
+    merged = []
+    while len(merged) < limit:
+        while pending and (not heap or pending[0][0] < heap[0][0]):
+            _, segment = pending.pop(0)
+            push(AuditLog(**row) for row in iter_segment(segment, filters, cursor, descending))
+        if not heap:
+            break
+        _, _, entry, entries = heapq.heappop(heap)
+        merged.append(entry)
+        push(entries)
+    return merged
+
+
+def find_archived(pk):
+    for segment in AuditArchiveSegment.objects.filter(min_id__lte=pk, max_id__gte=pk):
+        index = load_index(segment)
+        with open(archive_path(segment.data_file), 'rb') as handle:
+            for block in index['blocks']:
+                if block['min_id'] <= pk <= block['max_id']:
+                    for row in read_block(handle, block):
+                        if row['id'] == pk:
+                            return AuditLog(**row)
+    return None
+
+
+def attach_users(entries):
+    """Loads the users of archived entries in one query (table rows come with select_related)."""
+    archived = [entry for entry in entries if entry._state.adding and entry.user_id]
+    users = User.objects.in_bulk({entry.user_id for entry in archived})
+    for entry in archived:
+        # A deleted user reads as no user, the same as SET_NULL does for rows in the table.
+        entry.user = users.get(entry.user_id)
+    return entries
@@ -0,0 +1,129 @@
+"""
+JWTs that carry the claims the permission classes read (``role``, ``language`` and a token
+version), so authenticated requests need no ``User`` query. Enable with::
+
+    REST_FRAMEWORK = {
+        'DEFAULT_AUTHENTICATION_CLASSES': ['backend.authentication.StatelessJWTAuthentication'],
+    }
+
+Changing a user's role, password or active flag (or deleting the user) bumps their
+TokenVersion, which revokes every token issued before; other processes notice within
+TOKEN_VERSION_CACHE_SECONDS.
+"""
+from django.conf import settings
+from django.db import IntegrityError, router, transaction
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .audit import Action, log_event
+from .caching import TTLCache
+from .models import TokenVersion, User
+
+VERSION_CLAIM = 'tv'
+# User fields copied into the token; everything else on the token user is loaded on first access.
+CLAIM_FIELDS = ('role', 'language')
+
+_versions = TTLCache(maxsize=10000, ttl=getattr(settings, 'TOKEN_VERSION_CACHE_SECONDS', 30))
+
+
+def get_token_version(user_id, cached=True):
+    user_id = int(user_id)
+    version = _versions.get(user_id) if cached else None
+    if version is None:
+        version = TokenVersion.objects.filter(user_id=user_id).values_list('version', flat=True).first() or 0
+        _versions.set(user_id, version)
+    return version
+
+
+def revoke_tokens(user_id):
+    """Invalidates every token issued to the user so far."""
+    if not TokenVersion.objects.filter(user_id=user_id).update(version=F('version') + 1):
+        try:
+            with transaction.atomic():
+                TokenVersion.objects.create(user_id=user_id, version=1)
+        except IntegrityError:
+            TokenVersion.objects.filter(user_id=user_id).update(version=F('version') + 1)
+    transaction.on_commit(lambda: _versions.delete(user_id))
+
+
+def check_token_version(token, cached=True):
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    if user_id is None or token.get(VERSION_CLAIM, 0) != get_token_version(user_id, cached=cached):
+        raise AuthenticationFailed(_("Token has been revoked."), code='token_revoked')
+
+
+def set_claims(token, user):
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    token[VERSION_CLAIM] = get_token_version(user.pk, cached=False)
+
+
+class ClaimsRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        set_claims(token, user)
+        return token
+
+
+def token_user(token):
+    """
+    A ``User`` built from the token's claims without a query. It compares equal to the
+    real row and works in filters and foreign keys; any field the token does not carry
+    is loaded from the database when first read.
+    """
+    known = {field: token[field] for field in CLAIM_FIELDS}
+    known['id'] = int(token[api_settings.USER_ID_CLAIM])
+    # Deactivating a user revokes their tokens, so a valid token means an active user.
+    known['is_active'] = True
+    fields = [field.attname for field in User._meta.concrete_fields if field.attname in known]
+    return User.from_db(router.db_for_read(User), fields, [known[field] for field in fields])
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that trusts the token's claims instead of loading the user."""
+
+    def get_user(self, validated_token):
+        check_token_version(validated_token)
+        if any(field not in validated_token for field in CLAIM_FIELDS):
+            # Issued before tokens carried claims.
+            return super().get_user(validated_token)
+        return token_user(validated_token)
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        log_event(Action.USER_LOGIN, user=self.user, target=self.user, details={'via': 'token'})
+        return data
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(pk=refresh.get(api_settings.USER_ID_CLAIM)).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        # Refreshing is rare, so it always sees revocations made in other processes.
+        check_token_version(refresh, cached=False)
+        # The new access token carries the user's current language.
+        set_claims(refresh, user)
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION and hasattr(refresh, 'blacklist'):
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data['refresh'] = str(refresh)
+        return data
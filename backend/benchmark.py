@@ -0,0 +1,313 @@
+"""
+Load benchmark over the API's read endpoints (see ``run_benchmark``).
+
+Each scenario requests one URL as a user of one role, ``warmup`` times unmeasured and
+then ``requests`` times from ``concurrency`` threads, and reports latency percentiles,
+throughput, status codes, queries per request and the peak RSS reached so far.
+Requests go through Django's test client in this process, or over HTTP to a running
+server with ``base_url``; RSS is then the server's only with ``server_pid`` (Linux).
+
+Users and ids come from the synthetic dataset (``generate_synthetic_data``), so a run on
+the same data is comparable with earlier ones; ``compare_results`` does that against a
+saved baseline.
+"""
+import json
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from urllib.parse import parse_qs, quote, urlsplit
+
+import django
+from django.conf import settings
+from django.db import close_old_connections, connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .authentication import ClaimsRefreshToken
+from .instrumentation import RequestMetrics, percentile_ms
+from .models import Article, ArticleVersion, AuditLog, ClickTransaction, Issue, Journal, ServiceOrder, User
+from .pagination import ArticleKeysetPagination
+from .synthetic import SYNTHETIC_PHONE_PREFIX
+
+# ``view`` is a URL name; ``args`` names ids from ``load_fixtures``; ``role`` None is anonymous.
+Scenario = namedtuple('Scenario', ['name', 'role', 'view', 'args', 'query'])
+
+SCENARIOS = [
+    Scenario('article-list:admin', User.Role.ADMIN, 'article-list', (), 'page_size=50'),
+    Scenario('article-list-compact:admin', User.Role.ADMIN, 'article-list', (), 'view=compact&page_size=50'),
+    Scenario('article-list-deep:admin', User.Role.ADMIN, 'article-list', (), 'page_size=50&cursor={deep_cursor}'),
+    Scenario('article-list:journal_manager', User.Role.JOURNAL_MANAGER, 'article-list', (), 'page_size=50'),
+    Scenario('article-list:client', User.Role.CLIENT, 'article-list', (), ''),
+    Scenario('article-detail:admin', User.Role.ADMIN, 'article-detail', ('article',), ''),
+    Scenario('writer-article-list:writer', User.Role.WRITER, 'writer-article-list', (), 'page_size=50'),
+    Scenario('journal-list:client', User.Role.CLIENT, 'journal-list', (), ''),
+    Scenario('journal-detail:client', User.Role.CLIENT, 'journal-detail', ('journal',), ''),
+    Scenario('journaltype-list:client', User.Role.CLIENT, 'journaltype-list', (), ''),
+    Scenario('journalcategory-list:client', User.Role.CLIENT, 'journalcategory-list', (), ''),
+    Scenario('service-list:client', User.Role.CLIENT, 'service-list', (), ''),
+    Scenario('soha-list:client', User.Role.CLIENT, 'soha-list', (), ''),
+    Scenario('issue-list:journal_manager', User.Role.JOURNAL_MANAGER, 'issue-list', (), ''),
+    Scenario('issue-detail:admin', User.Role.ADMIN, 'issue-detail', ('issue',), ''),
+    Scenario('dashboard-summary:admin', User.Role.ADMIN, 'dashboard-summary', (), ''),
+    Scenario('dashboard-summary:journal_manager', User.Role.JOURNAL_MANAGER, 'dashboard-summary', (), ''),
+    Scenario('dashboard-summary:client', User.Role.CLIENT, 'dashboard-summary', (), ''),
+    Scenario('writer-dashboard-summary:writer', User.Role.WRITER, 'writer-dashboard-summary', (), ''),
+    Scenario('article-search', None, 'article-search', (), 'q=learning+network'),
+    Scenario('rankings', None, 'rankings', (), 'board=articles_by_citations'),
+    Scenario('rankings-journal', None, 'rankings', (), 'board=articles_by_views&journal={journal}'),
+    Scenario('auditlog-list:admin', User.Role.ADMIN, 'auditlog-list', (), 'page_size=50'),
+    Scenario('udc-assignment-list:writer', User.Role.WRITER, 'udc-assignment-list', (), 'page_size=50'),
+    Scenario('writer-udc-order-list:writer', User.Role.WRITER, 'writer-udc-order-list', (), 'page_size=50'),
+    Scenario('printed-publications-list:admin', User.Role.ADMIN, 'printed-publications-list', (), 'page_size=50'),
+    Scenario('financial-report:accountant', User.Role.ACCOUNTANT, 'financial-report', (), ''),
+    Scenario('profile:client', User.Role.CLIENT, 'profile', (), ''),
+]
+
+
+def peak_rss_mb(pid=None):
+    """Peak resident memory of this process, or of process ``pid`` (read from /proc)."""
+    if pid is not None:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=5,
+                              cwd=Path(__file__).resolve().parent).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def dataset_counts():
+    models = (User, Journal, Issue, Article, ArticleVersion, ClickTransaction, ServiceOrder, AuditLog)
+    return {model.__name__: model.objects.count() for model in models}
+
+
+def pick_user(role, **filters):
+    """The first synthetic user of ``role`` matching ``filters``, else any such user."""
+    users = User.objects.filter(role=role, is_active=True, **filters).order_by('pk')
+    return users.filter(phone__startswith=SYNTHETIC_PHONE_PREFIX).first() or users.first()
+
+
+def load_fixtures():
+    """The users each role's scenarios run as and the ids the URLs refer to."""
+    users = {
+        User.Role.ADMIN: pick_user(User.Role.ADMIN),
+        User.Role.ACCOUNTANT: pick_user(User.Role.ACCOUNTANT),
+        User.Role.JOURNAL_MANAGER: pick_user(User.Role.JOURNAL_MANAGER, managed_journals__isnull=False),
+        User.Role.WRITER: pick_user(User.Role.WRITER, articles__isnull=False),
+        User.Role.CLIENT: pick_user(User.Role.CLIENT, articles__isnull=False),
+    }
+    users = {role: user for role, user in users.items() if user is not None}
+    ids = {
+        'article': Article.objects.order_by('pk').values_list('pk', flat=True).first(),
+        'journal': Journal.objects.order_by('pk').values_list('pk', flat=True).first(),
+        'issue': Issue.objects.order_by('pk').values_list('pk', flat=True).first(),
+    }
+    # A page halfway through the article list, where offset paging would be slowest.
+    middle = Article.objects.order_by('-submittedDate', '-id').only('submittedDate')
+    article = middle[Article.objects.count() // 2:].first()
+    ids['deep_cursor'] = article_cursor(article) if article is not None else None
+    return users, ids
+
+
+def article_cursor(article):
+    """The ``cursor`` query value of the article list page that starts after ``article``."""
+    paginator = ArticleKeysetPagination()
+    paginator.base_url = ''
+    return quote(parse_qs(urlsplit(paginator.encode_cursor(article, False)).query)['cursor'][0])
+
+
+def scenario_url(scenario, ids):
+    """The scenario's URL, or None when the data it needs is missing."""
+    needed = list(scenario.args) + [name for name in ids if f'{{{name}}}' in scenario.query]
+    if any(ids.get(name) is None for name in needed):
+        return None
+    url = reverse(scenario.view, args=[ids[name] for name in scenario.args])
+    query = scenario.query.format(**{name: value for name, value in ids.items() if value is not None})
+    return f'{url}?{query}' if query else url
+
+
+class InProcessTarget:
+    """Requests through the test client; counts each request's queries on this thread's connections."""
+    name = 'in-process'
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def request(self, url, authorization):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client()
+        headers = {'HTTP_AUTHORIZATION': authorization} if authorization else {}
+        metrics = RequestMetrics()
+        with ExitStack() as stack:
+            for db in connections.all():
+                stack.enter_context(db.execute_wrapper(metrics))
+            response = client.get(url, **headers)
+        # Streamed responses (files) are read, like a real client would.
+        if getattr(response, 'streaming', False):
+            b''.join(response.streaming_content)
+        return response.status_code, metrics.queries
+
+    def close(self):
+        close_old_connections()
+
+
+class HTTPTarget:
+    """Requests to a running server; queries are counted when it sends ``X-Query-Count``."""
+
+    def __init__(self, base_url):
+        self.name = base_url
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, url, authorization):
+        request = urllib.request.Request(self.base_url + url)
+        if authorization:
+            request.add_header('Authorization', authorization)
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                response.read()
+                status, headers = response.status, response.headers
+        except urllib.error.HTTPError as error:
+            error.read()
+            status, headers = error.code, error.headers
+        queries = headers.get('X-Query-Count')
+        return status, int(queries) if queries is not None else None
+
+    def close(self):
+        pass
+
+
+def measure(target, url, authorization, requests, warmup, concurrency, pid=None):
+    for _ in range(warmup):
+        target.request(url, authorization)
+
+    latencies = []
+    statuses = Counter()
+    queries = []
+    lock = threading.Lock()
+
+    def run(count):
+        for _ in range(count):
+            started = time.perf_counter()
+            status, query_count = target.request(url, authorization)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] += 1
+                if query_count is not None:
+                    queries.append(query_count)
+
+    def worker(count):
+        try:
+            run(count)
+        finally:
+            target.close()
+
+    started = time.perf_counter()
+    if concurrency == 1:
+        # In the calling thread, so in-process requests reuse its connection and warm caches.
+        run(requests)
+    else:
+        shares = [requests // concurrency + (index < requests % concurrency) for index in range(concurrency)]
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for future in [executor.submit(worker, share) for share in shares if share]:
+                future.result()
+    wall_time = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if status >= 400)
+    return {
+        'url': url,
+        'requests': len(latencies),
+        'errors': errors,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'throughput_rps': round(len(latencies) / wall_time, 1) if wall_time else None,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+        'p50_ms': percentile_ms(latencies, 0.5),
+        'p95_ms': percentile_ms(latencies, 0.95),
+        'p99_ms': percentile_ms(latencies, 0.99),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else None,
+        'avg_queries': round(sum(queries) / len(queries), 2) if queries else None,
+        'peak_rss_mb': peak_rss_mb(pid),
+    }
+
+
+def run_benchmark(requests=100, warmup=5, concurrency=1, base_url=None, server_pid=None, only=None, log=None):
+    """
+    Runs every scenario (or those whose name starts with one of ``only``) and returns the
+    results with enough context (revision, versions, database, dataset size) to compare runs.
+    """
+    log = log or (lambda message: None)
+    users, ids = load_fixtures()
+    target = HTTPTarget(base_url) if base_url else InProcessTarget()
+    results = {}
+    with ExitStack() as stack:
+        if base_url is None:
+            stack.enter_context(override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']))
+        for scenario in SCENARIOS:
+            if only and not any(scenario.name.startswith(prefix) for prefix in only):
+                continue
+            url = scenario_url(scenario, ids)
+            user = users.get(scenario.role)
+            if url is None or (scenario.role is not None and user is None):
+                log(f"{scenario.name}: skipped, no data for it")
+                continue
+            # A fresh token per scenario, so long runs outlive the access token lifetime.
+            authorization = f'Bearer {ClaimsRefreshToken.for_user(user).access_token}' if user else None
+            result = measure(target, url, authorization, requests, warmup, concurrency, server_pid)
+            results[scenario.name] = result
+            log(f"{scenario.name}: p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, "
+                f"p99 {result['p99_ms']} ms, {result['throughput_rps']} req/s, {result['errors']} errors")
+
+    return {
+        'created_at': timezone.now().isoformat(),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'debug': settings.DEBUG,
+        'target': target.name,
+        'options': {'requests': requests, 'warmup': warmup, 'concurrency': concurrency},
+        'dataset': dataset_counts(),
+        'peak_rss_mb': peak_rss_mb(server_pid),
+        'scenarios': results,
+    }
+
+
+def save_results(results, path):
+    Path(path).write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+
+
+def load_results(path):
+    return json.loads(Path(path).read_text())
+
+
+def compare_results(baseline, results, metric='p95_ms'):
+    """``[(scenario, baseline value, current value, change in percent), ...]`` for scenarios in both runs."""
+    rows = []
+    for name, current in results['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name, {}).get(metric)
+        after = current.get(metric)
+        if before and after is not None:
+            rows.append((name, before, after, round((after - before) / before * 100, 1)))
+    return rows
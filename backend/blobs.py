@@ -0,0 +1,88 @@
+import os
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import MediaBlob
+from .storage import BLOB_PREFIX, ContentAddressedStorage, content_addressed_storage
+
+DELETE_CHUNK_SIZE = 500
+
+
+def blob_fields():
+    """``(model, field)`` for every FileField stored in ContentAddressedStorage."""
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField) and isinstance(field.storage, ContentAddressedStorage):
+                yield model, field
+
+
+def count_references():
+    """
+    How many file columns point at each blob. Counted from the columns themselves rather
+    than kept up by signals, because ``update()`` paths such as bulk acceptance copy
+    file names without any model being saved.
+    """
+    references = Counter()
+    for model, field in blob_fields():
+        rows = (model._base_manager.filter(**{f'{field.attname}__startswith': f'{BLOB_PREFIX}/'})
+                .values(field.attname).annotate(count=Count('pk')).order_by())
+        for row in rows:
+            references[row[field.attname]] += row['count']
+    return references
+
+
+def collect_garbage(grace=None, dry_run=False):
+    """
+    Deletes blobs nothing references that are older than ``grace`` (MEDIA_BLOB_GC_GRACE_HOURS,
+    24 by default) and refreshes the MediaBlob reference counts.
+
+    The grace period covers files written by transactions that have not committed yet;
+    storing an existing blob again touches its mtime for the same reason.
+    Returns ``{'blobs', 'removed', 'freed_bytes'}``.
+    """
+    if grace is None:
+        grace = timedelta(hours=getattr(settings, 'MEDIA_BLOB_GC_GRACE_HOURS', 24))
+    storage = content_addressed_storage
+    references = count_references()
+    cutoff = time.time() - grace.total_seconds()
+    now = timezone.now()
+
+    kept, removed, freed = {}, [], 0
+    for name, full_path in storage.iter_blobs():
+        try:
+            stat = os.stat(full_path)
+        except FileNotFoundError:
+            continue
+        if not references[name] and stat.st_mtime < cutoff:
+            if not dry_run:
+                storage.remove_blob(name)
+            removed.append(name)
+            freed += stat.st_size
+        elif not os.path.basename(name).startswith('.incoming-'):
+            kept[name] = stat.st_size
+
+    if not dry_run:
+        existing = {blob.name: blob for blob in MediaBlob.objects.all()}
+        new_blobs, changed = [], []
+        for name, size in kept.items():
+            blob = existing.get(name)
+            if blob is None:
+                sha256 = os.path.splitext(os.path.basename(name))[0]
+                new_blobs.append(MediaBlob(name=name, sha256=sha256, size=size, ref_count=references[name],
+                                           counted_at=now))
+            else:
+                blob.size, blob.ref_count, blob.counted_at = size, references[name], now
+                changed.append(blob)
+        MediaBlob.objects.bulk_create(new_blobs, batch_size=500)
+        MediaBlob.objects.bulk_update(changed, ['size', 'ref_count', 'counted_at'], batch_size=500)
+        stale = [blob.pk for name, blob in existing.items() if name not in kept]
+        for offset in range(0, len(stale), DELETE_CHUNK_SIZE):
+            MediaBlob.objects.filter(pk__in=stale[offset:offset + DELETE_CHUNK_SIZE]).delete()
+    return {'blobs': len(kept), 'removed': len(removed), 'freed_bytes': freed}
@@ -0,0 +1,117 @@
+import math
+import uuid
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+
+from .extraction import extract_file
+from .models import Article, Checkout, CheckoutItem, ClickTransaction, ServiceOrder
+from .signals import articles_created
+
+# ``instance`` is an unsaved Article or ServiceOrder; ``amount`` is what the user pays for it.
+PayableItem = namedtuple('PayableItem', ['instance', 'amount'])
+
+# For printed-publication pricing of manuscripts that do not record a page count.
+WORDS_PER_PAGE = 250
+
+MERCHANT_PREFIXES = {
+    Article: 'article',
+    ServiceOrder: 'service',
+    Checkout: 'checkout',
+}
+
+
+def new_merchant_trans_id(obj):
+    # The random part keeps IDs unique when the same object is paid for again, without a lookup.
+    return f"{MERCHANT_PREFIXES[type(obj)]}_{obj.pk}_{uuid.uuid4().hex[:16]}"
+
+
+def build_payment_url(amount, merchant_trans_id):
+    return (
+        f"https://my.click.uz/services/pay"
+        f"?service_id={settings.CLICK_SERVICE_ID}"
+        f"&merchant_id={settings.CLICK_MERCHANT_USER_ID}"
+        f"&amount={float(amount)}"
+        f"&transaction_param={merchant_trans_id}"
+        f"&return_url=http://localhost:5173/#/payment-status"
+    )
+
+
+def article_price(user, journal):
+    is_partner = 'hamkor' in user.get_full_name().lower()
+    return journal.partner_price if is_partner else journal.regular_price
+
+
+def manuscript_pages(file):
+    """Page count of an attached manuscript, estimated from its words when the format has none."""
+    extracted = extract_file(file)
+    return extracted.page_count or math.ceil(extracted.word_count / WORDS_PER_PAGE)
+
+
+def service_order_price(service, form_data, attached_file=None):
+    if service.slug != 'printed-publications':
+        return Decimal(service.price)
+
+    # Calculate price based on pages
+    try:
+        book_pages = int(form_data.get('bookPages', 0))
+        quantity = int(form_data.get('quantity', 1))
+    except (ValueError, TypeError):
+        book_pages = 0
+        quantity = 1
+    if not book_pages and attached_file:
+        book_pages = manuscript_pages(attached_file)
+
+    # Base price calculation: 400 UZS per page
+    base_price = book_pages * 400
+
+    # Add cover type premium
+    cover_type = form_data.get('coverType', 'soft')
+    if cover_type == 'hard':
+        base_price += 25000  # Additional 25,000 UZS for hard cover
+    elif cover_type == 'soft':
+        base_price += 10000  # Additional 10,000 UZS for soft cover
+
+    # Add ISBN price if requested
+    if form_data.get('includeISBN', False):
+        base_price += 600000  # Additional 600,000 UZS for ISBN
+
+    # Multiply by quantity, minimum price of 4000 UZS
+    return Decimal(max(base_price * quantity, 4000))
+
+
+@transaction.atomic
+def checkout(user, items):
+    """
+    Inserts the payable items with one ``bulk_create`` per model and opens a single CLICK
+    transaction for their total. A lone item is paid directly, as before; several items
+    are grouped under a Checkout whose lines the webhook settles together.
+
+    Returns ``(click_transaction, payment_url)``.
+    """
+    items = list(items)
+    by_model = defaultdict(list)
+    for item in items:
+        by_model[type(item.instance)].append(item.instance)
+    for model, instances in by_model.items():
+        model.objects.bulk_create(instances)
+    articles_created(by_model.get(Article, []))
+
+    total = sum((Decimal(item.amount) for item in items), Decimal('0')).quantize(Decimal('0.01'))
+    if len(items) == 1:
+        paid_object = items[0].instance
+    else:
+        paid_object = Checkout.objects.create(user=user, total=total)
+        CheckoutItem.objects.bulk_create([
+            CheckoutItem(checkout=paid_object, content_object=item.instance, amount=item.amount) for item in items
+        ])
+
+    click_transaction = ClickTransaction.objects.create(
+        user=user,
+        amount=total,
+        merchant_trans_id=new_merchant_trans_id(paid_object),
+        content_object=paid_object,
+    )
+    return click_transaction, build_payment_url(total, click_transaction.merchant_trans_id)
@@ -1,11 +1,87 @@
 import hashlib
-from datetime import datetime
+from decimal import Decimal, InvalidOperation
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
-from .models import ClickTransaction, Article, ServiceOrder
+from django.utils import timezone
+from .models import ClickTransaction, Article, Checkout, CheckoutItem, ServiceOrder, RevenueRollup, User
+from .audit import Action, log_event
+from .dashboard import STATE_FIELDS, record_article_transition, state_from_values
+from .revenue import record_payment
+
+# Statuses a CLICK callback may still move a transaction out of.
+OPEN_STATUSES = (ClickTransaction.Status.WAITING, ClickTransaction.Status.PREPARED)
+CLICK_ROW_FIELDS = ('id', 'status', 'amount', 'click_trans_id', 'content_type_id', 'object_id', 'user_id',
+                    'merchant_trans_id', 'extra_data')
+
+
+def amount_matches(expected, received):
+    try:
+        return Decimal(str(received)) == expected
+    except (InvalidOperation, TypeError, ValueError):
+        return False
+
+
+def mark_article_paid(article_id):
+    """
+    Moves a paid article to review with a compare-and-set UPDATE, retried if an editor
+    changed it in between. Returns the (old, new) dashboard states, or None if it is gone.
+    """
+    for _ in range(3):
+        values = Article.objects.filter(pk=article_id).values(*STATE_FIELDS).first()
+        old = state_from_values(values)
+        if old is None:
+            return None
+        changes = {
+            'submissionPaymentStatus': Article.PaymentStatus.PAYMENT_COMPLETED,
+            'status': Article.ArticleStatus.REVIEWING,
+        }
+        if Article.objects.filter(pk=article_id, **{field: values[field] for field in STATE_FIELDS}).update(**changes):
+            return old, old._replace(status=changes['status'], payment_status=changes['submissionPaymentStatus'])
+    raise RuntimeError(f"Article {article_id} kept changing while its payment was applied")
+
+
+def apply_paid_item(model, object_id, amount, paid_at):
+    """Settles one paid Article or ServiceOrder and books its revenue."""
+    if model is Article:
+        states = mark_article_paid(object_id)
+        if states is not None:
+            old, new = states
+            record_article_transition(old, new)
+            record_payment(paid_at, RevenueRollup.SourceType.ARTICLE_SUBMISSION, new.journal_id, amount)
+            if old.status != new.status:
+                log_event(Action.ARTICLE_STATUS_CHANGED, target_type='Article', target_id=object_id,
+                          details={'from': old.status, 'to': new.status})
+    elif model is ServiceOrder:
+        ServiceOrder.objects.filter(pk=object_id).update(status=ServiceOrder.Status.IN_PROGRESS, updated_at=paid_at)
+        record_payment(paid_at, RevenueRollup.SourceType.SERVICE_ORDER, None, amount)
+
+
+def apply_completed_payment(click, paid_at):
+    """
+    Side effects of a completed payment, for callers that won the status UPDATE. Runs
+    without loading model instances, so the Article signals are replayed by hand.
+    """
+    model = ContentType.objects.get_for_id(click['content_type_id']).model_class()
+    if model is Checkout:
+        items = CheckoutItem.objects.filter(checkout_id=click['object_id']).values_list(
+            'content_type_id', 'object_id', 'amount')
+        for content_type_id, object_id, amount in items:
+            apply_paid_item(ContentType.objects.get_for_id(content_type_id).model_class(), object_id, amount, paid_at)
+    else:
+        apply_paid_item(model, click['object_id'], click['amount'], paid_at)
+
+    payer = User(pk=click['user_id']) if click['user_id'] else None
+    log_event(Action.PAYMENT_APPROVED, user=payer, target_type='ClickTransaction', target_id=click['id'], details={
+        'amount': str(click['amount']),
+        'merchant_trans_id': click['merchant_trans_id'],
+        'object_type': model._meta.model_name if model else None,
+        'object_id': click['object_id'],
+    })
 
 
 class ClickPrepareView(APIView):
@@ -25,31 +101,35 @@ class ClickPrepareView(APIView):
         if sign_string != md5_hash:
             return Response({'error': -1, 'error_note': 'SIGN CHECK FAILED!'})
 
-        try:
-            transaction = ClickTransaction.objects.get(merchant_trans_id=merchant_trans_id)
-        except ClickTransaction.DoesNotExist:
-            return Response({'error': -5, 'error_note': 'Transaction does not exist'})
-
-        if action == '0':
-            if transaction.status != ClickTransaction.Status.WAITING:
-                return Response({'error': -4, 'error_note': 'Transaction already processed'})
+        if action != '0':
+            return Response({'error': -1, 'error_note': 'Unknown action'})
 
-            if str(transaction.amount) != str(amount):
-                return Response({'error': -2, 'error_note': 'Incorrect parameter amount'})
+        click = ClickTransaction.objects.filter(merchant_trans_id=merchant_trans_id).values(*CLICK_ROW_FIELDS).first()
+        if click is None:
+            return Response({'error': -5, 'error_note': 'Transaction does not exist'})
 
-            transaction.status = ClickTransaction.Status.PREPARED
-            transaction.click_trans_id = click_trans_id
-            transaction.save()
+        if not amount_matches(click['amount'], amount):
+            return Response({'error': -2, 'error_note': 'Incorrect parameter amount'})
 
-            return Response({
-                'click_trans_id': click_trans_id,
-                'merchant_trans_id': merchant_trans_id,
-                'merchant_prepare_id': transaction.id,
-                'error': 0,
-                'error_note': 'Success'
-            })
+        # Only the callback whose UPDATE matches the waiting row prepares it; a retry of the
+        # same prepare finds its own click_trans_id already stored and gets the same answer.
+        prepared = click['status'] == ClickTransaction.Status.WAITING and ClickTransaction.objects.filter(
+            pk=click['id'], status=ClickTransaction.Status.WAITING
+        ).update(status=ClickTransaction.Status.PREPARED, click_trans_id=click_trans_id, updated_at=timezone.now())
+        if not prepared:
+            current = ClickTransaction.objects.filter(pk=click['id']).values('status', 'click_trans_id').first()
+            is_replay = (current['status'] == ClickTransaction.Status.PREPARED and
+                         current['click_trans_id'] == str(click_trans_id))
+            if not is_replay:
+                return Response({'error': -4, 'error_note': 'Transaction already processed'})
 
-        return Response({'error': -1, 'error_note': 'Unknown action'})
+        return Response({
+            'click_trans_id': click_trans_id,
+            'merchant_trans_id': merchant_trans_id,
+            'merchant_prepare_id': click['id'],
+            'error': 0,
+            'error_note': 'Success'
+        })
 
 
 class ClickCompleteView(APIView):
@@ -73,46 +153,57 @@ class ClickCompleteView(APIView):
             return Response({'error': -1, 'error_note': 'SIGN CHECK FAILED!'})
 
         try:
-            transaction = ClickTransaction.objects.get(id=merchant_prepare_id, merchant_trans_id=merchant_trans_id)
-        except ClickTransaction.DoesNotExist:
+            click = ClickTransaction.objects.filter(
+                id=merchant_prepare_id, merchant_trans_id=merchant_trans_id
+            ).values(*CLICK_ROW_FIELDS).first()
+        except (TypeError, ValueError):
+            click = None
+        if click is None:
             return Response({'error': -6, 'error_note': 'Transaction does not exist'})
 
-        if transaction.status == ClickTransaction.Status.COMPLETED:
+        if click['status'] == ClickTransaction.Status.COMPLETED:
             return Response({'error': -4, 'error_note': 'Already paid'})
 
-        if str(transaction.amount) != str(amount):
+        if not amount_matches(click['amount'], amount):
             return Response({'error': -2, 'error_note': 'Incorrect parameter amount'})
 
-        if action == '1':
-            if error == '0':
-                transaction.status = ClickTransaction.Status.COMPLETED
-                transaction.save()
-
-                related_object = transaction.content_object
-                if isinstance(related_object, Article):
-                    related_object.submissionPaymentStatus = Article.PaymentStatus.PAYMENT_COMPLETED
-                    related_object.status = Article.ArticleStatus.REVIEWING
-                    related_object.save()
-                elif isinstance(related_object, ServiceOrder):
-                    related_object.status = ServiceOrder.Status.IN_PROGRESS
-                    related_object.save()
-
-                return Response({
-                    'click_trans_id': click_trans_id,
-                    'merchant_trans_id': merchant_trans_id,
-                    'merchant_confirm_id': transaction.id,
-                    'error': 0,
-                    'error_note': 'Success'
-                })
-            else:
-                transaction.status = ClickTransaction.Status.CANCELLED
-                transaction.extra_data['cancel_error_code'] = error
-                transaction.save()
-                return Response({
-                    'click_trans_id': click_trans_id,
-                    'merchant_trans_id': merchant_trans_id,
-                    'error': -9,
-                    'error_note': 'Payment cancelled'
-                })
-
-        return Response({'error': -1, 'error_note': 'Unknown action'})
\ No newline at end of file
+        if action != '1':
+            return Response({'error': -1, 'error_note': 'Unknown action'})
+
+        now = timezone.now()
+        pending = ClickTransaction.objects.filter(pk=click['id'], status__in=OPEN_STATUSES)
+        if error == '0':
+            with transaction.atomic():
+                # The conditional UPDATE is the only gate: of several parallel retries exactly one
+                # matches the open row, and only that one applies the side effects.
+                completed = pending.update(status=ClickTransaction.Status.COMPLETED, completed_at=now, updated_at=now)
+                if completed:
+                    apply_completed_payment(click, now)
+            if not completed:
+                return self.closed_response(click['id'])
+
+            return Response({
+                'click_trans_id': click_trans_id,
+                'merchant_trans_id': merchant_trans_id,
+                'merchant_confirm_id': click['id'],
+                'error': 0,
+                'error_note': 'Success'
+            })
+
+        extra_data = dict(click['extra_data'] or {}, cancel_error_code=error)
+        if not pending.update(status=ClickTransaction.Status.CANCELLED, extra_data=extra_data, updated_at=now):
+            current = ClickTransaction.objects.filter(pk=click['id']).values_list('status', flat=True).first()
+            if current != ClickTransaction.Status.CANCELLED:
+                return self.closed_response(click['id'])
+        return Response({
+            'click_trans_id': click_trans_id,
+            'merchant_trans_id': merchant_trans_id,
+            'error': -9,
+            'error_note': 'Payment cancelled'
+        })
+
+    def closed_response(self, pk):
+        current = ClickTransaction.objects.filter(pk=pk).values_list('status', flat=True).first()
+        if current == ClickTransaction.Status.COMPLETED:
+            return Response({'error': -4, 'error_note': 'Already paid'})
+        return Response({'error': -9, 'error_note': 'Transaction cancelled'})
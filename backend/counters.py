@@ -0,0 +1,100 @@
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from .models import Article
+from .rankings import refresh_for_articles
+
+logger = logging.getLogger(__name__)
+
+COUNTER_KINDS = {
+    'view': 'viewCount',
+    'download': 'downloadCount',
+}
+
+
+class CounterBuffer:
+    """
+    Collects counter increments in memory and applies them as ``F()`` updates.
+
+    Each flush swaps the pending dict out under the lock, groups articles by the
+    size of their increment and issues one ``UPDATE ... SET field = field + n
+    WHERE id IN (...)`` per group, so a hot article costs one write per flush
+    interval. If the write fails the increments are merged back for the next flush.
+    """
+
+    def __init__(self, interval=5.0):
+        self.interval = interval
+        self._pending = defaultdict(int)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def increment(self, article_id, field, amount=1):
+        with self._lock:
+            self._pending[(article_id, field)] += amount
+        self._ensure_flusher()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, defaultdict(int)
+            if not pending:
+                return 0
+
+            groups = defaultdict(list)
+            for (article_id, field), amount in pending.items():
+                groups[(field, amount)].append(article_id)
+            try:
+                with transaction.atomic():
+                    for (field, amount), article_ids in groups.items():
+                        Article.objects.filter(pk__in=article_ids).update(**{field: F(field) + amount})
+            except Exception:
+                logger.exception("Counter flush failed; keeping %d increments for the next run", len(pending))
+                with self._lock:
+                    for key, amount in pending.items():
+                        self._pending[key] += amount
+                return 0
+
+            changed_fields = sorted({field for field, _ in groups})
+            touched = sorted({article_id for article_id, _ in pending})
+            try:
+                refresh_for_articles(touched, fields=changed_fields)
+            except Exception:
+                logger.exception("Ranking refresh after counter flush failed")
+            return len(pending)
+
+    def _ensure_flusher(self):
+        if self._thread is not None or self.interval <= 0:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='counter-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            close_old_connections()
+            self.flush()
+
+    def stop(self):
+        self._stopped.set()
+        self.flush()
+
+
+buffer = CounterBuffer(interval=getattr(settings, 'COUNTER_FLUSH_INTERVAL', 5.0))
+atexit.register(buffer.stop)
+
+
+def record_hit(article_id, kind):
+    buffer.increment(article_id, COUNTER_KINDS[kind])
@@ -0,0 +1,246 @@
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import Article, DashboardCounter, Journal, User
+
+ArticleState = namedtuple('ArticleState', [
+    'author_id', 'journal_id', 'status', 'payment_status', 'submission_fee', 'publication_fee'
+])
+
+STATE_FIELDS = ('author_id', 'journal_id', 'status', 'submissionPaymentStatus', 'submission_fee', 'publication_fee')
+
+PAID_REVIEWING = {
+    'status': Article.ArticleStatus.REVIEWING,
+    'payment_status': Article.PaymentStatus.PAYMENT_COMPLETED,
+}
+
+# Each role's summary as (key, measure, filter). ``measure`` is 'count' or a fee column to sum;
+# the filter uses DashboardCounter bucket names (status, payment_status).
+ROLE_SUMMARIES = {
+    User.Role.CLIENT: [
+        ('pending', 'count', {'status': Article.ArticleStatus.PENDING}),
+        ('revision', 'count', {'status': Article.ArticleStatus.NEEDS_REVISION}),
+        ('accepted', 'count', {'status': Article.ArticleStatus.ACCEPTED}),
+    ],
+    User.Role.WRITER: [
+        ('pending', 'count', {'status': Article.ArticleStatus.PENDING}),
+        ('revision', 'count', {'status': Article.ArticleStatus.NEEDS_REVISION}),
+        ('accepted', 'count', {'status': Article.ArticleStatus.ACCEPTED}),
+        ('totalArticles', 'count', {}),
+    ],
+    User.Role.JOURNAL_MANAGER: [
+        ('newSubmissions', 'count', PAID_REVIEWING),
+        ('reviewing', 'count', PAID_REVIEWING),
+    ],
+    User.Role.ACCOUNTANT: [
+        ('totalArticles', 'count', {}),
+        ('total_submission_fees', 'submission_fee', {}),
+        ('total_publication_fees', 'publication_fee', {}),
+    ],
+    User.Role.ADMIN: [
+        ('totalArticles', 'count', {}),
+        ('pendingAll', 'count', {'status': Article.ArticleStatus.PENDING}),
+        ('total_submission_fees', 'submission_fee', {}),
+        ('total_publication_fees', 'publication_fee', {}),
+    ],
+}
+
+BUCKET_TO_ARTICLE_FIELD = {'status': 'status', 'payment_status': 'submissionPaymentStatus'}
+MEASURE_TO_COUNTER_FIELD = {'submission_fee': 'submission_fees', 'publication_fee': 'publication_fees'}
+
+
+def use_counters():
+    return getattr(settings, 'DASHBOARD_USE_COUNTERS', True)
+
+
+def get_scope(user):
+    """Returns the (scope, ids) whose buckets make up ``user``'s dashboard."""
+    if user.role in (User.Role.CLIENT, User.Role.WRITER):
+        return DashboardCounter.Scope.AUTHOR, [user.id]
+    if user.role == User.Role.JOURNAL_MANAGER:
+        return DashboardCounter.Scope.JOURNAL, Journal.objects.filter(manager=user).values('id')
+    return DashboardCounter.Scope.GLOBAL, [0]
+
+
+def get_article_scope(user):
+    if user.role in (User.Role.CLIENT, User.Role.WRITER):
+        return Article.objects.filter(author=user)
+    if user.role == User.Role.JOURNAL_MANAGER:
+        return Article.objects.filter(journal__manager=user)
+    return Article.objects.all()
+
+
+def aggregate_articles(queryset, spec):
+    """Evaluates a summary spec over ``queryset`` with one conditional-aggregation query."""
+    expressions = {}
+    for key, measure, filters in spec:
+        condition = Q(**{BUCKET_TO_ARTICLE_FIELD[name]: value for name, value in filters.items()})
+        if measure == 'count':
+            expressions[key] = Count('id', filter=condition)
+        else:
+            expressions[key] = Sum(measure, filter=condition)
+    result = queryset.aggregate(**expressions) if expressions else {}
+    return {key: value or 0 for key, value in result.items()}
+
+
+def aggregate_counters(buckets, spec):
+    data = {}
+    for key, measure, filters in spec:
+        field = 'article_count' if measure == 'count' else MEASURE_TO_COUNTER_FIELD[measure]
+        data[key] = sum(
+            (getattr(bucket, field) for bucket in buckets
+             if all(getattr(bucket, name) == value for name, value in filters.items())),
+            0 if measure == 'count' else Decimal('0')
+        )
+    return data
+
+
+def get_dashboard_summary(user):
+    spec = ROLE_SUMMARIES.get(user.role)
+    if spec is None:
+        return {}
+
+    if use_counters():
+        scope, ids = get_scope(user)
+        buckets = list(DashboardCounter.objects.filter(scope=scope, scope_id__in=ids))
+        data = aggregate_counters(buckets, spec)
+    else:
+        data = aggregate_articles(get_article_scope(user), spec)
+
+    if user.role in (User.Role.ACCOUNTANT, User.Role.ADMIN):
+        is_admin = user.role == User.Role.ADMIN
+        data.update({
+            'totalUsers': User.objects.count() if is_admin else None,
+            'totalJournals': Journal.objects.count() if is_admin else None,
+            'pendingAll': data.get('pendingAll') if is_admin else None,
+            'payments_pending_approval': 0,
+            'pending_payments_list': [],
+        })
+    return data
+
+
+def get_article_state(article):
+    return ArticleState(
+        article.author_id,
+        article.journal_id,
+        article.status,
+        article.submissionPaymentStatus,
+        Decimal(str(article.submission_fee or 0)),
+        Decimal(str(article.publication_fee or 0)),
+    )
+
+
+def state_from_values(values):
+    return ArticleState(*(values[field] for field in STATE_FIELDS)) if values else None
+
+
+def _add(bucket, count, submission_fees, publication_fees):
+    scope, scope_id, status, payment_status = bucket
+    lookup = {'scope': scope, 'scope_id': scope_id, 'status': status, 'payment_status': payment_status}
+    changes = {
+        'article_count': F('article_count') + count,
+        'submission_fees': F('submission_fees') + submission_fees,
+        'publication_fees': F('publication_fees') + publication_fees,
+    }
+    if DashboardCounter.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            DashboardCounter.objects.create(
+                article_count=count,
+                submission_fees=submission_fees,
+                publication_fees=publication_fees,
+                **lookup
+            )
+    except IntegrityError:
+        DashboardCounter.objects.filter(**lookup).update(**changes)
+
+
+def _buckets(state):
+    buckets = [
+        (DashboardCounter.Scope.GLOBAL, 0, state.status, state.payment_status),
+        (DashboardCounter.Scope.AUTHOR, state.author_id, state.status, state.payment_status),
+    ]
+    if state.journal_id:
+        buckets.append((DashboardCounter.Scope.JOURNAL, state.journal_id, state.status, state.payment_status))
+    return buckets
+
+
+def _apply(state, sign):
+    for bucket in _buckets(state):
+        _add(bucket, sign, sign * state.submission_fee, sign * state.publication_fee)
+
+
+def record_article_transition(old, new):
+    """
+    Moves one article between counter buckets. ``old``/``new`` are ArticleState
+    tuples, or None for a created/deleted article. Callers that bypass save()
+    (queryset ``update()``) must call this themselves.
+    """
+    if old == new:
+        return
+    with transaction.atomic():
+        if old is not None:
+            _apply(old, -1)
+        if new is not None:
+            _apply(new, 1)
+
+
+def record_bulk_transition(old_states, **changes):
+    """
+    Counter bookkeeping for ``Article.objects.filter(...).update(**changes)``. Moves are
+    summed per bucket first, so a batch costs one UPDATE per touched bucket.
+    """
+    mapping = {'status': 'status', 'submissionPaymentStatus': 'payment_status'}
+    deltas = defaultdict(lambda: [0, Decimal(0), Decimal(0)])
+    for old in old_states:
+        new = old._replace(**{mapping[name]: value for name, value in changes.items() if name in mapping})
+        if old == new:
+            continue
+        for state, sign in ((old, -1), (new, 1)):
+            for bucket in _buckets(state):
+                delta = deltas[bucket]
+                delta[0] += sign
+                delta[1] += sign * state.submission_fee
+                delta[2] += sign * state.publication_fee
+    with transaction.atomic():
+        for bucket, (count, submission_fees, publication_fees) in deltas.items():
+            if count or submission_fees or publication_fees:
+                _add(bucket, count, submission_fees, publication_fees)
+
+
+def rebuild_counters():
+    """Recomputes every bucket from the Article table; returns the number of rows written."""
+    groupings = [
+        (DashboardCounter.Scope.GLOBAL, None),
+        (DashboardCounter.Scope.AUTHOR, 'author_id'),
+        (DashboardCounter.Scope.JOURNAL, 'journal_id'),
+    ]
+    rows = []
+    for scope, column in groupings:
+        keys = ['status', 'submissionPaymentStatus'] + ([column] if column else [])
+        queryset = Article.objects.order_by().values(*keys).annotate(
+            article_count=Count('id'),
+            submission_fees=Sum('submission_fee'),
+            publication_fees=Sum('publication_fee'),
+        )
+        if column == 'journal_id':
+            queryset = queryset.filter(journal__isnull=False)
+        for row in queryset:
+            rows.append(DashboardCounter(
+                scope=scope,
+                scope_id=row[column] if column else 0,
+                status=row['status'],
+                payment_status=row['submissionPaymentStatus'],
+                article_count=row['article_count'],
+                submission_fees=row['submission_fees'] or 0,
+                publication_fees=row['publication_fees'] or 0,
+            ))
+    with transaction.atomic():
+        DashboardCounter.objects.all().delete()
+        DashboardCounter.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
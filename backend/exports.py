@@ -0,0 +1,117 @@
+import csv
+import json
+import tempfile
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, StreamingHttpResponse
+from openpyxl import Workbook
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas
+
+EXPORT_CHUNK_SIZE = 2000
+
+APPROVED_ARTICLE_FIELDS = ('id', 'title', 'author__name', 'author__surname', 'journal__name', 'publicationDate')
+APPROVED_ARTICLE_HEADER = ['ID', 'Sarlavha', 'Muallif', 'Jurnal', 'Tasdiqlangan Sana']
+APPROVED_ARTICLE_KEYS = ['id', 'title', 'author', 'journal', 'publicationDate']
+
+
+class Echo:
+    """File-like object whose write() hands the value back, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def iter_approved_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yields flat report rows from a server-side cursor, ``chunk_size`` rows at a time."""
+    for article_id, title, name, surname, journal_name, publication_date in queryset.values_list(
+            *APPROVED_ARTICLE_FIELDS).iterator(chunk_size=chunk_size):
+        yield [
+            article_id,
+            title,
+            f"{name} {surname}".strip(),
+            journal_name or 'N/A',
+            publication_date.strftime('%Y-%m-%d') if publication_date else 'N/A',
+        ]
+
+
+def stream_csv(rows, header, filename):
+    writer = csv.writer(Echo())
+
+    def generate():
+        # BOM so Excel opens the UTF-8 (Uzbek/Russian) titles correctly.
+        yield '\ufeff' + writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(generate(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def stream_ndjson(rows, header, filename):
+    def generate():
+        for row in rows:
+            yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+    response = StreamingHttpResponse(generate(), content_type='application/x-ndjson; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def write_xlsx(monthly_revenue, rows, output):
+    """
+    Writes the financial report with a write-only workbook: rows are flushed to disk
+    as they are appended, so memory stays flat regardless of the row count.
+    """
+    wb = Workbook(write_only=True)
+    ws1 = wb.create_sheet(title="Oylik Daromad")
+    ws1.append(['Oy', 'Jami Daromad (UZS)'])
+    for item in monthly_revenue:
+        ws1.append([item['month'].strftime('%Y-%m'), item['total']])
+    ws2 = wb.create_sheet(title="Tasdiqlangan Maqolalar")
+    ws2.append(APPROVED_ARTICLE_HEADER)
+    for row in rows:
+        ws2.append(row)
+    wb.save(output)
+
+
+def xlsx_response(monthly_revenue, rows, filename):
+    # XLSX is a zip whose directory is written last, so it cannot be sent before it is
+    # finished; spool it to a temporary file and stream that back in blocks.
+    output = tempfile.TemporaryFile()
+    write_xlsx(monthly_revenue, rows, output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=filename,
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+def write_pdf(monthly_revenue, rows, output):
+    p = canvas.Canvas(output, pagesize=letter)
+    width, height = letter
+    y_position = height - inch
+    p.drawString(inch, y_position, "Moliyaviy Hisobot")
+    y_position -= 0.5 * inch
+    p.drawString(inch, y_position, "Oylik Daromad")
+    y_position -= 0.25 * inch
+    for item in monthly_revenue:
+        p.drawString(inch, y_position, f"{item['month'].strftime('%Y-%m')}: {item['total']} UZS")
+        y_position -= 0.25 * inch
+        if y_position < inch:
+            p.showPage()
+            y_position = height - inch
+    y_position -= 0.5 * inch
+    p.drawString(inch, y_position, "Tasdiqlangan Maqolalar Tarixi")
+    y_position -= 0.25 * inch
+    for article_id, title, author_name, journal_name, publication_date in rows:
+        p.drawString(inch, y_position, f"ID {article_id}: {title[:40]}... ({author_name})")
+        y_position -= 0.25 * inch
+        if y_position < inch:
+            p.showPage()
+            y_position = height - inch
+    p.save()
@@ -0,0 +1,144 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models.fields.files import FieldFile
+
+from .models import ExtractedText
+from .storage import is_blob_name
+from .textextract import extract_document
+
+logger = logging.getLogger(__name__)
+
+HASH_BLOCK_SIZE = 64 * 1024
+
+_executor = None
+_process_pool = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'EXTRACTION_WORKERS', 2),
+                thread_name_prefix='extraction',
+            )
+        return _executor
+
+
+def get_process_pool():
+    """
+    Processes for CPU-bound document work (parsing, MinHash), which would otherwise hold the GIL.
+    Workers are started from a clean server process (or spawned), never forked from this one:
+    a fork copies locks held by the audit, counter and job threads and can deadlock the child.
+    The functions run there (textextract, minhash, pdfmerge, thumbnails) do not use Django.
+    """
+    global _process_pool
+    with _executor_lock:
+        if _process_pool is None:
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _process_pool = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'DOCUMENT_PROCESSES', 2),
+                mp_context=multiprocessing.get_context(method),
+            )
+        return _process_pool
+
+
+def run_in_pool(function, *args):
+    """Runs ``function`` in the process pool and waits for it (in this process with DOCUMENT_PROCESSES=0)."""
+    if getattr(settings, 'DOCUMENT_PROCESSES', 2) <= 0:
+        return function(*args)
+    return get_process_pool().submit(function, *args).result()
+
+
+def file_sha256(file):
+    # Completed chunked uploads and content-addressed blobs already carry their hash.
+    digest = getattr(file, 'sha256', None)
+    if digest:
+        return digest
+    if is_blob_name(getattr(file, 'name', None)):
+        return os.path.splitext(os.path.basename(file.name))[0]
+    hasher = hashlib.sha256()
+    for chunk in file.chunks(HASH_BLOCK_SIZE):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+@contextmanager
+def local_path(file):
+    """A filesystem path holding ``file``'s bytes, spooled to a temporary file if needed."""
+    if hasattr(file, 'temporary_file_path'):
+        yield file.temporary_file_path()
+        return
+    try:
+        path = file.path
+    except (AttributeError, NotImplementedError):
+        path = None
+    if path is not None:
+        yield path
+        return
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(file.name)[1]) as spool:
+        for chunk in file.chunks(HASH_BLOCK_SIZE):
+            spool.write(chunk)
+        spool.flush()
+        yield spool.name
+
+
+def extract_path(path, name, sha256):
+    """The ExtractedText for this content, parsing the file only if no earlier upload had the same bytes."""
+    cached = ExtractedText.objects.filter(sha256=sha256).first()
+    if cached is not None:
+        return cached
+    text, page_count, word_count = run_in_pool(extract_document, path, name)
+    try:
+        with transaction.atomic():
+            return ExtractedText.objects.create(
+                sha256=sha256, text=text, page_count=page_count, word_count=word_count
+            )
+    except IntegrityError:
+        # Another worker finished the same content first.
+        return ExtractedText.objects.get(sha256=sha256)
+
+
+def extract_file(file):
+    """ExtractedText of a FieldFile or an (uncommitted) uploaded file."""
+    if isinstance(file, FieldFile) and not file._committed:
+        # Assigned to a model but not saved to storage yet: read the upload itself.
+        file = file.file
+    sha256 = file_sha256(file)
+    cached = ExtractedText.objects.filter(sha256=sha256).first()
+    if cached is not None:
+        return cached
+    if hasattr(file, 'claim'):
+        # Completed chunked upload: read it in place without claiming it for a FileField.
+        return extract_path(file.path, file.name, sha256)
+    with local_path(file) as path:
+        return extract_path(path, file.name, sha256)
+
+
+def run_extraction(path, name, sha256):
+    close_old_connections()
+    try:
+        extract_path(path, name, sha256)
+    except FileNotFoundError:
+        # The file was attached (and moved) first; whoever reads it next extracts it.
+        pass
+    except Exception:
+        logger.exception("Extracting text from %s failed", name)
+    finally:
+        close_old_connections()
+
+
+def queue_extraction(path, name, sha256):
+    """Extracts the file in the background once the current transaction commits."""
+    if getattr(settings, 'EXTRACTION_IN_PROCESS', True):
+        transaction.on_commit(lambda: get_executor().submit(run_extraction, path, name, sha256))
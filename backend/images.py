@@ -0,0 +1,171 @@
+"""
+Resized variants of uploaded images (journal covers, applicants' 3x4 photos).
+
+Serializers link to ``/api/image-variants/<token>/``, where the signed token names the
+source file and the variant, so the URL is stable and needs no lookup to build. The
+first request for a variant (or the background job queued when the image is saved)
+renders it into ``image_variants/`` in the default storage; later requests stream the
+stored file. WebP is sent to clients that accept it, JPEG to the others.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.urls import reverse
+from PIL import Image, UnidentifiedImageError, features
+
+from .caching import TTLCache
+from .extraction import local_path, run_in_pool
+from .thumbnails import make_thumbnail
+
+logger = logging.getLogger(__name__)
+
+# Bounding boxes; variants keep the source's aspect ratio.
+VARIANT_SIZES = {
+    'thumb': (160, 160),
+    'card': (480, 480),
+}
+FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+}
+VARIANT_DIR = 'image_variants'
+SIGNING_SALT = 'backend.images.variant'
+
+# Sources that are not images (a PDF uploaded as a photo) or too large to decode, so they are not
+# re-read on every request.
+_unreadable = TTLCache(maxsize=1024, ttl=3600)
+_render_locks = TTLCache(maxsize=1024, ttl=600)
+_render_locks_lock = threading.Lock()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_VARIANT_WORKERS', 1),
+                thread_name_prefix='image-variants',
+            )
+        return _executor
+
+
+def variant_formats():
+    return [fmt for fmt in FORMATS if fmt != 'webp' or features.check('webp')]
+
+
+def variant_name(source_name, variant, fmt):
+    digest = hashlib.sha1(source_name.encode('utf-8')).hexdigest()
+    return f"{VARIANT_DIR}/{digest[:2]}/{digest}_{variant}.{fmt}"
+
+
+def variant_urls(request, field_file):
+    """``{variant: URL}`` for an image field (absolute with a request), or None if it is empty."""
+    if not field_file:
+        return None
+    urls = {}
+    for variant in VARIANT_SIZES:
+        token = signing.Signer(salt=SIGNING_SALT).sign_object([field_file.name, variant], compress=True)
+        url = reverse('image-variant', args=[token])
+        urls[variant] = request.build_absolute_uri(url) if request is not None else url
+    return urls
+
+
+def read_token(token):
+    """``(source name, variant)`` of a token made by ``variant_urls``, or None if it is not valid."""
+    try:
+        source_name, variant = signing.Signer(salt=SIGNING_SALT).unsign_object(token)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    if variant not in VARIANT_SIZES:
+        return None
+    return source_name, variant
+
+
+def render_lock(name):
+    with _render_locks_lock:
+        lock = _render_locks.get(name)
+        if lock is None:
+            lock = threading.Lock()
+            _render_locks.set(name, lock)
+        return lock
+
+
+@contextmanager
+def stored_path(name):
+    """A filesystem path holding the stored file ``name``."""
+    try:
+        path = default_storage.path(name)
+    except NotImplementedError:
+        path = None
+    if path is not None:
+        yield path
+        return
+    with default_storage.open(name, 'rb') as source, local_path(source) as path:
+        yield path
+
+
+def get_variant(source_name, variant, fmt):
+    """Storage name of the variant, rendering it first if needed; None if the source is missing or not an image."""
+    name = variant_name(source_name, variant, fmt)
+    if default_storage.exists(name):
+        return name
+    if _unreadable.get(source_name) or not default_storage.exists(source_name):
+        return None
+    # Concurrent first requests in this process render once; other processes may duplicate the work.
+    with render_lock(name):
+        if default_storage.exists(name):
+            return name
+        handle, output_path = tempfile.mkstemp(suffix=f'.{fmt}')
+        os.close(handle)
+        try:
+            with stored_path(source_name) as source_path:
+                run_in_pool(make_thumbnail, source_path, output_path, VARIANT_SIZES[variant], FORMATS[fmt][0])
+            with open(output_path, 'rb') as output:
+                saved = default_storage.save(name, File(output))
+        except (UnidentifiedImageError, Image.DecompressionBombError) as exc:
+            logger.warning("Cannot make the %s variant of %s: %s", variant, source_name, exc)
+            _unreadable.set(source_name, True)
+            return None
+        except OSError as exc:
+            # Possibly transient (storage, disk space): not remembered, the next request tries again.
+            logger.warning("Making the %s variant of %s failed: %s", variant, source_name, exc)
+            return None
+        finally:
+            os.remove(output_path)
+    if saved != name:
+        # Another process stored it first; ours got a suffixed name.
+        default_storage.delete(saved)
+    return name
+
+
+def render_variants(source_name):
+    close_old_connections()
+    try:
+        for variant in VARIANT_SIZES:
+            for fmt in variant_formats():
+                if get_variant(source_name, variant, fmt) is None:
+                    return
+    except Exception:
+        logger.exception("Rendering image variants of %s failed", source_name)
+    finally:
+        close_old_connections()
+
+
+def queue_variants(field_file):
+    """Renders every variant of the image in the background once the current transaction commits."""
+    if field_file and getattr(settings, 'IMAGE_VARIANTS_IN_PROCESS', True):
+        source_name = field_file.name
+        transaction.on_commit(lambda: get_executor().submit(render_variants, source_name))
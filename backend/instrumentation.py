@@ -0,0 +1,178 @@
+"""
+Per-endpoint request metrics: SQL query count, time in the database, time in DRF
+serializers and total time, keyed by the resolved URL name (``article-list``,
+``dashboard-summary``, ...).
+
+RequestMetricsMiddleware measures each request. Totals per endpoint are kept in this
+process and served to admins by ``/api/request-metrics/``; with DEBUG (or
+REQUEST_METRICS_HEADERS) every response also carries them in ``X-Query-Count`` and
+``Server-Timing`` headers.
+
+QUERY_BUDGETS caps the queries an endpoint may issue, whatever the amount of data;
+``backend.tests.test_query_budgets`` checks every budgeted endpoint with few and many
+rows. At runtime a request over budget is logged, or raises QueryBudgetExceeded with
+QUERY_BUDGET_STRICT. The QUERY_BUDGETS setting adds to or overrides these budgets per
+URL name.
+"""
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+# Queries allowed per request, the same for 3 rows or 300. Each is the measured count plus
+# two: room for the user lookup of plain JWTAuthentication and a cache miss, not for a loop.
+QUERY_BUDGETS = {
+    'article-list': 3,
+    'article-detail': 4,
+    'writer-article-list': 3,
+    'issue-list': 4,
+    'issue-detail': 4,
+    'journal-list': 4,
+    'journal-detail': 4,
+    'dashboard-summary': 5,
+    'writer-dashboard-summary': 3,
+    'article-search': 4,
+    'rankings': 3,
+    'auditlog-list': 3,
+    'application-list': 3,
+    'printed-publications-list': 3,
+    'user-list': 3,
+}
+RECENT_SAMPLES = 500
+
+current_metrics = contextvars.ContextVar('request_metrics', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'db_time', 'serializer_time', 'serializer_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper: counts and times every query on the request's connections."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+
+def percentile_ms(samples, share):
+    """Nearest-rank percentile of sorted durations in seconds, in milliseconds; None without samples."""
+    if not samples:
+        return None
+    return round(samples[min(int(len(samples) * share), len(samples) - 1)] * 1000, 2)
+
+
+class EndpointStats:
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.total_time = 0.0
+        self.over_budget = 0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def add(self, metrics, total_time, over_budget):
+        self.requests += 1
+        self.queries += metrics.queries
+        self.max_queries = max(self.max_queries, metrics.queries)
+        self.db_time += metrics.db_time
+        self.serializer_time += metrics.serializer_time
+        self.total_time += total_time
+        self.over_budget += over_budget
+        self.recent.append(total_time)
+
+    def as_dict(self):
+        recent = sorted(self.recent)
+        return {
+            'requests': self.requests,
+            'avg_queries': round(self.queries / self.requests, 2),
+            'max_queries': self.max_queries,
+            'avg_db_ms': round(self.db_time / self.requests * 1000, 2),
+            'avg_serializer_ms': round(self.serializer_time / self.requests * 1000, 2),
+            'avg_total_ms': round(self.total_time / self.requests * 1000, 2),
+            'p50_total_ms': percentile_ms(recent, 0.5),
+            'p95_total_ms': percentile_ms(recent, 0.95),
+            'over_budget': self.over_budget,
+        }
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def get_budget(endpoint):
+    return {**QUERY_BUDGETS, **getattr(settings, 'QUERY_BUDGETS', {})}.get(endpoint)
+
+
+def record(endpoint, metrics, total_time):
+    """Adds a finished request to its endpoint's totals and checks the query budget."""
+    budget = get_budget(endpoint)
+    over_budget = budget is not None and metrics.queries > budget
+    with _stats_lock:
+        stats = _stats.get(endpoint)
+        if stats is None:
+            stats = _stats[endpoint] = EndpointStats()
+        stats.add(metrics, total_time, over_budget)
+    if over_budget:
+        message = f"{endpoint} issued {metrics.queries} queries, over its budget of {budget}"
+        if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+def get_stats():
+    with _stats_lock:
+        stats = {endpoint: endpoint_stats.as_dict() for endpoint, endpoint_stats in _stats.items()}
+    for endpoint, values in stats.items():
+        values['query_budget'] = get_budget(endpoint)
+    return stats
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def timed_data(data):
+    """Wraps a serializer ``data`` property so the time spent in it counts as serializer time."""
+    def fget(serializer):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return data.fget(serializer)
+        # Serializers built inside another one (method fields) are part of the outer time.
+        metrics.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            metrics.serializer_depth -= 1
+            if not metrics.serializer_depth:
+                metrics.serializer_time += time.perf_counter() - started
+
+    return property(fget, doc=data.__doc__)
+
+
+def instrument_serializers():
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        if not getattr(cls.data.fget, 'instrumented', False):
+            cls.data = timed_data(cls.data)
+            cls.data.fget.instrumented = True
@@ -0,0 +1,298 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas
+
+from .extraction import extract_file, file_sha256, run_in_pool
+from .jobs import stale_filter
+from .models import Article, CompiledPart, Issue, IssueCompilation
+from .pdfmerge import merge_pdfs
+
+logger = logging.getLogger(__name__)
+
+# Bump when the cover or table of contents layout changes, so cached parts are re-rendered.
+LAYOUT_VERSION = 1
+TOC_ROWS_PER_PAGE = 30
+TOC_TITLE = "Mundarija"
+PUBLISHED_STATUSES = [Article.ArticleStatus.ACCEPTED, Article.ArticleStatus.PUBLISHED]
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'ISSUE_COMPILER_WORKERS', 1),
+                thread_name_prefix='issue-compiler',
+            )
+        return _executor
+
+
+def get_hash(payload):
+    data = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def stale_compilations():
+    return stale_filter(getattr(settings, 'ISSUE_COMPILATION_QUEUED_TIMEOUT', 600),
+                        getattr(settings, 'ISSUE_COMPILATION_TIMEOUT', 3600))
+
+
+def enqueue_compilation(issue, user=None):
+    """Returns the issue's queued or running compilation (unless stale), or queues a new one."""
+    existing = issue.compilations.filter(
+        status__in=[IssueCompilation.Status.QUEUED, IssueCompilation.Status.RUNNING]
+    ).exclude(stale_compilations()).first()
+    if existing is not None:
+        return existing
+    compilation = IssueCompilation.objects.create(issue=issue, requested_by=user)
+    if getattr(settings, 'ISSUE_COMPILER_IN_PROCESS', True):
+        transaction.on_commit(lambda: get_executor().submit(run_compilation, compilation.id))
+    return compilation
+
+
+def claim_compilation(compilation_id):
+    """Like ``jobs.claim_job``: returns the claim's ``started_at``, or None if another worker has it."""
+    started_at = timezone.now()
+    claimed = IssueCompilation.objects.filter(
+        Q(status=IssueCompilation.Status.QUEUED) | stale_compilations(), pk=compilation_id
+    ).update(status=IssueCompilation.Status.RUNNING, started_at=started_at)
+    return started_at if claimed else None
+
+
+def build_manifest(issue):
+    """One entry per article of the issue; articles without a readable final PDF are listed as skipped."""
+    articles = (
+        issue.articles.filter(status__in=PUBLISHED_STATUSES)
+        .select_related('author').order_by('id')
+    )
+    manifest = []
+    for article in articles:
+        entry = {'article_id': article.id, 'title': article.title, 'author': article.author.get_full_name()}
+        final = article.finalVersionFile
+        if not final:
+            entry['skipped'] = 'no final version'
+        elif not final.name.lower().endswith('.pdf'):
+            entry['skipped'] = 'final version is not a PDF'
+        else:
+            # Both come from the per-content caches, so unchanged files are not read again.
+            extracted = extract_file(final)
+            if not extracted.page_count:
+                entry['skipped'] = 'final version could not be read'
+            else:
+                entry['sha256'] = extracted.sha256
+                entry['pages'] = extracted.page_count
+        manifest.append(entry)
+    return manifest
+
+
+def number_pages(manifest, cover_pages):
+    """Sets each included entry's ``start_page``; returns the table of contents' page count."""
+    included = [entry for entry in manifest if 'skipped' not in entry]
+    toc_pages = max(math.ceil(len(included) / TOC_ROWS_PER_PAGE), 1)
+    page = cover_pages + toc_pages + 1
+    for entry in included:
+        entry['start_page'] = page
+        page += entry['pages']
+    return toc_pages
+
+
+def render_cover(output, issue):
+    p = canvas.Canvas(output, pagesize=A4)
+    width, height = A4
+    p.setFont('Helvetica-Bold', 20)
+    p.drawCentredString(width / 2, height - 3 * inch, issue.journal.name[:60])
+    p.setFont('Helvetica', 14)
+    p.drawCentredString(width / 2, height - 3.5 * inch, f"Son: {issue.issueNumber}")
+    p.drawCentredString(width / 2, height - 3.8 * inch, issue.publicationDate.strftime('%Y-%m-%d'))
+    p.save()
+
+
+def render_toc(output, manifest):
+    p = canvas.Canvas(output, pagesize=A4)
+    width, height = A4
+    rows = [entry for entry in manifest if 'skipped' not in entry]
+    for start in range(0, max(len(rows), 1), TOC_ROWS_PER_PAGE):
+        y_position = height - inch
+        p.setFont('Helvetica-Bold', 14)
+        p.drawString(inch, y_position, TOC_TITLE)
+        y_position -= 0.5 * inch
+        p.setFont('Helvetica', 10)
+        # One line per article, so the page count above is exact.
+        for entry in rows[start:start + TOC_ROWS_PER_PAGE]:
+            p.drawString(inch, y_position, f"{entry['title'][:70]} ({entry['author'][:30]})")
+            p.drawRightString(width - inch, y_position, str(entry['start_page']))
+            y_position -= 0.3 * inch
+        p.showPage()
+    p.save()
+
+
+def get_part(key, render, *args):
+    """The CompiledPart for ``key``, rendering it only the first time."""
+    part = CompiledPart.objects.filter(key=key).first()
+    if part is not None:
+        return part
+    with tempfile.TemporaryFile() as output:
+        render(output, *args)
+        output.seek(0)
+        part = CompiledPart(key=key, page_count=0)
+        part.file.save(f"{key[:12]}.pdf", File(output), save=False)
+    part.page_count = extract_file(part.file).page_count or 0
+    try:
+        with transaction.atomic():
+            part.save()
+    except IntegrityError:
+        # Another compilation rendered the same part first.
+        return CompiledPart.objects.get(key=key)
+    return part
+
+
+def resumable_checkpoints(issue, part_hashes):
+    """
+    The latest finished compilation of the issue and its checkpoints for the longest run
+    of leading parts that are unchanged; ``(None, [])`` when nothing can be reused.
+    """
+    previous = issue.compilations.filter(status=IssueCompilation.Status.DONE).exclude(file='').first()
+    if previous is None:
+        return None, []
+    reusable = []
+    for part_hash, checkpoint in zip(part_hashes, previous.parts):
+        if checkpoint.get('sha256') != part_hash:
+            break
+        reusable.append(checkpoint)
+    return previous, reusable
+
+
+def compile_issue(compilation):
+    """Fills in the compilation's result; True if it wrote a new file, False if it reused a finished one."""
+    issue = Issue.objects.select_related('journal').get(pk=compilation.issue_id)
+    manifest = build_manifest(issue)
+    articles = [entry for entry in manifest if 'skipped' not in entry]
+    if not articles:
+        raise ValueError("No article of this issue has a final PDF.")
+
+    cover = get_part(get_hash(['cover', LAYOUT_VERSION, issue.journal.name, issue.issueNumber,
+                               issue.publicationDate]), render_cover, issue)
+    number_pages(manifest, cover.page_count)
+    rows = [[entry['title'], entry['author'], entry['start_page']] for entry in articles]
+    toc = get_part(get_hash(['toc', LAYOUT_VERSION, rows]), render_toc, manifest)
+
+    part_files = [(cover.file, None), (toc.file, TOC_TITLE)]
+    finals = Article.objects.in_bulk([entry['article_id'] for entry in articles])
+    part_files += [(finals[entry['article_id']].finalVersionFile, entry['title']) for entry in articles]
+    part_hashes = [file_sha256(cover.file), file_sha256(toc.file)] + [entry['sha256'] for entry in articles]
+    compilation.manifest = manifest
+    compilation.inputs_hash = get_hash(part_hashes)
+
+    finished = IssueCompilation.objects.filter(
+        inputs_hash=compilation.inputs_hash, status=IssueCompilation.Status.DONE
+    ).exclude(file='').first()
+    if finished is not None:
+        compilation.file.name = finished.file.name
+        compilation.parts = finished.parts
+        compilation.page_count = finished.page_count
+        return False
+
+    previous, reusable = resumable_checkpoints(issue, part_hashes)
+    resume = (previous.file.path, reusable) if reusable else None
+    handle, output_path = tempfile.mkstemp(suffix='.pdf')
+    os.close(handle)
+    try:
+        checkpoints = run_in_pool(
+            merge_pdfs, output_path, [(file.path, title) for file, title in part_files], resume
+        )
+        with open(output_path, 'rb') as output:
+            compilation.file.save(f"issue_{issue.id}.pdf", File(output), save=False)
+    finally:
+        os.remove(output_path)
+    for checkpoint, part_hash in zip(checkpoints, part_hashes):
+        checkpoint['sha256'] = part_hash
+    compilation.parts = checkpoints
+    compilation.page_count = sum(len(checkpoint['pages']) for checkpoint in checkpoints)
+    logger.info("Compiled issue %s: reused %d of %d parts", issue.id, len(reusable), len(part_hashes))
+    return True
+
+
+def delete_unreferenced_files(names):
+    """
+    Deletes compiled files that no compilation or issue points to any more. With
+    CONTENT_ADDRESSED_MEDIA the storage leaves blobs alone and collect_media_blobs removes them.
+    """
+    for name in set(names):
+        if (IssueCompilation.objects.filter(file=name).exists()
+                or Issue.objects.filter(compiledIssuePath=name).exists()):
+            continue
+        IssueCompilation.file.field.storage.delete(name)
+
+
+def run_compilation(compilation_id):
+    close_old_connections()
+    try:
+        started_at = claim_compilation(compilation_id)
+        if started_at is None:
+            return
+        compilation = IssueCompilation.objects.get(pk=compilation_id)
+        wrote_file = False
+        try:
+            wrote_file = compile_issue(compilation)
+            compilation.status = IssueCompilation.Status.DONE
+        except Exception as exc:
+            logger.exception("Issue compilation %s failed", compilation_id)
+            compilation.status = IssueCompilation.Status.FAILED
+            compilation.error = str(exc)
+        compilation.finished_at = timezone.now()
+        with transaction.atomic():
+            current = IssueCompilation.objects.select_for_update().filter(pk=compilation_id)
+            if current.values_list('started_at', flat=True).first() != started_at:
+                # Timed out and claimed again; the newer run owns the row.
+                logger.warning("Issue compilation %s was reclaimed while running; discarding this result",
+                               compilation_id)
+                if wrote_file:
+                    # A reused file still belongs to the compilation it came from.
+                    compilation.file.delete(save=False)
+                return
+            compilation.save(update_fields=[
+                'status', 'inputs_hash', 'manifest', 'parts', 'file', 'page_count', 'error', 'finished_at'
+            ])
+            if compilation.status == IssueCompilation.Status.DONE:
+                Issue.objects.filter(pk=compilation.issue_id).update(compiledIssuePath=compilation.file.name)
+                # Only the newest result is kept; the older files go once nothing points to them.
+                older = compilation.issue.compilations.filter(status=IssueCompilation.Status.DONE).exclude(
+                    pk=compilation.pk
+                )
+                names = [name for name in older.values_list('file', flat=True) if name]
+                older.delete()
+                transaction.on_commit(lambda: delete_unreferenced_files(names))
+    finally:
+        close_old_connections()
+
+
+def run_pending_compilations(limit=None):
+    """
+    Processes queued compilations, and stale ones a restart left behind, in this process;
+    used by the ``compile_issues`` command.
+    """
+    processed = 0
+    queued = IssueCompilation.objects.filter(
+        Q(status=IssueCompilation.Status.QUEUED) | stale_compilations()
+    ).order_by('created_at')
+    for compilation_id in queued.values_list('id', flat=True)[:limit]:
+        run_compilation(compilation_id)
+        processed += 1
+    return processed
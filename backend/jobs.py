@@ -0,0 +1,168 @@
+import hashlib
+import json
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, transaction
+from django.db.models import Max, Q, Sum
+from django.utils import timezone
+
+from .exports import iter_approved_rows, write_pdf, write_xlsx
+from .models import Article, DashboardCounter, ReportJob, RevenueRollup
+from .revenue import monthly_revenue
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'REPORT_WORKERS', 2),
+                thread_name_prefix='report-job',
+            )
+        return _executor
+
+
+def stale_filter(queued_timeout, running_timeout):
+    """
+    Jobs a restart left behind: queued for more than ``queued_timeout`` seconds or running
+    for more than ``running_timeout``. Works for any model with the queued/running statuses,
+    ``created_at`` and ``started_at``.
+    """
+    now = timezone.now()
+    return (
+        Q(status=ReportJob.Status.QUEUED, created_at__lt=now - timedelta(seconds=queued_timeout))
+        | Q(status=ReportJob.Status.RUNNING, started_at__lt=now - timedelta(seconds=running_timeout))
+    )
+
+
+def stale_jobs():
+    return stale_filter(getattr(settings, 'REPORT_JOB_QUEUED_TIMEOUT', 600),
+                        getattr(settings, 'REPORT_JOB_TIMEOUT', 1800))
+
+
+def financial_report_watermark():
+    """Changes whenever a payment lands or an article is accepted; both reads are tiny tables."""
+    revenue = RevenueRollup.objects.aggregate(updated=Max('updated_at'), count=Sum('transaction_count'))
+    accepted = DashboardCounter.objects.filter(
+        scope=DashboardCounter.Scope.GLOBAL, status=Article.ArticleStatus.ACCEPTED
+    ).aggregate(count=Sum('article_count'))
+    updated = revenue['updated'].isoformat() if revenue['updated'] else '-'
+    return f"{updated}|{revenue['count'] or 0}|{accepted['count'] or 0}"
+
+
+def render_financial_report(export_format, params, output):
+    approved = Article.objects.filter(
+        status=Article.ArticleStatus.ACCEPTED
+    ).order_by('-publicationDate')
+    rows = iter_approved_rows(approved)
+    if export_format == ReportJob.Format.EXCEL:
+        write_xlsx(monthly_revenue(), rows, output)
+    else:
+        write_pdf(monthly_revenue(), rows, output)
+
+
+REPORTS = {
+    ReportJob.Kind.FINANCIAL_REPORT: (render_financial_report, financial_report_watermark),
+}
+
+EXTENSIONS = {ReportJob.Format.EXCEL: 'xlsx', ReportJob.Format.PDF: 'pdf'}
+
+
+def get_params_hash(kind, export_format, params):
+    payload = json.dumps([kind, export_format, params], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def enqueue_report(kind, export_format, params=None, user=None):
+    """
+    Returns the job for these parameters: a finished one whose data watermark is still
+    current, one already queued/running (and not stale), or a newly queued job.
+    """
+    params = params or {}
+    render, watermark_for = REPORTS[kind]
+    params_hash = get_params_hash(kind, export_format, params)
+    watermark = watermark_for()
+
+    existing = ReportJob.objects.filter(
+        params_hash=params_hash, watermark=watermark,
+        status__in=[ReportJob.Status.DONE, ReportJob.Status.QUEUED, ReportJob.Status.RUNNING],
+    ).exclude(stale_jobs()).order_by('-created_at').first()
+    if existing is not None:
+        return existing
+
+    job = ReportJob.objects.create(
+        kind=kind, export_format=export_format, params=params, params_hash=params_hash,
+        watermark=watermark, requested_by=user,
+    )
+    if getattr(settings, 'REPORT_JOBS_IN_PROCESS', True):
+        transaction.on_commit(lambda: get_executor().submit(run_job, job.id))
+    return job
+
+
+def claim_job(job_id):
+    """
+    Moves a queued (or stale) job to running; only one worker can win the conditional
+    update. Returns the claim's ``started_at``, or None if another worker has the job.
+    """
+    started_at = timezone.now()
+    claimed = ReportJob.objects.filter(Q(status=ReportJob.Status.QUEUED) | stale_jobs(), pk=job_id).update(
+        status=ReportJob.Status.RUNNING, started_at=started_at
+    )
+    return started_at if claimed else None
+
+
+def run_job(job_id):
+    close_old_connections()
+    try:
+        started_at = claim_job(job_id)
+        if started_at is None:
+            return
+        job = ReportJob.objects.get(pk=job_id)
+        render, _ = REPORTS[job.kind]
+        try:
+            with tempfile.TemporaryFile() as output:
+                render(job.export_format, job.params, output)
+                output.seek(0)
+                name = f"{job.kind}_{job.params_hash[:12]}_{job.id}.{EXTENSIONS[job.export_format]}"
+                job.artifact.save(name, File(output), save=False)
+            job.status = ReportJob.Status.DONE
+        except Exception as exc:
+            logger.exception("Report job %s failed", job_id)
+            job.status = ReportJob.Status.FAILED
+            job.error = str(exc)
+        job.finished_at = timezone.now()
+        with transaction.atomic():
+            current = ReportJob.objects.select_for_update().filter(pk=job_id).values_list('started_at', flat=True)
+            if current.first() != started_at:
+                # Timed out and claimed again; the newer run owns the row.
+                logger.warning("Report job %s was reclaimed while running; discarding this result", job_id)
+                if job.artifact:
+                    job.artifact.delete(save=False)
+                return
+            job.save(update_fields=['artifact', 'status', 'error', 'finished_at'])
+    finally:
+        close_old_connections()
+
+
+def run_pending_jobs(limit=None):
+    """
+    Processes queued jobs, and stale ones a restart left behind, in this process; used by
+    the ``run_report_jobs`` command.
+    """
+    processed = 0
+    queued = ReportJob.objects.filter(Q(status=ReportJob.Status.QUEUED) | stale_jobs()).order_by('created_at')
+    for job_id in queued.values_list('id', flat=True)[:limit]:
+        run_job(job_id)
+        processed += 1
+    return processed
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from backend.audit_archive import archive_old_months
+
+
+class Command(BaseCommand):
+    help = "Moves AuditLog months older than the hot window (AUDIT_HOT_MONTHS) into compressed archive segments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-months', type=int, default=None,
+                            help="Months to keep in the table, including the current one.")
+        parser.add_argument('--block-size', type=int, default=None,
+                            help="Rows per compressed block (AUDIT_ARCHIVE_BLOCK_SIZE by default).")
+
+    def handle(self, *args, **options):
+        moved = archive_old_months(options['keep_months'], options['block_size'])
+        for month, count in moved.items():
+            self.stdout.write(f"{month:%Y-%m}: archived {count} audit events")
+        self.stdout.write(self.style.SUCCESS(f"Archived {sum(moved.values())} audit events."))
@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from backend.blobs import collect_garbage
+
+
+class Command(BaseCommand):
+    help = "Recounts references to content-addressed media blobs and deletes the ones nothing uses."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=int, default=None,
+                            help="Keep unreferenced blobs younger than this (MEDIA_BLOB_GC_GRACE_HOURS by default).")
+        parser.add_argument('--dry-run', action='store_true', help="Report what would be deleted without deleting.")
+
+    def handle(self, *args, **options):
+        grace = timedelta(hours=options['grace_hours']) if options['grace_hours'] is not None else None
+        result = collect_garbage(grace, dry_run=options['dry_run'])
+        verb = "Would remove" if options['dry_run'] else "Removed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {result['removed']} blobs ({result['freed_bytes']} bytes); {result['blobs']} in use."
+        ))
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.synthetic import default_sizes, generate_dataset
+
+
+class Command(BaseCommand):
+    help = ("Fills the database with a reproducible synthetic dataset (users of every role, journals and "
+            "issues, articles with versions, CLICK transactions, service orders and audit logs) for benchmarks.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=100000,
+                            help="Articles to create; the other counts scale with it unless given.")
+        parser.add_argument('--users', type=int, default=None)
+        parser.add_argument('--journals', type=int, default=None)
+        parser.add_argument('--transactions', type=int, default=None)
+        parser.add_argument('--service-orders', type=int, default=None)
+        parser.add_argument('--audit-logs', type=int, default=None)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--days', type=int, default=3 * 365, help="Period the timestamps are spread over.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--skip-derived', action='store_true',
+                            help="Do not rebuild counters, the search index, rankings and the revenue rollup.")
+        parser.add_argument('--force', action='store_true', help="Run even with DEBUG off.")
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError("DEBUG is off; pass --force to add synthetic data to this database.")
+        sizes = default_sizes(options['articles'])
+        for name in sizes:
+            if options.get(name) is not None:
+                sizes[name] = options[name]
+
+        counts = generate_dataset(
+            sizes, seed=options['seed'], days=options['days'], batch_size=options['batch_size'],
+            derived=not options['skip_derived'], log=self.stdout.write,
+        )
+        summary = ', '.join(f"{count} {name.replace('_', ' ')}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Created {summary}."))
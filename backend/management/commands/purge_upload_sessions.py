@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from backend.uploads import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = "Deletes upload sessions (and their partial files) that have not been touched for a while."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=None,
+                            help="Age in hours after which a session is stale (default: UPLOAD_SESSION_TTL_HOURS).")
+
+    def handle(self, *args, **options):
+        max_age = timedelta(hours=options['hours']) if options['hours'] is not None else None
+        count = purge_stale_uploads(max_age)
+        self.stdout.write(self.style.SUCCESS(f"Purged {count} upload sessions."))
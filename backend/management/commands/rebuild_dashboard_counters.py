@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from backend.dashboard import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Recomputes the dashboard counter buckets from the Article table."
+
+    def handle(self, *args, **options):
+        count = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} dashboard counter buckets."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from backend.rankings import rebuild_rankings
+
+
+class Command(BaseCommand):
+    help = "Recomputes author/journal impact metrics and every precomputed ranking board."
+
+    def handle(self, *args, **options):
+        count = rebuild_rankings()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} ranking boards."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from backend.revenue import rebuild_rollup
+
+
+class Command(BaseCommand):
+    help = "Backfills the monthly revenue rollup from completed CLICK transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help="Also recompute months that are already closed.")
+
+    def handle(self, *args, **options):
+        count = rebuild_rollup(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {count} revenue rollup rows."))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.benchmark import compare_results, load_results, run_benchmark, save_results
+
+
+class Command(BaseCommand):
+    help = ("Benchmarks the API's read endpoints (p50/p95/p99 latency, throughput, queries and peak RSS) "
+            "and writes the results as JSON, optionally comparing them with an earlier baseline.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100, help="Measured requests per scenario.")
+        parser.add_argument('--warmup', type=int, default=5, help="Unmeasured requests before each scenario.")
+        parser.add_argument('--concurrency', type=int, default=1, help="Threads sending requests.")
+        parser.add_argument('--base-url', default=None,
+                            help="Benchmark a running server (e.g. http://127.0.0.1:8000) instead of this process.")
+        parser.add_argument('--server-pid', type=int, default=None,
+                            help="Process id of the server at --base-url, to report its peak RSS.")
+        parser.add_argument('--only', action='append', default=None,
+                            help="Run only scenarios whose name starts with this; may be repeated.")
+        parser.add_argument('--output', default='benchmark.json', help="Where to write the results.")
+        parser.add_argument('--compare', default=None, help="A baseline JSON file to compare p95 latency with.")
+        parser.add_argument('--max-regression', type=float, default=None,
+                            help="With --compare, fail when a scenario's p95 grew by more than this percentage.")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError("--requests and --concurrency must be at least 1.")
+        results = run_benchmark(
+            requests=options['requests'], warmup=options['warmup'], concurrency=options['concurrency'],
+            base_url=options['base_url'], server_pid=options['server_pid'], only=options['only'],
+            log=self.stdout.write,
+        )
+        save_results(results, options['output'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Ran {len(results['scenarios'])} scenarios; peak RSS {results['peak_rss_mb']} MB; "
+            f"results written to {options['output']}."
+        ))
+
+        if options['compare']:
+            regressed = []
+            for name, before, after, change in compare_results(load_results(options['compare']), results):
+                self.stdout.write(f"{name}: p95 {before} -> {after} ms ({change:+.1f}%)")
+                if options['max_regression'] is not None and change > options['max_regression']:
+                    regressed.append(name)
+            if regressed:
+                raise CommandError(f"p95 latency regressed by more than {options['max_regression']}% in: "
+                                   f"{', '.join(regressed)}")
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.plagiarism import queue_missing_checks, run_pending_checks
+
+
+class Command(BaseCommand):
+    help = "Runs queued plagiarism checks. Runs once, or keeps polling with --loop."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue-missing', action='store_true',
+                            help="First queue a check for every version that has none (indexes the corpus).")
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new checks.")
+        parser.add_argument('--interval', type=float, default=2.0, help="Seconds between polls with --loop.")
+
+    def handle(self, *args, **options):
+        if options['queue_missing']:
+            self.stdout.write(f"Queued {queue_missing_checks()} plagiarism check(s).")
+        while True:
+            processed = run_pending_checks()
+            if processed:
+                self.stdout.write(f"Processed {processed} plagiarism check(s).")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from backend.versions import sync_latest_versions
+
+
+class Command(BaseCommand):
+    help = "Renumbers colliding article version numbers and recomputes each article's latest version."
+
+    def handle(self, *args, **options):
+        count = sync_latest_versions()
+        self.stdout.write(self.style.SUCCESS(f"Synced latest versions; renumbered {count} articles."))
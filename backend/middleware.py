@@ -0,0 +1,56 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .audit import current_request
+from .instrumentation import RequestMetrics, current_metrics, record
+
+
+class AuditContextMiddleware:
+    """Makes the current request available to audit events raised from views and signals."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            current_request.reset(token)
+
+
+class RequestMetricsMiddleware:
+    """
+    Counts and times the queries, serializer work and total time of each request (see
+    ``backend.instrumentation``). Place it first, so the other middleware is measured too.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        total_time = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        endpoint = match.view_name if match is not None else 'unresolved'
+        if getattr(settings, 'REQUEST_METRICS_HEADERS', settings.DEBUG):
+            response['X-Query-Count'] = str(metrics.queries)
+            response['Server-Timing'] = (
+                f'db;dur={metrics.db_time * 1000:.1f}, serializer;dur={metrics.serializer_time * 1000:.1f}, '
+                f'total;dur={total_time * 1000:.1f}'
+            )
+        record(endpoint, metrics, total_time)
+        return response
@@ -0,0 +1,77 @@
+"""
+Word-shingle MinHash signatures and LSH band keys. No Django here: ``fingerprint_text``
+runs in the document process pool.
+"""
+import hashlib
+import random
+import re
+import struct
+import zlib
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+# 32 bands of 4 rows: documents become candidates from roughly 40% Jaccard similarity.
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+MERSENNE_PRIME = (1 << 61) - 1
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+# Seeded, so signatures stay comparable across processes and restarts. Changing any of
+# the constants above means every stored signature has to be recomputed.
+_random = random.Random(1)
+PERMUTATIONS = [(_random.randrange(1, MERSENNE_PRIME), _random.randrange(MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """The set of hashed ``size``-word shingles of ``text`` (one shingle for shorter texts)."""
+    words = WORD_RE.findall(text.lower())
+    if not words:
+        return set()
+    if len(words) < size:
+        return {zlib.crc32(' '.join(words).encode('utf-8'))}
+    return {zlib.crc32(' '.join(words[i:i + size]).encode('utf-8')) for i in range(len(words) - size + 1)}
+
+
+def signature(shingle_set):
+    return [
+        min((a * shingle + b) % MERSENNE_PRIME for shingle in shingle_set)
+        for a, b in PERMUTATIONS
+    ]
+
+
+def pack(values):
+    return struct.pack(f'>{NUM_PERM}Q', *values)
+
+
+def unpack(data):
+    return struct.unpack(f'>{NUM_PERM}Q', bytes(data))
+
+
+def band_keys(values):
+    """One signed 64-bit key per band; documents sharing any key are candidate matches."""
+    keys = []
+    for band in range(BANDS):
+        rows = values[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f'>I{ROWS}Q', band, *rows), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'big', signed=True))
+    return keys
+
+
+def jaccard(values, other):
+    return sum(1 for a, b in zip(values, other) if a == b) / NUM_PERM
+
+
+def containment(similarity, size, other_size):
+    """Estimated share of a document's shingles that also occur in the other one."""
+    if not size:
+        return 0.0
+    shared = similarity * (size + other_size) / (1 + similarity)
+    return min(shared / size, 1.0)
+
+
+def fingerprint_text(text):
+    """``(shingle count, packed signature or None)`` for ``text``."""
+    shingle_set = shingles(text)
+    if not shingle_set:
+        return 0, None
+    return len(shingle_set), pack(signature(shingle_set))
@@ -1,8 +1,14 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.utils.translation import gettext_lazy as _
-from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .storage import media_storage
 
 
 class UserManager(BaseUserManager):
@@ -85,8 +91,9 @@ class Journal(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField()
     manager = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='managed_journals')
-    rulesFilePath = models.FileField(upload_to='journal_rules/', blank=True, null=True)
-    templateFilePath = models.FileField(upload_to='journal_templates/', blank=True, null=True)
+    rulesFilePath = models.FileField(upload_to='journal_rules/', storage=media_storage, blank=True, null=True)
+    templateFilePath = models.FileField(upload_to='journal_templates/', storage=media_storage, blank=True,
+                                        null=True)
     issn = models.CharField(max_length=20, blank=True, null=True)
     publisher = models.CharField(max_length=100, blank=True, null=True)
     submissionChecklistText = models.TextField(blank=True, null=True)
@@ -106,7 +113,7 @@ class Issue(models.Model):
     issueNumber = models.CharField(max_length=100)
     publicationDate = models.DateField()
     coverImageUrl = models.URLField(blank=True, null=True)
-    compiledIssuePath = models.FileField(upload_to='issues/', blank=True, null=True)
+    compiledIssuePath = models.FileField(upload_to='issues/', storage=media_storage, blank=True, null=True)
     isPublished = models.BooleanField(default=False)
     createdAt = models.DateTimeField(auto_now_add=True)
 
@@ -156,13 +163,23 @@ class Article(models.Model):
     submissionPaymentStatus = models.CharField(max_length=50, choices=PaymentStatus.choices,
                                                default=PaymentStatus.PAYMENT_PENDING)
     managerNotes = models.TextField(blank=True, null=True)
-    finalVersionFile = models.FileField(upload_to='article_final_versions/', blank=True, null=True)
+    finalVersionFile = models.FileField(upload_to='article_final_versions/', storage=media_storage, blank=True,
+                                        null=True)
     submission_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     publication_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     plagiarism_percentage = models.FloatField(blank=True, null=True)
-    certificate_file = models.FileField(upload_to='certificates/', blank=True, null=True)
+    certificate_file = models.FileField(upload_to='certificates/', storage=media_storage, blank=True, null=True)
     external_link = models.URLField(max_length=500, blank=True, null=True)
     attachment_file = models.FileField(upload_to='attachments/', blank=True, null=True)
+    # Maintained by versions.add_version: the highest versionNumber handed out and that version.
+    latestVersionNumber = models.PositiveIntegerField(default=0)
+    latestVersion = models.ForeignKey('ArticleVersion', on_delete=models.SET_NULL, blank=True, null=True,
+                                      related_name='+')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['submittedDate', 'id'], name='article_submitted_keyset_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -171,17 +188,95 @@ class Article(models.Model):
 class ArticleVersion(models.Model):
     article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='versions')
     versionNumber = models.PositiveIntegerField()
-    file = models.FileField(upload_to='article_versions/')
+    file = models.FileField(upload_to='article_versions/', storage=media_storage)
     submittedDate = models.DateTimeField(auto_now_add=True)
     notes = models.TextField(blank=True, null=True)
     submitter = models.ForeignKey(User, on_delete=models.CASCADE)
 
     class Meta:
         ordering = ['-versionNumber']
+        constraints = [
+            models.UniqueConstraint(fields=['article', 'versionNumber'], name='articleversion_number_uniq'),
+        ]
 
     def __str__(self):
         return f"{self.article.title} - v{self.versionNumber}"
 
+    @cached_property
+    def extraction(self):
+        """The file's ExtractedText, parsed on first use and shared with every identical file."""
+        from .extraction import extract_file
+        return extract_file(self.file)
+
+    @property
+    def text(self):
+        return self.extraction.text
+
+    @property
+    def page_count(self):
+        return self.extraction.page_count
+
+    @property
+    def word_count(self):
+        return self.extraction.word_count
+
+
+class DashboardCounter(models.Model):
+    """Per-scope article counts and fee totals, bucketed by status and payment status."""
+    class Scope(models.TextChoices):
+        GLOBAL = 'global', _('Global')
+        AUTHOR = 'author', _('Author')
+        JOURNAL = 'journal', _('Journal')
+
+    scope = models.CharField(max_length=10, choices=Scope.choices)
+    scope_id = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=Article.ArticleStatus.choices)
+    payment_status = models.CharField(max_length=50, choices=Article.PaymentStatus.choices)
+    article_count = models.IntegerField(default=0)
+    submission_fees = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    publication_fees = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'scope_id', 'status', 'payment_status'],
+                                    name='unique_dashboard_counter_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.scope_id} {self.status}/{self.payment_status} = {self.article_count}"
+
+
+class ImpactMetric(models.Model):
+    """Citation total and h-index of one author or journal, kept current by the rankings engine."""
+    class SubjectType(models.TextChoices):
+        AUTHOR = 'author', _('Author')
+        JOURNAL = 'journal', _('Journal')
+
+    subject_type = models.CharField(max_length=10, choices=SubjectType.choices)
+    subject_id = models.PositiveIntegerField()
+    citation_total = models.PositiveIntegerField(default=0)
+    h_index = models.PositiveIntegerField(default=0)
+    article_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['subject_type', 'subject_id'], name='unique_impact_metric_subject'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject_type}:{self.subject_id} h={self.h_index} c={self.citation_total}"
+
+
+class RankingBoard(models.Model):
+    """One precomputed top-K list, stored as JSON entries so a ranking read is a single-row lookup."""
+    key = models.CharField(max_length=100, unique=True)
+    entries = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.key
+
 
 class EditorialBoardApplication(models.Model):
     class ApplicationStatus(models.TextChoices):
@@ -212,15 +307,42 @@ class AuditLog(models.Model):
 
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     actionType = models.CharField(max_length=50, choices=AuditActionType.choices)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the event happens, not when the batched writer inserts it.
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     details = models.JSONField(default=dict)
     targetEntityType = models.CharField(max_length=50, blank=True, null=True)
     targetEntityId = models.PositiveIntegerField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['timestamp', 'id'], name='auditlog_timestamp_keyset_idx'),
+        ]
+
     def __str__(self):
         return f"{self.actionType} by {self.user} at {self.timestamp}"
 
 
+class AuditArchiveSegment(models.Model):
+    """One month of AuditLog rows moved out of the table into a compressed JSONL file."""
+    month = models.DateField(unique=True)
+    data_file = models.CharField(max_length=255)
+    index_file = models.CharField(max_length=255)
+    row_count = models.PositiveIntegerField(default=0)
+    newest_at = models.DateTimeField()
+    newest_id = models.PositiveIntegerField()
+    oldest_at = models.DateTimeField()
+    oldest_id = models.PositiveIntegerField()
+    min_id = models.PositiveIntegerField()
+    max_id = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-month']
+
+    def __str__(self):
+        return f"Audit archive {self.month:%Y-%m} ({self.row_count} rows)"
+
+
 class IntegrationSetting(models.Model):
     class ServiceName(models.TextChoices):
         AI_GEMINI = 'AI_Gemini', _('AI Gemini')
@@ -257,6 +379,7 @@ class ClickTransaction(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
 
     extra_data = models.JSONField(default=dict, blank=True)
 
@@ -264,6 +387,72 @@ class ClickTransaction(models.Model):
         return f"Transaction {self.merchant_trans_id} for {self.amount}"
 
 
+class RevenueRollup(models.Model):
+    """Completed CLICK payments summed per month, source type and journal."""
+    class SourceType(models.TextChoices):
+        ARTICLE_SUBMISSION = 'article_submission', _('Article Submission')
+        SERVICE_ORDER = 'service_order', _('Service Order')
+
+    month = models.DateField()
+    source_type = models.CharField(max_length=30, choices=SourceType.choices)
+    journal = models.ForeignKey(Journal, on_delete=models.CASCADE, blank=True, null=True,
+                                related_name='revenue_rollups')
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    transaction_count = models.PositiveIntegerField(default=0)
+    is_closed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['month']
+        constraints = [
+            models.UniqueConstraint(fields=['month', 'source_type', 'journal'], name='unique_revenue_rollup'),
+            models.UniqueConstraint(fields=['month', 'source_type'], condition=models.Q(journal__isnull=True),
+                                    name='unique_revenue_rollup_no_journal'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.source_type}: {self.amount}"
+
+
+class ReportJob(models.Model):
+    class Kind(models.TextChoices):
+        FINANCIAL_REPORT = 'financial_report', _('Financial Report')
+
+    class Format(models.TextChoices):
+        EXCEL = 'excel', _('Excel')
+        PDF = 'pdf', _('PDF')
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', _('Queued')
+        RUNNING = 'running', _('Running')
+        DONE = 'done', _('Done')
+        FAILED = 'failed', _('Failed')
+
+    kind = models.CharField(max_length=30, choices=Kind.choices)
+    export_format = models.CharField(max_length=10, choices=Format.choices)
+    params = models.JSONField(default=dict, blank=True)
+    params_hash = models.CharField(max_length=64)
+    watermark = models.CharField(max_length=100)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    artifact = models.FileField(upload_to='reports/', blank=True, null=True)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True,
+                                     related_name='report_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['params_hash', 'watermark'], name='reportjob_cache_key_idx'),
+            models.Index(fields=['status', 'created_at'], name='reportjob_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} ({self.export_format}) - {self.status}"
+
+
 class Service(models.Model):
     name = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, unique=True,
@@ -315,5 +504,186 @@ class ServiceOrder(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='serviceorder_keyset_idx'),
+        ]
+
+    def __str__(self):
+        return f"Order for {self.service.name} by {self.user.phone}"
+
+class Checkout(models.Model):
+    """Several payable items (articles, service orders) settled by one CLICK payment."""
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='checkouts')
+    total = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+    transactions = GenericRelation(ClickTransaction)
+
+    def __str__(self):
+        return f"Checkout {self.id} for {self.total}"
+
+
+class CheckoutItem(models.Model):
+    checkout = models.ForeignKey(Checkout, on_delete=models.CASCADE, related_name='items')
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.content_type.model} {self.object_id} in checkout {self.checkout_id}"
+
+
+class TokenVersion(models.Model):
+    """
+    Per-user counter carried in every JWT; bumping it revokes the user's outstanding tokens
+    (see ``backend.authentication``). A plain id rather than a foreign key, so the row
+    outlives a deleted user and that user's tokens stay revoked. Users without a row are
+    at version 0.
+    """
+    user_id = models.IntegerField(primary_key=True)
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Token version {self.version} of user {self.user_id}"
+
+
+class ReferenceStamp(models.Model):
+    """
+    Version of one reference-data model (journals, services, ...), bumped by signals on
+    every save and delete; cached responses of those endpoints are keyed by it.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
+class UploadSession(models.Model):
+    """A resumable upload: chunks are appended to a partial file until ``offset`` reaches ``size``."""
+    class Status(models.TextChoices):
+        ACTIVE = 'active', _('Receiving chunks')
+        COMPLETE = 'complete', _('Complete')
+        ATTACHED = 'attached', _('Attached')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.ACTIVE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload {self.id} ({self.offset}/{self.size})"
+
+
+class MediaBlob(models.Model):
+    """A stored blob of ContentAddressedStorage and how many file columns pointed to it at the last count."""
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    counted_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
+
+
+class PlagiarismCheck(models.Model):
+    """Similarity of one uploaded version against the rest of the corpus (see ``backend.plagiarism``)."""
+    class Status(models.TextChoices):
+        QUEUED = 'queued', _('Queued')
+        RUNNING = 'running', _('Running')
+        DONE = 'done', _('Done')
+        FAILED = 'failed', _('Failed')
+
+    version = models.OneToOneField(ArticleVersion, on_delete=models.CASCADE, related_name='plagiarism_check')
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='plagiarism_checks')
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    # Packed MinHash signature; empty for files without extractable text.
+    signature = models.BinaryField(blank=True, null=True)
+    shingle_count = models.PositiveIntegerField(default=0)
+    percentage = models.FloatField(blank=True, null=True)
+    # [{"article_id", "title", "version_id", "similarity"}], best match first.
+    matches = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"Plagiarism check for version {self.version_id}: {self.status}"
+
+
+class PlagiarismBucket(models.Model):
+    """One LSH band key of a finished check; a lookup by key finds candidate matches without a scan."""
+    plagiarism_check = models.ForeignKey(PlagiarismCheck, on_delete=models.CASCADE, related_name='buckets')
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='+')
+    key = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['key'], name='plagiarism_bucket_key_idx'),
+        ]
+
+
+class ExtractedText(models.Model):
+    """Normalized text and counts of one file content, keyed by its SHA-256 (see ``backend.extraction``)."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    text = models.TextField(blank=True)
+    # None when the format does not record pages (plain text, PDFs without pypdf).
+    page_count = models.PositiveIntegerField(blank=True, null=True)
+    word_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]}: {self.word_count} words"
+
+
+class IssueCompilation(models.Model):
+    """One run of the issue compiler (see ``backend.issues``); the result becomes ``Issue.compiledIssuePath``."""
+    class Status(models.TextChoices):
+        QUEUED = 'queued', _('Queued')
+        RUNNING = 'running', _('Running')
+        DONE = 'done', _('Done')
+        FAILED = 'failed', _('Failed')
+
+    issue = models.ForeignKey(Issue, on_delete=models.CASCADE, related_name='compilations')
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    # Hash of every input (cover, table of contents, each article's final file); equal hashes, equal PDFs.
+    inputs_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    # [{"article_id", "title", "sha256", "pages", "start_page"} or {"article_id", "title", "skipped"}]
+    manifest = models.JSONField(default=list, blank=True)
+    # Writer checkpoints after each merged part, so a later run can resume after an unchanged prefix.
+    parts = models.JSONField(default=list, blank=True)
+    file = models.FileField(upload_to='issues/', storage=media_storage, blank=True, null=True)
+    page_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True,
+                                     related_name='issue_compilations')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Compilation of {self.issue} ({self.status})"
+
+
+class CompiledPart(models.Model):
+    """A generated cover or table of contents, cached by the hash of what it was rendered from."""
+    key = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='issue_parts/', storage=media_storage)
+    page_count = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
     def __str__(self):
-        return f"Order for {self.service.name} by {self.user.phone}"
\ No newline at end of file
+        return f"Part {self.key[:12]} ({self.page_count} pages)"
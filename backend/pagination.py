@@ -0,0 +1,135 @@
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination over ``(ordering_field, id)``.
+
+    Each page is a single indexed range scan (``WHERE (field, id) < (v, pk) LIMIT n``),
+    so page N costs the same as page 1. Cursors are opaque base64 tokens.
+
+    Paging is opt-in: without ``cursor`` or ``page_size`` in the query string the
+    view returns the plain list the existing SPA pages expect.
+    """
+    ordering_field = 'id'
+    descending = True
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        default = api_settings.PAGE_SIZE or 50
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return default
+        if size <= 0:
+            return default
+        return min(size, self.max_page_size)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            field = model._meta.get_field(self.ordering_field)
+            value = field.to_python(payload['v'])
+            return value, int(payload['id']), bool(payload.get('r', False))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse):
+        value = getattr(obj, self.ordering_field)
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        payload = json.dumps({'v': value, 'id': obj.pk, 'r': reverse}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def fetch_queryset(self, queryset, cursor, descending, limit):
+        """Returns up to ``limit`` rows strictly after ``cursor`` (a ``(value, pk)`` pair or None)."""
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{self.ordering_field}', f'{prefix}id')
+        if cursor:
+            value, pk = cursor
+            op = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.ordering_field}__{op}': value}) |
+                Q(**{self.ordering_field: value, f'id__{op}': pk})
+            )
+        return list(queryset[:limit])
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate_fetch(
+            lambda cursor, descending, limit: self.fetch_queryset(queryset, cursor, descending, limit),
+            queryset.model, request,
+        )
+
+    def paginate_fetch(self, fetch, model, request):
+        """
+        Pages over any source ordered by ``(ordering_field, id)``. ``fetch(cursor, descending,
+        limit)`` must return rows in that order, starting strictly after ``cursor``.
+        """
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request, model)
+        reverse = cursor[2] if cursor else False
+
+        # Walking backwards flips the scan direction; the page is re-reversed below.
+        descending = self.descending != reverse
+        rows = fetch(cursor[:2] if cursor else None, descending, self.page_size + 1)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+
+        self.next_link = self.encode_cursor(rows[-1], False) if rows and has_next else None
+        self.previous_link = self.encode_cursor(rows[0], True) if rows and has_previous else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.next_link,
+            'previous': self.previous_link,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class ArticleKeysetPagination(KeysetPagination):
+    ordering_field = 'submittedDate'
+
+
+class AuditLogKeysetPagination(KeysetPagination):
+    ordering_field = 'timestamp'
+
+
+class ServiceOrderKeysetPagination(KeysetPagination):
+    ordering_field = 'created_at'
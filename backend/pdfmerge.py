@@ -0,0 +1,254 @@
+"""
+Streaming PDF concatenation. pypdf only parses the inputs; pages are written out one by
+one as they are copied, so memory stays at about one source document's objects however
+long the result gets. No Django here, so merges can run in the document process pool.
+"""
+try:
+    from pypdf import PdfReader
+    from pypdf.generic import (
+        ArrayObject, DictionaryObject, IndirectObject, NameObject, NullObject, NumberObject, StreamObject,
+        TextStringObject,
+    )
+except ImportError:  # merge_pdfs then raises
+    PdfReader = None
+
+PDF_HEADER = b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n'
+COPY_BLOCK_SIZE = 1024 * 1024
+# Page attributes a page may inherit from its ancestors in the source page tree.
+INHERITED_PAGE_KEYS = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+
+class StreamingPdfWriter:
+    """
+    Appends whole PDFs to ``handle`` (a binary file opened for writing). Only the object
+    numbers, their byte offsets and the page list are kept; ``close`` writes the page
+    tree, the outline (one entry per titled document), the catalog and the xref table.
+    """
+    CATALOG = 1
+    PAGES = 2
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.offsets = {}
+        self.next_number = 3
+        self.kids = []
+        self.outline = []
+
+    def begin(self):
+        self.handle.write(PDF_HEADER)
+
+    def resume(self, source_path, parts):
+        """
+        Starts from an earlier output whose first parts were the same documents: its bytes
+        up to the end of ``parts`` (checkpoints returned by ``append``) are copied as they
+        are, and numbering carries on from there. Output is deterministic for the same
+        inputs, so the result is identical to appending those documents again.
+        """
+        checkpoint = parts[-1]
+        with open(source_path, 'rb') as source:
+            remaining = checkpoint['end']
+            while remaining:
+                block = source.read(min(COPY_BLOCK_SIZE, remaining))
+                if not block:
+                    raise ValueError(f"{source_path} is shorter than its checkpoints")
+                self.handle.write(block)
+                remaining -= len(block)
+            offsets = read_xref(source)
+        self.next_number = checkpoint['next_number']
+        self.offsets = {
+            number: offset for number, offset in offsets.items()
+            if number < self.next_number and offset < checkpoint['end']
+        }
+        for part in parts:
+            self.kids.extend(part['pages'])
+            if part['title'] and part['pages']:
+                self.outline.append((part['title'], part['pages'][0]))
+
+    def allocate(self):
+        number = self.next_number
+        self.next_number += 1
+        return number
+
+    def write_object(self, number, obj):
+        self.offsets[number] = self.handle.tell()
+        self.handle.write(f'{number} 0 obj\n'.encode('ascii'))
+        obj.write_to_stream(self.handle)
+        self.handle.write(b'\nendobj\n')
+
+    def append(self, path, title=None):
+        """Copies every page of the PDF at ``path`` and returns the checkpoint after it."""
+        reader = PdfReader(path)
+        if reader.is_encrypted and not reader.decrypt(''):
+            raise ValueError(f"{path} is password protected")
+        copier = PageCopier(self, reader)
+        pages = [copier.copy_page(page) for page in reader.pages]
+        self.kids.extend(pages)
+        if title and pages:
+            self.outline.append((title, pages[0]))
+        return {'title': title, 'pages': pages, 'end': self.handle.tell(), 'next_number': self.next_number}
+
+    def close(self):
+        self.write_object(self.PAGES, DictionaryObject({
+            NameObject('/Type'): NameObject('/Pages'),
+            NameObject('/Kids'): ArrayObject(reference(number) for number in self.kids),
+            NameObject('/Count'): NumberObject(len(self.kids)),
+        }))
+        catalog = DictionaryObject({
+            NameObject('/Type'): NameObject('/Catalog'),
+            NameObject('/Pages'): reference(self.PAGES),
+        })
+        if self.outline:
+            catalog[NameObject('/Outlines')] = reference(self.write_outline())
+            catalog[NameObject('/PageMode')] = NameObject('/UseOutlines')
+        self.write_object(self.CATALOG, catalog)
+
+        xref_offset = self.handle.tell()
+        size = self.next_number
+        self.handle.write(f'xref\n0 {size}\n0000000000 65535 f \n'.encode('ascii'))
+        for number in range(1, size):
+            offset = self.offsets.get(number)
+            entry = f'{offset:010d} 00000 n \n' if offset is not None else '0000000000 00000 f \n'
+            self.handle.write(entry.encode('ascii'))
+        self.handle.write(b'trailer\n')
+        DictionaryObject({
+            NameObject('/Size'): NumberObject(size),
+            NameObject('/Root'): reference(self.CATALOG),
+        }).write_to_stream(self.handle)
+        self.handle.write(f'\nstartxref\n{xref_offset}\n%%EOF\n'.encode('ascii'))
+
+    def write_outline(self):
+        root = self.allocate()
+        items = [self.allocate() for _ in self.outline]
+        for index, (number, (title, page)) in enumerate(zip(items, self.outline)):
+            item = DictionaryObject({
+                NameObject('/Title'): TextStringObject(title),
+                NameObject('/Parent'): reference(root),
+                NameObject('/Dest'): ArrayObject([reference(page), NameObject('/Fit')]),
+            })
+            if index:
+                item[NameObject('/Prev')] = reference(items[index - 1])
+            if index + 1 < len(items):
+                item[NameObject('/Next')] = reference(items[index + 1])
+            self.write_object(number, item)
+        self.write_object(root, DictionaryObject({
+            NameObject('/Type'): NameObject('/Outlines'),
+            NameObject('/First'): reference(items[0]),
+            NameObject('/Last'): reference(items[-1]),
+            NameObject('/Count'): NumberObject(len(items)),
+        }))
+        return root
+
+
+class PageCopier:
+    """Copies pages of one source document, renumbering each object the first time it is reached."""
+
+    def __init__(self, writer, reader):
+        self.writer = writer
+        self.numbers = {}
+        self.pending = []
+        # Number every page up front so links between pages of the same document survive.
+        for page in reader.pages:
+            if page.indirect_reference is not None:
+                self.numbers[key(page.indirect_reference)] = writer.allocate()
+
+    def copy_page(self, page):
+        if page.indirect_reference is not None:
+            number = self.numbers[key(page.indirect_reference)]
+        else:
+            number = self.writer.allocate()
+        copied = DictionaryObject()
+        for name, value in page.items():
+            if name != '/Parent':
+                copied[NameObject(name)] = self.copy(value)
+        for name in INHERITED_PAGE_KEYS:
+            if name not in page:
+                value = inherited(page, name)
+                if value is not None:
+                    copied[NameObject(name)] = self.copy(value)
+        copied[NameObject('/Parent')] = reference(StreamingPdfWriter.PAGES)
+        self.writer.write_object(number, copied)
+        while self.pending:
+            pending_number, target = self.pending.pop()
+            self.writer.write_object(pending_number, self.copy(target))
+        return number
+
+    def reference(self, indirect):
+        source_key = key(indirect)
+        if source_key not in self.numbers:
+            target = indirect.get_object()
+            if isinstance(target, DictionaryObject) and target.get('/Type') == '/Pages':
+                # The source page tree is replaced by ours.
+                return NullObject()
+            self.numbers[source_key] = self.writer.allocate()
+            self.pending.append((self.numbers[source_key], target))
+        return reference(self.numbers[source_key])
+
+    def copy(self, obj):
+        if isinstance(obj, IndirectObject):
+            return self.reference(obj)
+        if isinstance(obj, StreamObject):
+            copied = obj.__class__()
+            copied._data = obj._data
+            for name, value in obj.items():
+                copied[NameObject(name)] = self.copy(value)
+            return copied
+        if isinstance(obj, DictionaryObject):
+            return DictionaryObject({NameObject(name): self.copy(value) for name, value in obj.items()})
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self.copy(value) for value in obj)
+        return obj
+
+
+def key(indirect):
+    return indirect.idnum, indirect.generation
+
+
+def reference(number):
+    return IndirectObject(number, 0, None)
+
+
+def inherited(page, name):
+    node = page
+    while name not in node and '/Parent' in node:
+        node = node['/Parent'].get_object()
+    return node.get(name)
+
+
+def read_xref(source):
+    """Object offsets from the xref table of a file written by StreamingPdfWriter."""
+    source.seek(0, 2)
+    source.seek(max(source.tell() - 1024, 0))
+    tail = source.read()
+    xref_offset = int(tail[tail.rindex(b'startxref') + len(b'startxref'):].split()[0])
+    source.seek(xref_offset)
+    source.readline()
+    _, size = source.readline().split()
+    offsets = {}
+    for number in range(int(size)):
+        entry = source.read(20)
+        if number and entry[17:18] == b'n':
+            offsets[number] = int(entry[:10])
+    return offsets
+
+
+def merge_pdfs(output_path, parts, resume=None):
+    """
+    Concatenates ``parts`` (``[(path, outline title or None), ...]``) into a new PDF at
+    ``output_path`` and returns one checkpoint per part. With ``resume`` (``(earlier
+    output, its checkpoints for the first parts)``) those parts are copied from the
+    earlier output instead of being merged again.
+    """
+    if PdfReader is None:
+        raise RuntimeError("Merging PDFs requires the 'pypdf' package.")
+    with open(output_path, 'wb') as handle:
+        writer = StreamingPdfWriter(handle)
+        checkpoints = []
+        if resume:
+            source_path, checkpoints = resume[0], list(resume[1])
+            writer.resume(source_path, checkpoints)
+        else:
+            writer.begin()
+        for path, title in parts[len(checkpoints):]:
+            checkpoints.append(writer.append(path, title))
+        writer.close()
+    return checkpoints
@@ -0,0 +1,138 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .extraction import extract_file, run_in_pool
+from .minhash import band_keys, containment, fingerprint_text, jaccard, unpack
+from .models import Article, ArticleVersion, PlagiarismBucket, PlagiarismCheck
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Threads that run checks: they wait on the document process pool and do the database work."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'PLAGIARISM_WORKERS', 2),
+                thread_name_prefix='plagiarism',
+            )
+        return _executor
+
+
+def queue_check(version):
+    check = PlagiarismCheck.objects.create(version=version, article_id=version.article_id)
+    if getattr(settings, 'PLAGIARISM_IN_PROCESS', True):
+        transaction.on_commit(lambda: get_executor().submit(run_check, check.id))
+    return check
+
+
+def claim_check(check_id):
+    return PlagiarismCheck.objects.filter(pk=check_id, status=PlagiarismCheck.Status.QUEUED).update(
+        status=PlagiarismCheck.Status.RUNNING
+    ) == 1
+
+
+def fingerprint(field_file):
+    """Shingles the file's cached text in the document process pool."""
+    return run_in_pool(fingerprint_text, extract_file(field_file).text)
+
+
+def find_matches(check, values):
+    """
+    Compares the signature with every check sharing an LSH band key (other articles only)
+    and returns the best match per article, most similar first.
+    """
+    limit = getattr(settings, 'PLAGIARISM_MAX_CANDIDATES', 500)
+    candidates = (
+        PlagiarismCheck.objects.filter(status=PlagiarismCheck.Status.DONE, buckets__key__in=band_keys(values))
+        .exclude(article_id=check.article_id)
+        .annotate(shared_bands=Count('buckets'))
+        .order_by('-shared_bands')
+        .values('version_id', 'article_id', 'article__title', 'signature', 'shingle_count')[:limit]
+    )
+    minimum = getattr(settings, 'PLAGIARISM_MIN_SIMILARITY', 5.0)
+    best = {}
+    for candidate in candidates:
+        similarity = containment(
+            jaccard(values, unpack(candidate['signature'])), check.shingle_count, candidate['shingle_count']
+        ) * 100
+        if similarity < minimum:
+            continue
+        if candidate['article_id'] not in best or similarity > best[candidate['article_id']]['similarity']:
+            best[candidate['article_id']] = {
+                'article_id': candidate['article_id'],
+                'title': candidate['article__title'],
+                'version_id': candidate['version_id'],
+                'similarity': round(similarity, 1),
+            }
+    matches = sorted(best.values(), key=lambda match: -match['similarity'])
+    return matches[:getattr(settings, 'PLAGIARISM_MAX_MATCHES', 10)]
+
+
+def finish_check(check, shingle_count, signature):
+    check.shingle_count = shingle_count
+    check.signature = signature
+    values = unpack(signature) if signature else None
+    check.matches = find_matches(check, values) if values else []
+    check.percentage = check.matches[0]['similarity'] if check.matches else 0.0
+    check.status = PlagiarismCheck.Status.DONE
+    check.finished_at = timezone.now()
+    with transaction.atomic():
+        check.save(update_fields=['shingle_count', 'signature', 'matches', 'percentage', 'status', 'finished_at'])
+        if values:
+            PlagiarismBucket.objects.bulk_create([
+                PlagiarismBucket(plagiarism_check=check, article_id=check.article_id, key=key)
+                for key in band_keys(values)
+            ])
+        # Only the newest version's result is the article's headline number.
+        Article.objects.filter(pk=check.article_id, latestVersion_id=check.version_id).update(
+            plagiarism_percentage=check.percentage
+        )
+
+
+def run_check(check_id):
+    close_old_connections()
+    try:
+        if not claim_check(check_id):
+            return
+        check = PlagiarismCheck.objects.select_related('version').get(pk=check_id)
+        try:
+            shingle_count, signature = fingerprint(check.version.file)
+            finish_check(check, shingle_count, signature)
+        except Exception as exc:
+            logger.exception("Plagiarism check %s failed", check_id)
+            check.status = PlagiarismCheck.Status.FAILED
+            check.error = str(exc)
+            check.finished_at = timezone.now()
+            check.save(update_fields=['status', 'error', 'finished_at'])
+    finally:
+        close_old_connections()
+
+
+def queue_missing_checks():
+    """Queues a check for every version without one, e.g. to index the existing corpus."""
+    versions = ArticleVersion.objects.filter(plagiarism_check__isnull=True).order_by('submittedDate', 'id')
+    checks = [PlagiarismCheck(version_id=pk, article_id=article_id)
+              for pk, article_id in versions.values_list('id', 'article_id')]
+    PlagiarismCheck.objects.bulk_create(checks, batch_size=500)
+    return len(checks)
+
+
+def run_pending_checks(limit=None):
+    """Processes queued checks in this process, oldest first; used by ``run_plagiarism_checks``."""
+    processed = 0
+    queued = PlagiarismCheck.objects.filter(status=PlagiarismCheck.Status.QUEUED).order_by('created_at', 'id')
+    for check_id in queued.values_list('id', flat=True)[:limit]:
+        run_check(check_id)
+        processed += 1
+    return processed
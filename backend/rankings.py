@@ -0,0 +1,242 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from .caching import TTLCache
+from .models import Article, ImpactMetric, Journal, RankingBoard, User
+
+ARTICLE_BOARDS = {
+    'articles_by_views': 'viewCount',
+    'articles_by_downloads': 'downloadCount',
+    'articles_by_citations': 'citationCount',
+}
+SUBJECT_BOARDS = {
+    'authors_by_citations': (ImpactMetric.SubjectType.AUTHOR, 'citation_total'),
+    'authors_by_h_index': (ImpactMetric.SubjectType.AUTHOR, 'h_index'),
+    'journals_by_citations': (ImpactMetric.SubjectType.JOURNAL, 'citation_total'),
+    'journals_by_h_index': (ImpactMetric.SubjectType.JOURNAL, 'h_index'),
+}
+BOARDS = list(ARTICLE_BOARDS) + list(SUBJECT_BOARDS)
+COUNTER_FIELDS = tuple(ARTICLE_BOARDS.values())
+ALL_TIME = 'all'
+
+_cache = TTLCache(
+    maxsize=getattr(settings, 'RANKINGS_CACHE_SIZE', 512),
+    ttl=getattr(settings, 'RANKINGS_CACHE_TTL', 60),
+)
+
+
+def top_k():
+    return getattr(settings, 'RANKINGS_TOP_K', 100)
+
+
+def board_key(board, journal_id=None, period=ALL_TIME):
+    return f"{board}:{journal_id or 'all'}:{period}"
+
+
+def h_index(citations):
+    citations = sorted(citations, reverse=True)
+    h = 0
+    for position, count in enumerate(citations, start=1):
+        if count < position:
+            break
+        h = position
+    return h
+
+
+def _sort_entries(entries):
+    return sorted(entries, key=lambda entry: (-entry['score'], entry['id']))[:top_k()]
+
+
+def _article_entry(row, field):
+    return {
+        'id': row['id'],
+        'score': row[field],
+        'label': row['title'],
+        'journal': row['journal_id'],
+        'author': f"{row['author__name']} {row['author__surname']}".strip(),
+    }
+
+
+ARTICLE_ROW_FIELDS = (
+    'id', 'title', 'journal_id', 'author_id', 'author__name', 'author__surname', 'submittedDate'
+) + COUNTER_FIELDS
+
+
+def compute_article_board(board, journal_id=None, period=ALL_TIME):
+    field = ARTICLE_BOARDS[board]
+    queryset = Article.objects.filter(**{f'{field}__gt': 0})
+    if journal_id:
+        queryset = queryset.filter(journal_id=journal_id)
+    if period != ALL_TIME:
+        queryset = queryset.filter(submittedDate__year=int(period))
+    rows = queryset.order_by(f'-{field}', 'id').values(*ARTICLE_ROW_FIELDS)[:top_k()]
+    return [_article_entry(row, field) for row in rows]
+
+
+def _subject_labels(subject_type, ids):
+    if subject_type == ImpactMetric.SubjectType.AUTHOR:
+        return {row['id']: f"{row['name']} {row['surname']}".strip()
+                for row in User.objects.filter(pk__in=ids).values('id', 'name', 'surname')}
+    return dict(Journal.objects.filter(pk__in=ids).values_list('id', 'name'))
+
+
+def _subject_entries(metrics, field):
+    metrics = list(metrics)
+    by_type = defaultdict(list)
+    for metric in metrics:
+        by_type[metric.subject_type].append(metric.subject_id)
+    labels = {subject_type: _subject_labels(subject_type, ids) for subject_type, ids in by_type.items()}
+    return [{
+        'id': metric.subject_id,
+        'score': getattr(metric, field),
+        'label': labels[metric.subject_type].get(metric.subject_id, ''),
+        'citations': metric.citation_total,
+        'h_index': metric.h_index,
+        'articles': metric.article_count,
+    } for metric in metrics]
+
+
+def compute_subject_board(board):
+    subject_type, field = SUBJECT_BOARDS[board]
+    metrics = ImpactMetric.objects.filter(
+        subject_type=subject_type, **{f'{field}__gt': 0}
+    ).order_by(f'-{field}', 'subject_id')[:top_k()]
+    return _subject_entries(metrics, field)
+
+
+def save_board(key, entries):
+    RankingBoard.objects.update_or_create(key=key, defaults={'entries': entries})
+    _cache.delete(key)
+
+
+def merge_into_board(key, candidates, recompute):
+    """
+    Folds changed entries into a stored board. ``candidates`` maps id -> entry, or None
+    for a removed subject. When a member of a full board drops, the next best row may be
+    outside the board, so ``recompute()`` rebuilds it from the source table instead.
+    """
+    with transaction.atomic():
+        board = RankingBoard.objects.select_for_update().filter(key=key).first()
+        if board is None:
+            save_board(key, recompute())
+            return
+        current = {entry['id']: entry for entry in board.entries}
+        is_full = len(current) >= top_k()
+        for pk, entry in candidates.items():
+            previous = current.get(pk)
+            if previous is not None and is_full and (entry is None or entry['score'] < previous['score']):
+                save_board(key, recompute())
+                return
+        for pk, entry in candidates.items():
+            current.pop(pk, None)
+            if entry is not None and entry['score'] > 0:
+                current[pk] = entry
+        entries = _sort_entries(current.values())
+        if entries != board.entries:
+            save_board(key, entries)
+
+
+def _article_scopes(row):
+    year = str(row['submittedDate'].year)
+    scopes = [(None, ALL_TIME), (None, year)]
+    if row['journal_id']:
+        scopes += [(row['journal_id'], ALL_TIME), (row['journal_id'], year)]
+    return scopes
+
+
+def update_impact_metrics(subject_type, ids):
+    column = 'author_id' if subject_type == ImpactMetric.SubjectType.AUTHOR else 'journal_id'
+    citations = defaultdict(list)
+    for subject_id, count in Article.objects.filter(**{f'{column}__in': ids}).values_list(column, 'citationCount'):
+        citations[subject_id].append(count)
+    metrics = [
+        ImpactMetric(
+            subject_type=subject_type,
+            subject_id=subject_id,
+            citation_total=sum(citations[subject_id]),
+            h_index=h_index(citations[subject_id]),
+            article_count=len(citations[subject_id]),
+        )
+        for subject_id in ids
+    ]
+    ImpactMetric.objects.bulk_create(
+        metrics, update_conflicts=True, unique_fields=['subject_type', 'subject_id'],
+        update_fields=['citation_total', 'h_index', 'article_count', 'updated_at'],
+    )
+    return metrics
+
+
+def refresh_for_articles(article_ids, fields=COUNTER_FIELDS, removed=None):
+    """
+    Brings every board touched by these articles up to date. ``fields`` lists the
+    counters that changed; ``removed`` holds rows (as from ``ARTICLE_ROW_FIELDS``) of
+    deleted articles. Only the affected boards are read and rewritten.
+    """
+    rows = list(Article.objects.filter(pk__in=article_ids).values(*ARTICLE_ROW_FIELDS))
+    removed = removed or []
+
+    for board, field in ARTICLE_BOARDS.items():
+        if field not in fields and not removed:
+            continue
+        per_scope = defaultdict(dict)
+        for row in rows:
+            for scope in _article_scopes(row):
+                per_scope[scope][row['id']] = _article_entry(row, field)
+        for row in removed:
+            for scope in _article_scopes(row):
+                per_scope[scope][row['id']] = None
+        for (journal_id, period), candidates in per_scope.items():
+            merge_into_board(
+                board_key(board, journal_id, period), candidates,
+                lambda: compute_article_board(board, journal_id, period),
+            )
+
+    if 'citationCount' not in fields and not removed:
+        return
+
+    affected = {
+        ImpactMetric.SubjectType.AUTHOR: {row['author_id'] for row in rows + removed if row.get('author_id')},
+        ImpactMetric.SubjectType.JOURNAL: {row['journal_id'] for row in rows + removed if row.get('journal_id')},
+    }
+    metrics = {subject_type: update_impact_metrics(subject_type, ids) for subject_type, ids in affected.items()}
+    for board, (subject_type, field) in SUBJECT_BOARDS.items():
+        candidates = {entry['id']: entry for entry in _subject_entries(metrics[subject_type], field)}
+        if candidates:
+            merge_into_board(board_key(board), candidates, lambda: compute_subject_board(board))
+
+
+def rebuild_rankings():
+    """Recomputes all impact metrics and boards from scratch; returns the number of boards written."""
+    ImpactMetric.objects.all().delete()
+    update_impact_metrics(ImpactMetric.SubjectType.AUTHOR,
+                          list(Article.objects.order_by().values_list('author_id', flat=True).distinct()))
+    update_impact_metrics(ImpactMetric.SubjectType.JOURNAL,
+                          list(Article.objects.filter(journal__isnull=False).order_by()
+                               .values_list('journal_id', flat=True).distinct()))
+
+    years = [str(date.year) for date in Article.objects.dates('submittedDate', 'year')]
+    journal_ids = [None] + list(Journal.objects.values_list('id', flat=True))
+    keys = []
+    for board in ARTICLE_BOARDS:
+        for journal_id in journal_ids:
+            for period in [ALL_TIME] + years:
+                key = board_key(board, journal_id, period)
+                save_board(key, compute_article_board(board, journal_id, period))
+                keys.append(key)
+    for board in SUBJECT_BOARDS:
+        save_board(board_key(board), compute_subject_board(board))
+        keys.append(board_key(board))
+    RankingBoard.objects.exclude(key__in=keys).delete()
+    _cache.clear()
+    return len(keys)
+
+
+def get_ranking(board, journal_id=None, period=ALL_TIME):
+    key = board_key(board, journal_id, period)
+    entries = _cache.get(key)
+    if entries is None:
+        entries = RankingBoard.objects.filter(key=key).values_list('entries', flat=True).first() or []
+        _cache.set(key, entries)
+    return entries
@@ -0,0 +1,134 @@
+"""
+Version-stamped caching for reference-data endpoints (journals, journal types and
+categories, services, SOHA fields).
+
+Every model behind those endpoints has a ReferenceStamp that signals bump on each save
+and delete. Responses carry an ETag derived from the stamps they depend on, so a client
+revalidating with If-None-Match (or If-Modified-Since) gets a 304 without any query.
+Rendered JSON is cached in this process and in the shared cache under the same ETag:
+when a stamp changes, the ETag changes and old entries are simply never read again.
+
+Stamps themselves are cached in the shared cache (REFERENCE_CACHE, default ``'default'``)
+and a bump drops them there at once; with a per-process cache backend, other processes
+see it within REFERENCE_STAMP_TIMEOUT seconds. Queryset ``update()`` calls bypass the
+signals and need an explicit ``bump_stamp``.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .caching import TTLCache
+from .models import ReferenceStamp
+
+STAMP_KEY = 'reference-stamp:{}'
+BODY_KEY = 'reference-body:{}'
+
+_bodies = TTLCache(
+    maxsize=getattr(settings, 'REFERENCE_CACHE_SIZE', 256),
+    ttl=getattr(settings, 'REFERENCE_CACHE_TTL', 3600),
+)
+
+
+def get_cache():
+    return caches[getattr(settings, 'REFERENCE_CACHE', 'default')]
+
+
+def stamp_timeout():
+    return getattr(settings, 'REFERENCE_STAMP_TIMEOUT', 300)
+
+
+def get_stamps(names):
+    """``{name: (version, updated_at timestamp)}``, read from the database only on a cache miss."""
+    cache = get_cache()
+    keys = {STAMP_KEY.format(name): name for name in names}
+    found = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+    missing = [name for name in names if name not in found]
+    if missing:
+        rows = {row.name: row for row in ReferenceStamp.objects.filter(name__in=missing)}
+        loaded = {}
+        for name in missing:
+            row = rows.get(name)
+            # Never-bumped models share version 0 at the epoch.
+            loaded[name] = (row.version, row.updated_at.timestamp()) if row else (0, 0.0)
+        cache.set_many({STAMP_KEY.format(name): value for name, value in loaded.items()}, stamp_timeout())
+        found.update(loaded)
+    return found
+
+
+def bump_stamp(name):
+    now = timezone.now()
+    if not ReferenceStamp.objects.filter(name=name).update(version=F('version') + 1, updated_at=now):
+        try:
+            with transaction.atomic():
+                ReferenceStamp.objects.create(name=name, version=1, updated_at=now)
+        except IntegrityError:
+            ReferenceStamp.objects.filter(name=name).update(version=F('version') + 1, updated_at=now)
+    # Dropped rather than overwritten, so the next read takes the committed version.
+    transaction.on_commit(lambda: get_cache().delete(STAMP_KEY.format(name)))
+
+
+class ReferenceDataCacheMixin:
+    """
+    Conditional and cached ``list``/``retrieve`` for viewsets whose output depends only on
+    the models named in ``reference_models`` (not on the requesting user).
+    """
+    reference_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(ReferenceDataCacheMixin, self).list(
+            request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(ReferenceDataCacheMixin, self).retrieve(
+            request, *args, **kwargs))
+
+    def cached_response(self, request, respond):
+        if request.accepted_renderer.format != 'json':
+            # The browsable API page depends on the user; only JSON is shared.
+            return respond()
+        stamps = get_stamps(self.reference_models)
+        variant = [
+            self.__class__.__name__, self.action, request.get_full_path(), request.build_absolute_uri('/'),
+            request.accepted_media_type, sorted(stamps.items()),
+        ]
+        etag = f'"{hashlib.sha1(repr(variant).encode("utf-8")).hexdigest()}"'
+        last_modified = int(max(updated_at for _, updated_at in stamps.values()))
+        response = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+        if response is None:
+            body, content_type = self.cached_body(request, etag, respond)
+            if body is None:
+                return content_type
+            response = HttpResponse(body, content_type=content_type)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # Clients revalidate every time, which costs them a 304 at most.
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def cached_body(self, request, etag, respond):
+        """``(body, content type)``; ``(None, response)`` when ``respond`` did not succeed."""
+        cached = _bodies.get(etag)
+        if cached is None:
+            cached = get_cache().get(BODY_KEY.format(etag))
+            if cached is not None:
+                _bodies.set(etag, cached)
+        if cached is None:
+            response = respond()
+            if response.status_code != 200:
+                return None, response
+            renderer = request.accepted_renderer
+            body = renderer.render(response.data, request.accepted_media_type, self.get_renderer_context())
+            content_type = request.accepted_media_type
+            if renderer.charset:
+                content_type = f'{content_type}; charset={renderer.charset}'
+            cached = (body, content_type)
+            _bodies.set(etag, cached)
+            get_cache().set(BODY_KEY.format(etag), cached, getattr(settings, 'REFERENCE_CACHE_TTL', 3600))
+        return cached
@@ -0,0 +1,86 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .models import Article, CheckoutItem, ClickTransaction, RevenueRollup, ServiceOrder
+
+
+def month_start(moment):
+    return timezone.localdate(moment).replace(day=1)
+
+
+def record_payment(paid_at, source_type, journal_id, amount, count=1):
+    lookup = {'month': month_start(paid_at), 'source_type': source_type, 'journal_id': journal_id}
+    changes = {'amount': F('amount') + amount, 'transaction_count': F('transaction_count') + count}
+    with transaction.atomic():
+        if RevenueRollup.objects.filter(**lookup).update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                RevenueRollup.objects.create(amount=amount, transaction_count=count, **lookup)
+        except IntegrityError:
+            RevenueRollup.objects.filter(**lookup).update(**changes)
+
+
+def monthly_revenue():
+    """The report's monthly totals: one indexed read over the rollup table."""
+    return RevenueRollup.objects.order_by('month').values('month').annotate(total=Sum('amount'))
+
+
+def _completed_rows(queryset):
+    article_type = ContentType.objects.get_for_model(Article)
+    service_type = ContentType.objects.get_for_model(ServiceOrder)
+    article_journal = Article.objects.filter(pk=OuterRef('object_id')).values('journal_id')[:1]
+    queryset = queryset.filter(
+        status=ClickTransaction.Status.COMPLETED,
+        content_type__in=[article_type, service_type],
+    ).annotate(
+        paid_month=TruncMonth(Coalesce('completed_at', 'updated_at')),
+        journal_ref=Subquery(article_journal, output_field=IntegerField()),
+    )
+    # Lines of multi-item checkouts are booked per item, like the webhook does.
+    items = CheckoutItem.objects.filter(
+        checkout__transactions__status=ClickTransaction.Status.COMPLETED,
+        content_type__in=[article_type, service_type],
+    ).annotate(
+        paid_month=TruncMonth(Coalesce('checkout__transactions__completed_at', 'checkout__transactions__updated_at')),
+        journal_ref=Subquery(article_journal, output_field=IntegerField()),
+    )
+    for source in (queryset, items):
+        for row in source.order_by().values('paid_month', 'content_type', 'journal_ref').annotate(
+                total=Sum('amount'), count=Count('id')):
+            if row['content_type'] == article_type.id:
+                yield row['paid_month'], RevenueRollup.SourceType.ARTICLE_SUBMISSION, row['journal_ref'], row
+            else:
+                yield row['paid_month'], RevenueRollup.SourceType.SERVICE_ORDER, None, row
+
+
+def rebuild_rollup(full=False):
+    """
+    Recomputes rollup rows from completed CLICK transactions. Closed months are kept
+    as they are unless ``full`` is set. Every month before the current one is then
+    marked closed. Returns the number of rows written.
+    """
+    current_month = month_start(timezone.now())
+    rows = {}
+    for paid_month, source_type, journal_id, row in _completed_rows(ClickTransaction.objects.all()):
+        month = paid_month.date() if hasattr(paid_month, 'date') else paid_month
+        key = (month, source_type, journal_id)
+        rollup = rows.setdefault(key, RevenueRollup(
+            month=month, source_type=source_type, journal_id=journal_id, amount=0, transaction_count=0,
+            is_closed=month < current_month,
+        ))
+        rollup.amount += row['total']
+        rollup.transaction_count += row['count']
+
+    with transaction.atomic():
+        stale = RevenueRollup.objects.all() if full else RevenueRollup.objects.filter(is_closed=False)
+        if not full:
+            closed_months = set(RevenueRollup.objects.filter(is_closed=True).values_list('month', flat=True))
+            rows = {key: rollup for key, rollup in rows.items() if key[0] not in closed_months}
+        stale.delete()
+        RevenueRollup.objects.bulk_create(rows.values(), batch_size=1000)
+        RevenueRollup.objects.filter(month__lt=current_month, is_closed=False).update(is_closed=True)
+    return len(rows)
@@ -0,0 +1,221 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Article
+
+SEARCH_FIELDS = ('title', 'title_en', 'abstract_en', 'keywords_en', 'udk', 'author_name')
+
+# Columns that carry more signal rank higher: titles, then keywords/UDK/author, then the abstract.
+FIELD_WEIGHTS = {
+    'title': 10.0, 'title_en': 8.0, 'abstract_en': 2.0, 'keywords_en': 4.0, 'udk': 3.0, 'author_name': 5.0,
+}
+POSTGRES_WEIGHT_CLASSES = {
+    'title': 'A', 'title_en': 'A', 'abstract_en': 'C', 'keywords_en': 'B', 'udk': 'B', 'author_name': 'B',
+}
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def article_documents(article_ids):
+    rows = Article.objects.filter(pk__in=article_ids).values(
+        'id', 'title', 'title_en', 'abstract_en', 'keywords_en', 'udk', 'author__name', 'author__surname'
+    )
+    for row in rows:
+        row['author_name'] = f"{row.pop('author__name') or ''} {row.pop('author__surname') or ''}".strip()
+        yield row['id'], [row[field] or '' for field in SEARCH_FIELDS]
+
+
+class SQLiteFTS5Backend:
+    table = 'backend_article_fts'
+
+    def install(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                f"{', '.join(SEARCH_FIELDS)}, tokenize='unicode61 remove_diacritics 2')"
+            )
+
+    def index(self, article_ids):
+        documents = list(article_documents(article_ids))
+        placeholders = ', '.join(['%s'] * (len(SEARCH_FIELDS) + 1))
+        # FTS5 has no upsert; keep the delete and insert together so parallel reindexes can't interleave.
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(pk,) for pk, _ in documents])
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, {', '.join(SEARCH_FIELDS)}) VALUES ({placeholders})",
+                [(pk, *values) for pk, values in documents],
+            )
+
+    def remove(self, article_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(pk,) for pk in article_ids])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+
+    def search(self, query, journal_id=None, statuses=None, limit=20, offset=0):
+        tokens = TOKEN_RE.findall(query)
+        if not tokens:
+            return []
+        # Quote every token so user input never reaches the FTS5 query grammar; prefix-match each one.
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        weights = ', '.join(str(FIELD_WEIGHTS[field]) for field in SEARCH_FIELDS)
+        sql = [
+            f"SELECT f.rowid, bm25({self.table}, {weights}) AS rank FROM {self.table} f",
+            "JOIN backend_article a ON a.id = f.rowid",
+            f"WHERE {self.table} MATCH %s",
+        ]
+        params = [match]
+        sql, params = _add_filters(sql, params, journal_id, statuses)
+        sql.append("ORDER BY rank, f.rowid DESC LIMIT %s OFFSET %s")
+        params += [limit, offset]
+        with connection.cursor() as cursor:
+            cursor.execute(' '.join(sql), params)
+            # bm25() is lower-is-better; flip it so every backend reports higher-is-better.
+            return [(pk, -rank) for pk, rank in cursor.fetchall()]
+
+
+class PostgresBackend:
+    table = 'backend_article_search'
+    config = 'simple'
+
+    def install(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "article_id integer PRIMARY KEY REFERENCES backend_article (id) ON DELETE CASCADE "
+                "DEFERRABLE INITIALLY DEFERRED, document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_document_gin ON {self.table} USING GIN (document)"
+            )
+
+    def index(self, article_ids):
+        documents = list(article_documents(article_ids))
+        vector = ' || '.join(
+            f"setweight(to_tsvector('{self.config}', %s), '{POSTGRES_WEIGHT_CLASSES[field]}')"
+            for field in SEARCH_FIELDS
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.table} (article_id, document) VALUES (%s, {vector}) "
+                "ON CONFLICT (article_id) DO UPDATE SET document = EXCLUDED.document",
+                [(pk, *values) for pk, values in documents],
+            )
+
+    def remove(self, article_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE article_id = ANY(%s)", [list(article_ids)])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {self.table}")
+
+    def search(self, query, journal_id=None, statuses=None, limit=20, offset=0):
+        if not TOKEN_RE.search(query):
+            return []
+        sql = [
+            "SELECT s.article_id, ts_rank_cd(s.document, q) AS rank",
+            f"FROM {self.table} s JOIN backend_article a ON a.id = s.article_id,",
+            f"websearch_to_tsquery('{self.config}', %s) q",
+            "WHERE s.document @@ q",
+        ]
+        params = [query]
+        sql, params = _add_filters(sql, params, journal_id, statuses)
+        sql.append("ORDER BY rank DESC, s.article_id DESC LIMIT %s OFFSET %s")
+        params += [limit, offset]
+        with connection.cursor() as cursor:
+            cursor.execute(' '.join(sql), params)
+            return cursor.fetchall()
+
+
+class FallbackBackend:
+    """Unindexed ``icontains`` search for databases without a full-text backend here."""
+
+    def install(self):
+        pass
+
+    def index(self, article_ids):
+        pass
+
+    def remove(self, article_ids):
+        pass
+
+    def clear(self):
+        pass
+
+    def search(self, query, journal_id=None, statuses=None, limit=20, offset=0):
+        tokens = TOKEN_RE.findall(query)
+        if not tokens:
+            return []
+        queryset = Article.objects.all()
+        for token in tokens:
+            queryset = queryset.filter(
+                Q(title__icontains=token) | Q(title_en__icontains=token) | Q(abstract_en__icontains=token) |
+                Q(keywords_en__icontains=token) | Q(udk__icontains=token) |
+                Q(author__name__icontains=token) | Q(author__surname__icontains=token)
+            )
+        if journal_id:
+            queryset = queryset.filter(journal_id=journal_id)
+        if statuses:
+            queryset = queryset.filter(status__in=statuses)
+        ids = queryset.order_by('-submittedDate', '-id').values_list('id', flat=True)[offset:offset + limit]
+        return [(pk, 0.0) for pk in ids]
+
+
+def _add_filters(sql, params, journal_id, statuses):
+    if journal_id:
+        sql.append("AND a.journal_id = %s")
+        params.append(journal_id)
+    if statuses:
+        sql.append(f"AND a.status IN ({', '.join(['%s'] * len(statuses))})")
+        params.extend(statuses)
+    return sql, params
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTS5Backend,
+    'postgresql': PostgresBackend,
+}
+
+
+def get_backend():
+    return BACKENDS.get(connection.vendor, FallbackBackend)()
+
+
+def index_articles(article_ids):
+    article_ids = list(article_ids)
+    if article_ids:
+        transaction.on_commit(lambda: get_backend().index(article_ids))
+
+
+def remove_articles(article_ids):
+    article_ids = list(article_ids)
+    if article_ids:
+        transaction.on_commit(lambda: get_backend().remove(article_ids))
+
+
+def rebuild_index(batch_size=1000):
+    backend = get_backend()
+    backend.install()
+    backend.clear()
+    total = 0
+    batch = []
+    for pk in Article.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=batch_size):
+        batch.append(pk)
+        if len(batch) == batch_size:
+            backend.index(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        backend.index(batch)
+        total += len(batch)
+    return total
+
+
+def search_articles(query, journal_id=None, statuses=None, limit=20, offset=0):
+    """Returns ``[(article_id, rank), ...]`` best match first."""
+    return get_backend().search(query, journal_id=journal_id, statuses=statuses, limit=limit, offset=offset)
@@ -1,9 +1,143 @@
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils.text import get_valid_filename
 from rest_framework import serializers
 from .models import (
     User, Journal, Article, Issue, ArticleVersion, AuditLog, IntegrationSetting,
-    JournalCategory, JournalType, EditorialBoardApplication, Service, ServiceOrder
+    JournalCategory, JournalType, EditorialBoardApplication, Service, ServiceOrder, Soha, ReportJob, UploadSession,
+    PlagiarismCheck, IssueCompilation
 )
+from .images import variant_urls
+from .uploads import get_upload, max_chunk_size, max_upload_size
 import json
+import os
+
+
+def get_requested_fields(request):
+    """Returns the set of names from ``?fields=a,b,c`` on read requests, or None."""
+    if request is None or request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        return None
+    raw = request.query_params.get('fields')
+    if not raw:
+        return None
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Trims the output to the fields named in ``?fields=`` (or the ``fields`` kwarg).
+
+    ``setup_queryset`` loads only what those fields need: plain columns go through
+    ``only()``, and relations are joined or prefetched only when they are requested.
+    """
+    select_related_fields = {}
+    prefetch_related_fields = {}
+    source_columns = {}
+    always_load = ('id',)
+    # Fields left out of list responses unless ``?fields=`` asks for them.
+    list_excluded_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            fields = get_requested_fields(self.context.get('request'))
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def list_fields(cls):
+        return [name for name in cls.Meta.fields if name not in cls.list_excluded_fields]
+
+    @classmethod
+    def setup_queryset(cls, queryset, fields=None, extra_columns=()):
+        names = [name for name in cls.Meta.fields if not fields or name in fields]
+        concrete = {field.name for field in cls.Meta.model._meta.concrete_fields}
+        columns = set(cls.always_load) | set(extra_columns)
+        select_related, prefetch_related = set(), set()
+
+        for name in names:
+            if name in cls.select_related_fields:
+                relation, related_columns = cls.select_related_fields[name]
+                select_related.add(relation)
+                if related_columns is None:
+                    columns.add(relation)
+                else:
+                    columns.update(f'{relation}__{column}' for column in related_columns)
+            elif name in cls.prefetch_related_fields:
+                prefetch_related.add(cls.prefetch_related_fields[name])
+            elif name in cls.source_columns:
+                columns.add(cls.source_columns[name])
+            elif name in concrete:
+                columns.add(name)
+
+        if select_related:
+            queryset = queryset.select_related(*sorted(select_related))
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*sorted(prefetch_related))
+        # Without an explicit field list (or on writes) keep every column so save() stays complete.
+        if fields or extra_columns:
+            queryset = queryset.only(*sorted(columns))
+        return queryset
+
+
+class UploadField(serializers.UUIDField):
+    """Takes the id of the user's completed upload session in place of a multipart file."""
+    default_error_messages = {'unavailable': 'No completed, unused upload with this id.'}
+
+    def to_internal_value(self, data):
+        upload = get_upload(self.context['request'].user, super().to_internal_value(data))
+        if upload is None:
+            self.fail('unavailable')
+        return upload
+
+
+class UploadFieldsMixin:
+    """
+    Adds a write-only ``<name>_upload`` input next to each file field in ``upload_fields``.
+    Either one satisfies a required file field; the upload is claimed when the row is saved.
+    """
+    upload_fields = ()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        self.required_file_fields = [name for name in self.upload_fields if fields[name].required]
+        for name in self.upload_fields:
+            fields[name].required = False
+            fields[f'{name}_upload'] = UploadField(source=name, write_only=True, required=False)
+        return fields
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if not self.partial:
+            missing = {name: ['This field is required.'] for name in self.required_file_fields if not attrs.get(name)}
+            if missing:
+                raise serializers.ValidationError(missing)
+        return attrs
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    max_chunk_size = serializers.SerializerMethodField()
+
+    def get_max_chunk_size(self, obj):
+        return max_chunk_size()
+
+    def validate_filename(self, value):
+        try:
+            return get_valid_filename(os.path.basename(value))
+        except SuspiciousFileOperation:
+            raise serializers.ValidationError("A valid file name is required.")
+
+    def validate_size(self, value):
+        if not 0 < value <= max_upload_size():
+            raise serializers.ValidationError(f"Size must be between 1 and {max_upload_size()} bytes.")
+        return value
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'size', 'offset', 'status', 'sha256', 'max_chunk_size', 'created_at',
+                  'updated_at']
+        read_only_fields = ['id', 'offset', 'status', 'sha256', 'created_at', 'updated_at']
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -46,6 +180,7 @@ class JournalSerializer(serializers.ModelSerializer):
     category = JournalCategorySerializer(read_only=True)
     journal_type = JournalTypeSerializer(read_only=True)
     image_url = serializers.ImageField(source='image', use_url=True, read_only=True)
+    image_variants = serializers.SerializerMethodField()
     manager_id = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.filter(role=User.Role.JOURNAL_MANAGER),
         source='manager', write_only=True, required=False, allow_null=True
@@ -59,10 +194,13 @@ class JournalSerializer(serializers.ModelSerializer):
         source='journal_type', write_only=True
     )
 
+    def get_image_variants(self, obj):
+        return variant_urls(self.context.get('request'), obj.image)
+
     class Meta:
         model = Journal
         fields = [
-            'id', 'name', 'description', 'manager', 'category', 'journal_type', 'image_url',
+            'id', 'name', 'description', 'manager', 'category', 'journal_type', 'image_url', 'image_variants',
             'partner_price', 'regular_price', 'manager_id', 'category_id', 'journal_type_id', 'image'
         ]
         extra_kwargs = {
@@ -84,10 +222,18 @@ class ArticleVersionSerializer(serializers.ModelSerializer):
         fields = ['id', 'versionNumber', 'file_url', 'submittedDate', 'notes']
 
 
-class ArticleSerializer(serializers.ModelSerializer):
+class PlagiarismCheckSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PlagiarismCheck
+        fields = ['version', 'status', 'percentage', 'matches', 'error', 'created_at', 'finished_at']
+        read_only_fields = fields
+
+
+class ArticleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     journalName = serializers.CharField(source='journal.name', read_only=True, allow_null=True)
     versions = ArticleVersionSerializer(many=True, read_only=True)
+    latestVersion = ArticleVersionSerializer(read_only=True)
     assignedEditorName = serializers.CharField(source='assignedEditor.get_full_name', read_only=True, allow_null=True,
                                                default='')
     finalVersionFileUrl = serializers.SerializerMethodField()
@@ -95,6 +241,25 @@ class ArticleSerializer(serializers.ModelSerializer):
     attachment_file_url = serializers.SerializerMethodField()
     payment_url = serializers.CharField(read_only=True, required=False)
 
+    select_related_fields = {
+        'author': ('author', None),
+        'journalName': ('journal', ['name']),
+        'assignedEditorName': ('assignedEditor', ['name', 'surname']),
+        'latestVersion': ('latestVersion', None),
+    }
+    prefetch_related_fields = {'versions': 'versions'}
+    list_excluded_fields = ('versions',)
+    source_columns = {
+        'finalVersionFileUrl': 'finalVersionFile',
+        'certificate_file_url': 'certificate_file',
+        'attachment_file_url': 'attachment_file',
+    }
+    always_load = ('id', 'submittedDate')
+
+    def build_instance(self, validated_data, **extra):
+        """An unsaved Article, for callers that insert rows in bulk (see ``checkout``)."""
+        return Article(**{**validated_data, **extra})
+
     def get_finalVersionFileUrl(self, obj):
         request = self.context.get('request')
         if obj.finalVersionFile and hasattr(obj.finalVersionFile, 'url'):
@@ -118,20 +283,48 @@ class ArticleSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'author', 'category', 'udk', 'journal', 'journalName', 'submittedDate', 'status',
             'abstract_en', 'keywords_en', 'assignedEditor', 'assignedEditorName', 'submissionPaymentStatus',
-            'versions', 'managerNotes', 'finalVersionFileUrl', 'submission_fee',
+            'versions', 'latestVersion', 'managerNotes', 'finalVersionFileUrl', 'submission_fee',
             'plagiarism_percentage', 'certificate_file_url', 'external_link', 'attachment_file_url',
             'payment_url'
         ]
 
 
+class ArticleListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    journalName = serializers.CharField(source='journal.name', read_only=True, allow_null=True)
+
+    select_related_fields = {'journalName': ('journal', ['name'])}
+    always_load = ('id', 'submittedDate')
+
+    class Meta:
+        model = Article
+        fields = ['id', 'title', 'status', 'journal', 'journalName', 'submittedDate', 'submissionPaymentStatus']
+        read_only_fields = fields
+
+
 class IssueSerializer(serializers.ModelSerializer):
-    articles = ArticleSerializer(many=True, read_only=True)
+    articles = ArticleListSerializer(many=True, read_only=True)
 
     class Meta:
         model = Issue
         fields = '__all__'
 
 
+class IssueCompilationSerializer(serializers.ModelSerializer):
+    file_url = serializers.SerializerMethodField()
+
+    def get_file_url(self, obj):
+        request = self.context.get('request')
+        if obj.file and hasattr(obj.file, 'url'):
+            return request.build_absolute_uri(obj.file.url)
+        return None
+
+    class Meta:
+        model = IssueCompilation
+        fields = ['id', 'issue', 'status', 'manifest', 'page_count', 'file_url', 'error', 'created_at', 'started_at',
+                  'finished_at']
+        read_only_fields = fields
+
+
 class AuditLogSerializer(serializers.ModelSerializer):
     user_phone = serializers.CharField(source='user.phone', read_only=True, allow_null=True)
 
@@ -155,10 +348,12 @@ class IntegrationSettingSerializer(serializers.ModelSerializer):
         return ""
 
 
-class EditorialBoardApplicationSerializer(serializers.ModelSerializer):
+class EditorialBoardApplicationSerializer(UploadFieldsMixin, serializers.ModelSerializer):
+    upload_fields = ('passport_file', 'photo_3x4', 'diploma_file')
     user = UserSerializer(read_only=True)
     passport_file_url = serializers.SerializerMethodField()
     photo_3x4_url = serializers.SerializerMethodField()
+    photo_3x4_variants = serializers.SerializerMethodField()
     diploma_file_url = serializers.SerializerMethodField()
 
     def get_passport_file_url(self, obj):
@@ -173,6 +368,9 @@ class EditorialBoardApplicationSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.photo_3x4.url)
         return None
 
+    def get_photo_3x4_variants(self, obj):
+        return variant_urls(self.context.get('request'), obj.photo_3x4)
+
     def get_diploma_file_url(self, obj):
         request = self.context.get('request')
         if obj.diploma_file and hasattr(obj.diploma_file, 'url'):
@@ -191,7 +389,8 @@ class ServiceSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug', 'description', 'price', 'is_active']
 
 
-class ServiceOrderSerializer(serializers.ModelSerializer):
+class ServiceOrderSerializer(UploadFieldsMixin, serializers.ModelSerializer):
+    upload_fields = ('attached_file',)
     user = UserSerializer(read_only=True)
     service = ServiceSerializer(read_only=True)
     service_id = serializers.PrimaryKeyRelatedField(
@@ -217,7 +416,7 @@ class ServiceOrderSerializer(serializers.ModelSerializer):
             'calculated_price': {'required': False}
         }
 
-    def create(self, validated_data):
+    def parse_form_data(self, validated_data):
         form_data_str = validated_data.pop('form_data_str', '{}')
         try:
             form_data = json.loads(form_data_str)
@@ -225,7 +424,31 @@ class ServiceOrderSerializer(serializers.ModelSerializer):
             form_data = {}
 
         validated_data['form_data'] = form_data
-        return super().create(validated_data)
+        return validated_data
+
+    def create(self, validated_data):
+        return super().create(self.parse_form_data(validated_data))
+
+    def build_instance(self, validated_data, **extra):
+        """An unsaved ServiceOrder, for callers that insert rows in bulk (see ``checkout``)."""
+        return ServiceOrder(**self.parse_form_data({**validated_data, **extra}))
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    format = serializers.ChoiceField(source='export_format', choices=ReportJob.Format.choices)
+    artifact_url = serializers.SerializerMethodField()
+
+    def get_artifact_url(self, obj):
+        request = self.context.get('request')
+        if obj.artifact and hasattr(obj.artifact, 'url'):
+            return request.build_absolute_uri(obj.artifact.url)
+        return None
+
+    class Meta:
+        model = ReportJob
+        fields = ['id', 'kind', 'format', 'params', 'status', 'artifact_url', 'error', 'created_at', 'started_at',
+                  'finished_at']
+        read_only_fields = ['id', 'status', 'artifact_url', 'error', 'created_at', 'started_at', 'finished_at']
 
 
 class SohaSerializer(serializers.ModelSerializer):
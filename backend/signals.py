@@ -0,0 +1,189 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from .audit import Action, build_event, log_event, log_events
+from .images import queue_variants
+from .authentication import revoke_tokens
+
+from .dashboard import STATE_FIELDS, get_article_state, record_article_transition, state_from_values
+from .models import Article, EditorialBoardApplication, Journal, JournalCategory, JournalType, Service, Soha, User
+from .rankings import COUNTER_FIELDS, refresh_for_articles
+from .reference import bump_stamp
+from .search import get_backend, index_articles, remove_articles
+
+_STATE_ATTNAMES = set(STATE_FIELDS)
+# Changing any of these revokes the user's tokens, whose claims may no longer hold.
+TOKEN_REVOKING_FIELDS = ('password', 'role', 'is_active')
+
+
+@receiver(post_init, sender=Article)
+def remember_article_state(sender, instance, **kwargs):
+    # Only snapshot fully loaded rows; touching a deferred field here would cost a query.
+    if instance.pk and _STATE_ATTNAMES <= instance.__dict__.keys():
+        instance._dashboard_state = get_article_state(instance)
+    if instance.pk and set(COUNTER_FIELDS) <= instance.__dict__.keys():
+        instance._ranking_counters = {field: instance.__dict__[field] for field in COUNTER_FIELDS}
+
+
+@receiver(pre_save, sender=Article)
+def load_article_state(sender, instance, **kwargs):
+    if instance.pk and not hasattr(instance, '_dashboard_state'):
+        values = Article.objects.filter(pk=instance.pk).values(*STATE_FIELDS).first()
+        instance._dashboard_state = state_from_values(values)
+
+
+@receiver(post_save, sender=Article)
+def update_dashboard_counters(sender, instance, created, **kwargs):
+    old = None if created else getattr(instance, '_dashboard_state', None)
+    new = get_article_state(instance)
+    record_article_transition(old, new)
+    instance._dashboard_state = new
+
+    if created:
+        log_event(Action.ARTICLE_SUBMITTED, target=instance, details={'title': instance.title})
+    elif old is not None and old.status != new.status:
+        log_event(Action.ARTICLE_STATUS_CHANGED, target=instance, details={'from': old.status, 'to': new.status})
+
+
+@receiver(post_delete, sender=Article)
+def remove_from_dashboard_counters(sender, instance, **kwargs):
+    old = getattr(instance, '_dashboard_state', None) or get_article_state(instance)
+    record_article_transition(old, None)
+
+
+@receiver(post_save, sender=Article)
+def index_article(sender, instance, **kwargs):
+    index_articles([instance.pk])
+
+
+@receiver(post_delete, sender=Article)
+def unindex_article(sender, instance, **kwargs):
+    remove_articles([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def reindex_author_articles(sender, instance, created, update_fields=None, **kwargs):
+    # The author's name is part of each article's search document.
+    if created or (update_fields is not None and not {'name', 'surname'} & set(update_fields)):
+        return
+    index_articles(Article.objects.filter(author=instance).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Article)
+def refresh_article_rankings(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_ranking_counters', None)
+    if created or previous is None:
+        return
+    current = {field: getattr(instance, field) for field in COUNTER_FIELDS}
+    changed = [field for field in COUNTER_FIELDS if current[field] != previous[field]]
+    instance._ranking_counters = current
+    if changed:
+        transaction.on_commit(lambda: refresh_for_articles([instance.pk], fields=changed))
+
+
+@receiver(post_delete, sender=Article)
+def drop_article_rankings(sender, instance, **kwargs):
+    removed = {
+        'id': instance.pk,
+        'journal_id': instance.journal_id,
+        'author_id': instance.author_id,
+        'submittedDate': instance.submittedDate,
+    }
+    transaction.on_commit(lambda: refresh_for_articles([], fields=(), removed=[removed]))
+
+
+def articles_created(articles):
+    """The post_save bookkeeping for new articles, for rows inserted with ``bulk_create``."""
+    for article in articles:
+        article._dashboard_state = get_article_state(article)
+        article._ranking_counters = {field: getattr(article, field) for field in COUNTER_FIELDS}
+        record_article_transition(None, article._dashboard_state)
+    log_events(build_event(Action.ARTICLE_SUBMITTED, target=article, details={'title': article.title})
+               for article in articles)
+    index_articles([article.pk for article in articles])
+
+
+def install_search_index(sender, **kwargs):
+    get_backend().install()
+
+
+@receiver(post_save, sender=User)
+def audit_user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        log_event(Action.USER_CREATED, target=instance, details={'role': instance.role})
+    elif update_fields is None or set(update_fields) - {'last_login'}:
+        fields = sorted(update_fields) if update_fields else None
+        log_event(Action.USER_UPDATED, target=instance, details={'fields': fields})
+
+
+@receiver(post_init, sender=User)
+def remember_token_fields(sender, instance, **kwargs):
+    # Token users carry only a few fields; snapshotting them must not load the rest.
+    if instance.pk and set(TOKEN_REVOKING_FIELDS) <= instance.__dict__.keys():
+        instance._token_fields = {field: instance.__dict__[field] for field in TOKEN_REVOKING_FIELDS}
+
+
+@receiver(pre_save, sender=User)
+def load_token_fields(sender, instance, **kwargs):
+    if instance.pk and not hasattr(instance, '_token_fields'):
+        instance._token_fields = User.objects.filter(pk=instance.pk).values(*TOKEN_REVOKING_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def revoke_changed_user_tokens(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_token_fields', None)
+    current = {field: getattr(instance, field) for field in TOKEN_REVOKING_FIELDS}
+    instance._token_fields = current
+    if not created and previous is not None and previous != current:
+        revoke_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    revoke_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def audit_user_deleted(sender, instance, **kwargs):
+    log_event(Action.USER_DELETED, target_type='User', target_id=instance.pk, details={'phone': instance.phone})
+
+
+@receiver(user_logged_in)
+def audit_session_login(sender, request, user, **kwargs):
+    log_event(Action.USER_LOGIN, user=user, target=user, details={'via': 'session'})
+
+
+REFERENCE_MODELS = (Journal, JournalType, JournalCategory, Service, Soha)
+
+
+def bump_reference_stamp(sender, **kwargs):
+    bump_stamp(sender.__name__)
+
+
+for reference_model in REFERENCE_MODELS:
+    post_save.connect(bump_reference_stamp, sender=reference_model, dispatch_uid=f'reference-{reference_model.__name__}')
+    post_delete.connect(bump_reference_stamp, sender=reference_model,
+                        dispatch_uid=f'reference-delete-{reference_model.__name__}')
+
+
+@receiver(post_save, sender=User)
+def bump_managed_journals(sender, instance, created, update_fields=None, **kwargs):
+    # Journals embed their manager's profile.
+    if created or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    if Journal.objects.filter(manager=instance).exists():
+        bump_stamp(Journal.__name__)
+
+
+@receiver(post_save, sender=Journal)
+def render_journal_image_variants(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'image' in update_fields:
+        queue_variants(instance.image)
+
+
+@receiver(post_save, sender=EditorialBoardApplication)
+def render_application_photo_variants(sender, instance, created, **kwargs):
+    if created:
+        queue_variants(instance.photo_3x4)
@@ -0,0 +1,101 @@
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage, default_storage
+
+# Every blob lives under this prefix as ``blobs/ab/cd/<sha256><ext>``.
+BLOB_PREFIX = 'blobs'
+
+
+def blob_name(digest, name):
+    extension = os.path.splitext(name)[1].lower()[:16]
+    return f'{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(f'{BLOB_PREFIX}/')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores each distinct file once, named by its SHA-256. Saving content that is already
+    stored skips the write and returns the existing name, so identical uploads share one
+    blob. Blobs may be shared, so ``delete`` leaves them alone; ``backend.blobs`` counts the
+    references and removes the ones nothing points to.
+
+    Names saved before this storage was introduced keep working as plain files.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The stored name is derived from the content in _save; nothing can clash with it.
+        return name
+
+    def _save(self, name, content):
+        # Completed chunked uploads already know their hash (see backend.uploads).
+        digest = getattr(content, 'sha256', None) or self.hash_content(content)
+        name = blob_name(digest, name)
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            # Refresh the mtime so a garbage collection that has not seen the new reference yet keeps the blob.
+            os.utime(full_path)
+            if hasattr(content, 'consume'):
+                content.consume()
+            return name
+
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        if hasattr(content, 'temporary_file_path'):
+            file_move_safe(content.temporary_file_path(), full_path, allow_overwrite=True)
+        else:
+            handle, temp_path = tempfile.mkstemp(dir=directory, prefix='.incoming-')
+            try:
+                with os.fdopen(handle, 'wb') as temp_file:
+                    for chunk in content.chunks():
+                        temp_file.write(chunk)
+                # Identical bytes, so a concurrent writer of the same blob can win or lose harmlessly.
+                os.replace(temp_path, full_path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return name
+
+    @staticmethod
+    def hash_content(content):
+        hasher = hashlib.sha256()
+        for chunk in content.chunks():
+            hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def delete(self, name):
+        if not is_blob_name(name):
+            super().delete(name)
+
+    def remove_blob(self, name):
+        try:
+            os.remove(self.path(name))
+        except FileNotFoundError:
+            pass
+
+    def iter_blobs(self):
+        """Yields ``(name, full path)`` for every stored blob, including abandoned ``.incoming-`` files."""
+        root = self.path(BLOB_PREFIX)
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                full_path = os.path.join(directory, filename)
+                yield os.path.relpath(full_path, self.location).replace(os.sep, '/'), full_path
+
+
+content_addressed_storage = ContentAddressedStorage()
+
+
+def media_storage():
+    """Storage for manuscripts, certificates and journal documents (CONTENT_ADDRESSED_MEDIA)."""
+    if getattr(settings, 'CONTENT_ADDRESSED_MEDIA', True):
+        return content_addressed_storage
+    return default_storage
@@ -0,0 +1,417 @@
+"""
+Synthetic datasets for load benchmarks (see ``generate_synthetic_data`` and ``run_benchmark``).
+
+Rows are bulk inserted in batches, in one transaction and without model signals, from a
+seeded generator: the same options on an empty database produce the same data, with
+timestamps spread over the ``days`` before the run. Derived tables the signals would
+maintain (latest versions, dashboard counters, the search index, rankings, the revenue
+rollup and reference stamps) are rebuilt once the rows are committed. Files are
+referenced by name only; nothing is written to storage.
+
+Synthetic users' phone numbers start with SYNTHETIC_PHONE_PREFIX, which no real number
+does, so a benchmark can pick them out and a later run appends instead of colliding.
+"""
+import bisect
+import math
+import random
+from array import array
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+
+from .checkout import MERCHANT_PREFIXES
+from .models import (
+    Article, ArticleVersion, AuditLog, ClickTransaction, Issue, Journal, JournalCategory, JournalType, Service,
+    ServiceOrder, Soha, User,
+)
+
+SYNTHETIC_PHONE_PREFIX = '+000'
+SYNTHETIC_PASSWORD = 'synthetic'
+
+WORDS = (
+    'adaptive', 'algebra', 'analysis', 'approach', 'assessment', 'biology', 'catalyst', 'climate', 'cognitive',
+    'cotton', 'crystal', 'data', 'deep', 'demography', 'diffusion', 'digital', 'dynamics', 'ecology', 'economy',
+    'education', 'energy', 'enzyme', 'evaluation', 'evidence', 'finance', 'framework', 'genome', 'geology',
+    'governance', 'graph', 'health', 'heritage', 'hydrology', 'inference', 'irrigation', 'kinetics', 'language',
+    'learning', 'linguistics', 'logistics', 'machine', 'market', 'material', 'measurement', 'medicine', 'method',
+    'model', 'network', 'neural', 'nutrition', 'optimization', 'pedagogy', 'policy', 'polymer', 'population',
+    'quantum', 'reform', 'regional', 'reservoir', 'risk', 'semantic', 'sensor', 'signal', 'silk', 'soil',
+    'spectral', 'statistics', 'structure', 'sustainable', 'synthesis', 'system', 'textile', 'theory', 'thermal',
+    'tourism', 'transport', 'urban', 'water', 'wheat', 'yield',
+)
+FIRST_NAMES = ('Aziz', 'Dilnoza', 'Bekzod', 'Malika', 'Jasur', 'Nodira', 'Otabek', 'Shahnoza', 'Rustam', 'Gulnora',
+               'Sardor', 'Madina', 'Timur', 'Zarina', 'Anvar', 'Kamola')
+LAST_NAMES = ('Karimov', 'Rahimova', 'Yusupov', 'Tursunova', 'Aliyev', 'Saidova', 'Nazarov', 'Ismoilova',
+              'Qodirov', 'Ergasheva', 'Mirzayev', 'Hasanova')
+JOURNAL_TYPES = ('Scientific', 'Scientific-practical', 'Conference proceedings')
+JOURNAL_CATEGORIES = ('Natural sciences', 'Engineering', 'Medicine', 'Social sciences', 'Humanities', 'Agriculture')
+SOHA_NAMES = ('Physics', 'Chemistry', 'Biology', 'Economics', 'Philology', 'Pedagogy', 'History', 'Law')
+SERVICES = (
+    ('udc-classification', 'UDC classification', Decimal('30000.00')),
+    ('printed-publications', 'Printed publications', Decimal('0.00')),
+    ('translation-service', 'Translation', Decimal('120000.00')),
+    ('plagiarism-check', 'Plagiarism check', Decimal('50000.00')),
+)
+
+ARTICLE_STATUSES = (
+    (Article.ArticleStatus.PUBLISHED, 40),
+    (Article.ArticleStatus.PENDING, 15),
+    (Article.ArticleStatus.REVIEWING, 15),
+    (Article.ArticleStatus.ACCEPTED, 12),
+    (Article.ArticleStatus.REJECTED, 10),
+    (Article.ArticleStatus.NEEDS_REVISION, 8),
+)
+TRANSACTION_STATUSES = (
+    (ClickTransaction.Status.COMPLETED, 75),
+    (ClickTransaction.Status.WAITING, 10),
+    (ClickTransaction.Status.PREPARED, 5),
+    (ClickTransaction.Status.ERROR, 5),
+    (ClickTransaction.Status.CANCELLED, 5),
+)
+ORDER_STATUSES = (
+    (ServiceOrder.Status.COMPLETED, 35),
+    (ServiceOrder.Status.IN_PROGRESS, 20),
+    (ServiceOrder.Status.PENDING_PAYMENT, 15),
+    (ServiceOrder.Status.UDC_ASSIGNED, 10),
+    (ServiceOrder.Status.PRINTING, 8),
+    (ServiceOrder.Status.SHIPPED, 7),
+    (ServiceOrder.Status.CANCELLED, 5),
+)
+AUDIT_ACTIONS = (
+    (AuditLog.AuditActionType.USER_LOGIN, 50),
+    (AuditLog.AuditActionType.ARTICLE_STATUS_CHANGED, 20),
+    (AuditLog.AuditActionType.ARTICLE_SUBMITTED, 15),
+    (AuditLog.AuditActionType.PAYMENT_APPROVED, 8),
+    (AuditLog.AuditActionType.USER_UPDATED, 5),
+    (AuditLog.AuditActionType.USER_CREATED, 2),
+)
+
+
+def default_sizes(articles):
+    """Row counts in the proportions of the production data, scaled to ``articles``."""
+    return {
+        'articles': articles,
+        'users': max(articles // 20, 50),
+        'journals': max(min(articles // 2500, 200), 5),
+        'transactions': articles // 2,
+        'service_orders': articles // 5,
+        'audit_logs': articles * 2,
+    }
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Lets the inserts keep the values set on ``auto_now``/``auto_now_add`` fields."""
+    fields = [field for model in models for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Generator:
+    def __init__(self, sizes, seed=0, days=3 * 365, batch_size=5000, log=None):
+        self.sizes = sizes
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.end = timezone.now().replace(microsecond=0)
+        self.start = self.end - timedelta(days=days)
+        self.password = make_password(SYNTHETIC_PASSWORD)
+        self.users = {}
+        # Ids as compact arrays: a million rows stay a few megabytes.
+        self.article_ids = array('q')
+        self.order_ids = array('q')
+
+    def choice(self, weighted):
+        values, weights = zip(*weighted)
+        return self.random.choices(values, weights)[0]
+
+    def moment(self, position, total):
+        """A time ``position``/``total`` of the way through the period, with jitter; ids grow with time."""
+        span = (self.end - self.start).total_seconds()
+        offset = span * (position + self.random.random()) / max(total, 1)
+        return self.start + timedelta(seconds=min(offset, span))
+
+    def words(self, count):
+        return ' '.join(self.random.choice(WORDS) for _ in range(count))
+
+    def insert(self, model, rows):
+        """Bulk inserts ``rows`` in batches; returns the saved objects with their ids."""
+        saved = []
+        for begin in range(0, len(rows), self.batch_size):
+            created = model.objects.bulk_create(rows[begin:begin + self.batch_size])
+            if created and created[0].pk is None:
+                # Backends that cannot return ids: this process is the only writer.
+                ids = model.objects.order_by('-pk').values_list('pk', flat=True)[:len(created)]
+                for obj, pk in zip(created, reversed(list(ids))):
+                    obj.pk = pk
+            saved.extend(created)
+        return saved
+
+    def stream(self, model, total, build):
+        """Inserts ``total`` rows made by ``build(position)`` without holding them all; yields each saved row."""
+        for begin in range(0, total, self.batch_size):
+            rows = [build(position) for position in range(begin, min(begin + self.batch_size, total))]
+            yield from self.insert(model, rows)
+            self.log(f"{model.__name__}: {min(begin + self.batch_size, total)}/{total}")
+
+    def generate(self):
+        with explicit_timestamps(Article, ArticleVersion, ClickTransaction, Issue, ServiceOrder):
+            self.make_reference_data()
+            self.make_users()
+            self.make_journals()
+            self.make_articles()
+            self.make_service_orders()
+            self.make_transactions()
+            self.make_audit_logs()
+
+    def make_reference_data(self):
+        self.journal_types = [JournalType.objects.get_or_create(name=name)[0] for name in JOURNAL_TYPES]
+        self.categories = [JournalCategory.objects.get_or_create(name=name)[0] for name in JOURNAL_CATEGORIES]
+        for name in SOHA_NAMES:
+            Soha.objects.get_or_create(name=name)
+        self.services = [
+            Service.objects.get_or_create(slug=slug, defaults={'name': name, 'price': price})[0]
+            for slug, name, price in SERVICES
+        ]
+
+    def make_users(self):
+        total = self.sizes['users']
+        journals = self.sizes['journals']
+        roles = [(User.Role.ADMIN, 3), (User.Role.ACCOUNTANT, 2), (User.Role.JOURNAL_MANAGER, max(journals // 2, 1)),
+                 (User.Role.WRITER, max(total // 30, 2))]
+        roles.append((User.Role.CLIENT, max(total - sum(count for _, count in roles), 1)))
+        first = User.objects.filter(phone__startswith=SYNTHETIC_PHONE_PREFIX).count()
+        rows = []
+        for role, count in roles:
+            for _ in range(count):
+                number = first + len(rows)
+                rows.append(User(
+                    phone=f"{SYNTHETIC_PHONE_PREFIX}{number:011d}",
+                    name=self.random.choice(FIRST_NAMES),
+                    surname=self.random.choice(LAST_NAMES),
+                    role=role,
+                    language=self.random.choice(User.Language.values),
+                    password=self.password,
+                    is_staff=role == User.Role.ADMIN,
+                    date_joined=self.moment(number - first, total),
+                ))
+        for user in self.insert(User, rows):
+            self.users.setdefault(user.role, []).append(user.pk)
+        self.log(f"User: {len(rows)}")
+
+    def make_journals(self):
+        managers = self.users[User.Role.JOURNAL_MANAGER]
+        rows = []
+        for position in range(self.sizes['journals']):
+            rows.append(Journal(
+                journal_type=self.random.choice(self.journal_types),
+                category=self.random.choice(self.categories),
+                name=f"{self.words(2).title()} Journal {position + 1}",
+                description=self.words(40),
+                manager_id=managers[position % len(managers)],
+                issn=f"{self.random.randint(1000, 9999)}-{self.random.randint(1000, 9999)}",
+                publisher=self.random.choice(LAST_NAMES) + ' Press',
+                partner_price=Decimal(self.random.choice((30000, 50000, 70000))),
+                regular_price=Decimal(self.random.choice((80000, 100000, 150000))),
+            ))
+        self.journals = self.insert(Journal, rows)
+
+        # A quarterly issue per journal over the whole period.
+        quarters = max(math.ceil((self.end - self.start).days / 91), 1)
+        rows = []
+        for journal in self.journals:
+            for quarter in range(quarters):
+                published = (self.start + timedelta(days=91 * (quarter + 1))).date()
+                rows.append(Issue(
+                    journal=journal, issueNumber=f"{published.year}-{quarter % 4 + 1}", publicationDate=published,
+                    isPublished=published <= self.end.date(), createdAt=self.start + timedelta(days=91 * quarter),
+                ))
+        self.issues = {}
+        for issue in self.insert(Issue, rows):
+            self.issues.setdefault(issue.journal_id, []).append((issue.publicationDate, issue.pk))
+        self.log(f"Journal: {len(self.journals)}, Issue: {len(rows)}")
+
+    def build_article(self, position):
+        total = self.sizes['articles']
+        authors = self.users[User.Role.WRITER] if self.random.random() < 0.1 else self.users[User.Role.CLIENT]
+        journal = self.random.choice(self.journals)
+        status = self.choice(ARTICLE_STATUSES)
+        paid = status != Article.ArticleStatus.PENDING or self.random.random() < 0.5
+        submitted = self.moment(position, total)
+        article = Article(
+            title=self.words(self.random.randint(4, 10)).capitalize(),
+            author_id=self.random.choice(authors),
+            category=self.random.choice(SOHA_NAMES),
+            udk=f"{self.random.randint(1, 999)}.{self.random.randint(1, 99)}",
+            journal=journal,
+            submittedDate=submitted,
+            status=status,
+            submissionPaymentStatus=(Article.PaymentStatus.PAYMENT_COMPLETED if paid
+                                     else Article.PaymentStatus.PAYMENT_PENDING),
+            title_en=self.words(6).capitalize(),
+            abstract_en=self.words(self.random.randint(60, 150)),
+            keywords_en=', '.join(self.random.sample(WORDS, 5)),
+            assignedEditor_id=journal.manager_id,
+            submission_fee=journal.regular_price if paid else 0,
+        )
+        if status == Article.ArticleStatus.PUBLISHED:
+            published = (submitted + timedelta(days=self.random.randint(20, 120))).date()
+            issues = self.issues[journal.pk]
+            index = min(bisect.bisect_left(issues, (published, 0)), len(issues) - 1)
+            article.publicationDate = published
+            article.issue_id = issues[index][1]
+            article.publication_fee = Decimal(self.random.choice((0, 50000, 100000)))
+            # Heavy-tailed, like real readership: most articles are barely read, a few are popular.
+            article.viewCount = int(self.random.paretovariate(1.2) * 20)
+            article.downloadCount = article.viewCount // self.random.randint(2, 6)
+            article.citationCount = int(self.random.paretovariate(1.5)) - 1
+        return article
+
+    def make_articles(self):
+        versions = []
+        for article in self.stream(Article, self.sizes['articles'], self.build_article):
+            self.article_ids.append(article.pk)
+            for number in range(1, 2 + (self.random.random() < 0.4) + (self.random.random() < 0.15)):
+                versions.append(ArticleVersion(
+                    article_id=article.pk, versionNumber=number,
+                    file=f"article_versions/synthetic/{article.pk}_v{number}.pdf",
+                    submittedDate=article.submittedDate + timedelta(days=14 * (number - 1)),
+                    submitter_id=article.author_id,
+                ))
+            if len(versions) >= self.batch_size:
+                self.insert(ArticleVersion, versions)
+                versions = []
+        self.insert(ArticleVersion, versions)
+
+    def build_order(self, position):
+        service = self.random.choice(self.services)
+        status = self.choice(ORDER_STATUSES)
+        created = self.moment(position, self.sizes['service_orders'])
+        order = ServiceOrder(
+            user_id=self.random.choice(self.users[User.Role.CLIENT]),
+            service=service,
+            status=status,
+            form_data={'comment': self.words(8)},
+            calculated_price=service.price,
+            created_at=created,
+            updated_at=created + timedelta(days=self.random.randint(0, 20)),
+        )
+        if service.slug == 'printed-publications':
+            order.form_data.update(bookPages=self.random.randint(40, 400), quantity=self.random.randint(1, 50),
+                                   coverType=self.random.choice(('soft', 'hard')))
+            order.calculated_price = Decimal(order.form_data['bookPages'] * 400 * order.form_data['quantity'])
+            if status == ServiceOrder.Status.SHIPPED:
+                order.tracking_number = f"SYN{position:09d}"
+                order.shipped_date = order.updated_at
+        if service.slug == 'udc-classification' and status in (ServiceOrder.Status.UDC_ASSIGNED,
+                                                               ServiceOrder.Status.COMPLETED):
+            order.udc_code = f"{self.random.randint(1, 999)}.{self.random.randint(1, 99)}"
+            order.assigned_writer_id = self.random.choice(self.users[User.Role.WRITER])
+        return order
+
+    def make_service_orders(self):
+        for order in self.stream(ServiceOrder, self.sizes['service_orders'], self.build_order):
+            self.order_ids.append(order.pk)
+
+    def build_transaction(self, position):
+        if self.order_ids and self.random.random() < 0.3:
+            model, object_id = ServiceOrder, self.random.choice(self.order_ids)
+        else:
+            model, object_id = Article, self.random.choice(self.article_ids)
+        status = self.choice(TRANSACTION_STATUSES)
+        created = self.moment(position, self.sizes['transactions'])
+        # From the seeded generator rather than uuid4, so reruns produce the same ids; the object
+        # id (new on every run) keeps them unique when the same seed is used again.
+        trans_id = f"{MERCHANT_PREFIXES[model]}_{object_id}_{self.random.getrandbits(64):016x}"
+        return ClickTransaction(
+            user_id=self.random.choice(self.users[User.Role.CLIENT]),
+            merchant_trans_id=trans_id,
+            click_trans_id=f"synthetic_{trans_id}" if status == ClickTransaction.Status.COMPLETED else None,
+            amount=Decimal(self.random.choice((30000, 50000, 80000, 100000, 150000))),
+            status=status,
+            content_type=self.content_types[model],
+            object_id=object_id,
+            created_at=created,
+            updated_at=created,
+            completed_at=created + timedelta(minutes=2) if status == ClickTransaction.Status.COMPLETED else None,
+        )
+
+    def make_transactions(self):
+        if not self.article_ids:
+            return
+        self.content_types = ContentType.objects.get_for_models(Article, ServiceOrder)
+        for _ in self.stream(ClickTransaction, self.sizes['transactions'], self.build_transaction):
+            pass
+
+    def build_audit_log(self, position):
+        action = self.choice(AUDIT_ACTIONS)
+        role = self.choice(((User.Role.CLIENT, 80), (User.Role.JOURNAL_MANAGER, 10), (User.Role.ADMIN, 5),
+                            (User.Role.WRITER, 5)))
+        user_id = self.random.choice(self.users[role])
+        entry = AuditLog(user_id=user_id, actionType=action, timestamp=self.moment(position, self.sizes['audit_logs']))
+        if action.startswith('ARTICLE') and self.article_ids:
+            entry.targetEntityType, entry.targetEntityId = 'Article', self.random.choice(self.article_ids)
+            if action == AuditLog.AuditActionType.ARTICLE_STATUS_CHANGED:
+                entry.details = {'old_status': 'pending', 'new_status': self.choice(ARTICLE_STATUSES)}
+        else:
+            entry.targetEntityType, entry.targetEntityId = 'User', user_id
+            if action == AuditLog.AuditActionType.USER_LOGIN:
+                entry.details = {'ip': f"10.{position % 256}.{position // 256 % 256}.{self.random.randint(1, 254)}"}
+        return entry
+
+    def make_audit_logs(self):
+        for _ in self.stream(AuditLog, self.sizes['audit_logs'], self.build_audit_log):
+            pass
+
+
+def rebuild_derived(log=None):
+    """Recomputes what the model signals would have maintained for bulk-inserted rows."""
+    from .dashboard import rebuild_counters
+    from .rankings import rebuild_rankings
+    from .reference import bump_stamp
+    from .revenue import rebuild_rollup
+    from .search import rebuild_index
+    from .signals import REFERENCE_MODELS
+    from .versions import sync_latest_versions
+
+    log = log or (lambda message: None)
+    sync_latest_versions()
+    log("Synced latest article versions.")
+    log(f"Rebuilt {rebuild_counters()} dashboard counter buckets.")
+    log(f"Indexed {rebuild_index()} articles.")
+    log(f"Rebuilt {rebuild_rankings()} ranking boards.")
+    log(f"Wrote {rebuild_rollup(full=True)} revenue rollup rows.")
+    for model in REFERENCE_MODELS:
+        bump_stamp(model.__name__)
+
+
+def generate_dataset(sizes, seed=0, days=3 * 365, batch_size=5000, derived=True, log=None):
+    """
+    Inserts a synthetic dataset of ``sizes`` (see ``default_sizes``) in one transaction, so
+    a failed run leaves nothing behind; returns the row counts inserted.
+    """
+    generator = Generator(sizes, seed=seed, days=days, batch_size=batch_size, log=log)
+    with transaction.atomic():
+        generator.generate()
+    if derived:
+        rebuild_derived(log)
+    return {
+        'users': sum(len(ids) for ids in generator.users.values()),
+        'journals': len(generator.journals),
+        'articles': len(generator.article_ids),
+        'service_orders': len(generator.order_ids),
+        'transactions': sizes['transactions'] if generator.article_ids else 0,
+        'audit_logs': sizes['audit_logs'],
+    }
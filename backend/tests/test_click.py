@@ -0,0 +1,165 @@
+import hashlib
+from decimal import Decimal
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from backend import click_views
+from backend.checkout import PayableItem, checkout
+from backend.dashboard import get_dashboard_summary, rebuild_counters
+from backend.models import (
+    Article, ClickTransaction, Journal, JournalType, RevenueRollup, Service, ServiceOrder, User,
+)
+
+SECRET = 'click-test-secret'
+
+
+@override_settings(CLICK_SECRET_KEY=SECRET, CLICK_SERVICE_ID=1, CLICK_MERCHANT_USER_ID=2)
+class ClickCallbackTests(APITestCase):
+    """
+    CLICK retries and reorders callbacks: a payment is booked once however often its
+    complete callback arrives, and nothing that arrives after it can undo it.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user('+10000000001', 'Click', 'Client', 'pw', role=User.Role.CLIENT)
+        cls.admin = User.objects.create_user('+10000000002', 'Click', 'Admin', 'pw', role=User.Role.ADMIN)
+        journal_type = JournalType.objects.create(name='Click type')
+        cls.journal = Journal.objects.create(journal_type=journal_type, name='Click journal', description='d',
+                                             regular_price=Decimal('50000.00'))
+        cls.service = Service.objects.create(name='Printed', slug='printed-publications')
+
+    def pay_for_article(self):
+        article = Article(title='Paid article', author=self.client_user, journal=self.journal,
+                          status=Article.ArticleStatus.PENDING,
+                          submissionPaymentStatus=Article.PaymentStatus.PAYMENT_PENDING)
+        click, _ = checkout(self.client_user, [PayableItem(article, self.journal.regular_price)])
+        return article, click
+
+    def prepare(self, click, amount=None, click_trans_id='1001'):
+        data = {
+            'click_trans_id': click_trans_id, 'service_id': '1', 'merchant_trans_id': click.merchant_trans_id,
+            'amount': str(click.amount if amount is None else amount), 'action': '0', 'sign_time': '2024-01-01',
+        }
+        data['sign_string'] = self.sign(data, 'click_trans_id', 'service_id', 'merchant_trans_id', 'amount',
+                                        'action', 'sign_time')
+        return self.client.post(reverse('click-prepare'), data).data
+
+    def complete(self, click, amount=None, error='0', click_trans_id='1001'):
+        data = {
+            'click_trans_id': click_trans_id, 'service_id': '1', 'merchant_trans_id': click.merchant_trans_id,
+            'merchant_prepare_id': str(click.pk), 'amount': str(click.amount if amount is None else amount),
+            'action': '1', 'error': error, 'sign_time': '2024-01-01',
+        }
+        data['sign_string'] = self.sign(data, 'click_trans_id', 'service_id', 'merchant_trans_id',
+                                        'merchant_prepare_id', 'amount', 'action', 'sign_time')
+        return self.client.post(reverse('click-complete'), data).data
+
+    @staticmethod
+    def sign(data, *fields):
+        values = [data[field] for field in fields]
+        values.insert(2, SECRET)
+        return hashlib.md5(''.join(values).encode()).hexdigest()
+
+    def booked(self):
+        return [(row.source_type, row.amount, row.transaction_count) for row in RevenueRollup.objects.all()]
+
+    def assertCountersConsistent(self):
+        kept = get_dashboard_summary(self.admin)
+        rebuild_counters()
+        self.assertEqual(kept, get_dashboard_summary(self.admin))
+
+    def test_repeated_complete_books_revenue_once(self):
+        article, click = self.pay_for_article()
+        self.assertEqual(self.prepare(click)['error'], 0)
+        self.assertEqual(self.prepare(click)['error'], 0, 'a retried prepare gets the same answer')
+
+        self.assertEqual(self.complete(click)['error'], 0)
+        self.assertEqual(self.complete(click)['error'], -4)
+
+        click.refresh_from_db()
+        article.refresh_from_db()
+        self.assertEqual(click.status, ClickTransaction.Status.COMPLETED)
+        self.assertEqual(article.status, Article.ArticleStatus.REVIEWING)
+        self.assertEqual(article.submissionPaymentStatus, Article.PaymentStatus.PAYMENT_COMPLETED)
+        self.assertEqual(self.booked(), [(RevenueRollup.SourceType.ARTICLE_SUBMISSION, click.amount, 1)])
+        self.assertCountersConsistent()
+
+    def test_repeated_complete_of_a_checkout_books_every_line_once(self):
+        orders = [ServiceOrder(user=self.client_user, service=self.service, form_data={'bookPages': pages})
+                  for pages in (10, 20)]
+        click, _ = checkout(self.client_user, [PayableItem(order, Decimal('4000.00')) for order in orders])
+        self.prepare(click)
+
+        self.assertEqual(self.complete(click)['error'], 0)
+        self.assertEqual(self.complete(click)['error'], -4)
+
+        self.assertEqual(self.booked(), [(RevenueRollup.SourceType.SERVICE_ORDER, Decimal('8000.00'), 2)])
+        self.assertEqual(set(ServiceOrder.objects.values_list('status', flat=True)),
+                         {ServiceOrder.Status.IN_PROGRESS})
+
+    def test_amount_mismatch_is_refused(self):
+        article, click = self.pay_for_article()
+        self.assertEqual(self.prepare(click, amount='1.00')['error'], -2)
+        click.refresh_from_db()
+        self.assertEqual(click.status, ClickTransaction.Status.WAITING)
+
+        self.prepare(click)
+        self.assertEqual(self.complete(click, amount='1.00')['error'], -2)
+
+        click.refresh_from_db()
+        article.refresh_from_db()
+        self.assertEqual(click.status, ClickTransaction.Status.PREPARED)
+        self.assertEqual(article.status, Article.ArticleStatus.PENDING)
+        self.assertEqual(self.booked(), [])
+
+    def test_cancel_after_success_keeps_the_payment(self):
+        article, click = self.pay_for_article()
+        self.prepare(click)
+        self.assertEqual(self.complete(click)['error'], 0)
+
+        for error in ('-5017', '-9'):
+            self.assertEqual(self.complete(click, error=error)['error'], -4)
+
+        click.refresh_from_db()
+        article.refresh_from_db()
+        self.assertEqual(click.status, ClickTransaction.Status.COMPLETED)
+        self.assertEqual(article.status, Article.ArticleStatus.REVIEWING)
+        self.assertEqual(self.booked(), [(RevenueRollup.SourceType.ARTICLE_SUBMISSION, click.amount, 1)])
+
+    def test_success_after_cancel_is_refused(self):
+        article, click = self.pay_for_article()
+        self.prepare(click)
+        self.assertEqual(self.complete(click, error='-5017')['error'], -9)
+        self.assertEqual(self.complete(click, error='-5017')['error'], -9, 'a retried cancel gets the same answer')
+
+        self.assertEqual(self.complete(click)['error'], -9)
+        click.refresh_from_db()
+        self.assertEqual(click.status, ClickTransaction.Status.CANCELLED)
+        self.assertEqual(self.booked(), [])
+
+    def test_article_changed_while_payment_is_applied(self):
+        article, click = self.pay_for_article()
+        self.prepare(click)
+        read_state = click_views.state_from_values
+        calls = []
+
+        def edited_in_between(values):
+            # An editor saves the article between the payment's read and its compare-and-set UPDATE.
+            if not calls:
+                Article.objects.filter(pk=article.pk).update(managerNotes='edited',
+                                                            status=Article.ArticleStatus.NEEDS_REVISION)
+            calls.append(values)
+            return read_state(values)
+
+        with mock.patch.object(click_views, 'state_from_values', edited_in_between):
+            self.assertEqual(self.complete(click)['error'], 0)
+
+        self.assertEqual(len(calls), 2, 'the first UPDATE lost to the edit and was retried')
+        article.refresh_from_db()
+        self.assertEqual(article.status, Article.ArticleStatus.REVIEWING)
+        self.assertEqual(article.managerNotes, 'edited')
+        self.assertEqual(self.booked(), [(RevenueRollup.SourceType.ARTICLE_SUBMISSION, click.amount, 1)])
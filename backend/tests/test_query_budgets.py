@@ -0,0 +1,127 @@
+from datetime import date
+
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from backend import authentication, rankings, reference
+from backend.authentication import ClaimsRefreshToken
+from backend.dashboard import rebuild_counters
+from backend.instrumentation import QUERY_BUDGETS, get_budget
+from backend.models import (
+    Article, ArticleVersion, AuditLog, EditorialBoardApplication, Issue, Journal, JournalType, Service, ServiceOrder,
+    User,
+)
+from backend.rankings import rebuild_rankings
+from backend.search import rebuild_index
+
+# URL name: (role, the fixture its URL takes or None, query string).
+ENDPOINTS = {
+    'article-list': (User.Role.ADMIN, None, 'page_size=50'),
+    'article-detail': (User.Role.ADMIN, 'article', ''),
+    'writer-article-list': (User.Role.WRITER, None, 'page_size=50'),
+    'issue-list': (User.Role.ADMIN, None, ''),
+    'issue-detail': (User.Role.ADMIN, 'issue', ''),
+    'journal-list': (User.Role.CLIENT, None, ''),
+    'journal-detail': (User.Role.CLIENT, 'journal', ''),
+    'dashboard-summary': (User.Role.ADMIN, None, ''),
+    'writer-dashboard-summary': (User.Role.WRITER, None, ''),
+    'article-search': (None, None, 'q=budget'),
+    'rankings': (None, None, 'board=articles_by_views'),
+    'auditlog-list': (User.Role.ADMIN, None, 'page_size=50'),
+    'application-list': (User.Role.ADMIN, None, ''),
+    'printed-publications-list': (User.Role.ADMIN, None, 'page_size=50'),
+    'user-list': (User.Role.ADMIN, None, ''),
+}
+
+
+class QueryBudgetTests(APITestCase):
+    """
+    Every endpoint in QUERY_BUDGETS stays within its budget, and issues the same number of
+    queries for a few rows as for many, so an N+1 regression fails here.
+    """
+    few = 3
+    many = 30
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            role: User.objects.create_user(f'+10000000{index:02d}', 'Budget', role.label, 'pw', role=role)
+            for index, role in enumerate(User.Role)
+        }
+        journal_type = JournalType.objects.create(name='Budget type')
+        cls.journal = Journal.objects.create(
+            journal_type=journal_type, name='Budget journal', description='d',
+            manager=cls.users[User.Role.JOURNAL_MANAGER],
+        )
+        cls.issue = Issue.objects.create(journal=cls.journal, issueNumber='1', publicationDate=date(2024, 1, 1))
+        cls.service = Service.objects.create(name='Printed', slug='printed-publications')
+        cls.rows = 0
+
+    def add_rows(self, count):
+        """``count`` more of everything the budgeted endpoints list."""
+        for _ in range(count):
+            self.rows += 1
+            number = self.rows
+            author = User.objects.create_user(f'+20000000{number:03d}', 'Author', str(number))
+            for owner in (author, self.users[User.Role.WRITER]):
+                article = Article.objects.create(
+                    title=f'Budget article {number}', author=owner, journal=self.journal, issue=self.issue,
+                    status=Article.ArticleStatus.PUBLISHED, viewCount=number,
+                    submissionPaymentStatus=Article.PaymentStatus.PAYMENT_COMPLETED,
+                )
+                for version in (1, 2):
+                    ArticleVersion.objects.create(article=article, versionNumber=version,
+                                                  file=f'article_versions/{number}_{version}.pdf', submitter=owner)
+            Journal.objects.create(journal_type=self.journal.journal_type, name=f'Journal {number}',
+                                   description='d', manager=author)
+            AuditLog.objects.create(user=author, actionType=AuditLog.AuditActionType.USER_LOGIN)
+            EditorialBoardApplication.objects.create(
+                user=author, passport_file='applications/p.pdf', photo_3x4='applications/photo.jpg',
+                diploma_file='applications/d.pdf',
+            )
+            ServiceOrder.objects.create(user=author, service=self.service, form_data={'bookPages': number})
+        rebuild_index()
+        rebuild_rankings()
+        rebuild_counters()
+
+    def clear_caches(self):
+        # Measured cold: a cached response would hide the queries of the code path being checked.
+        caches['default'].clear()
+        reference._bodies.clear()
+        rankings._cache.clear()
+        authentication._versions.clear()
+
+    def count_queries(self, name):
+        role, fixture, query = ENDPOINTS[name]
+        args = [getattr(self, fixture).pk] if fixture else []
+        url = reverse(name, args=args) + (f'?{query}' if query else '')
+        self.client.credentials()
+        if role is not None:
+            token = ClaimsRefreshToken.for_user(self.users[role]).access_token
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.clear_caches()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, f'{name}: {response.content[:200]}')
+        return len(queries)
+
+    def test_every_budget_has_an_endpoint_test(self):
+        self.assertEqual(set(QUERY_BUDGETS), set(ENDPOINTS))
+
+    def test_queries_within_budget_and_constant(self):
+        self.add_rows(self.few)
+        self.article = Article.objects.order_by('pk').first()
+        few = {name: self.count_queries(name) for name in ENDPOINTS}
+        self.add_rows(self.many - self.few)
+        many = {name: self.count_queries(name) for name in ENDPOINTS}
+
+        for name in ENDPOINTS:
+            with self.subTest(endpoint=name):
+                self.assertLessEqual(many[name], get_budget(name),
+                                     f'{name} issued {many[name]} queries, over its budget of {get_budget(name)}')
+                self.assertEqual(many[name], few[name],
+                                 f'{name} issued {few[name]} queries for {self.few} rows and {many[name]} for '
+                                 f'{self.many}')
@@ -0,0 +1,98 @@
+"""
+Plain-text extraction from uploaded manuscripts. Uses only the standard library (plus
+pypdf for PDFs when it is installed) and no Django, so it can run in worker processes.
+"""
+import os
+import re
+import unicodedata
+import zipfile
+from xml.etree import ElementTree
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # PDFs then extract as empty text
+    PdfReader = None
+
+PLAIN_TEXT_EXTENSIONS = ('.txt', '.md', '.tex', '.csv')
+# Paragraph-level elements of Word (``w:p``) and OpenDocument (``text:p``/``text:h``) files.
+PARAGRAPH_TAGS = {
+    '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}p',
+    '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}p',
+    '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}h',
+}
+ZIP_DOCUMENTS = {'.docx': 'word/document.xml', '.odt': 'content.xml'}
+# Where Word and OpenDocument files record the page count of their last layout.
+DOCX_PAGES_TAG = '{http://schemas.openxmlformats.org/officeDocument/2006/extended-properties}Pages'
+ODT_STATISTIC_TAG = '{urn:oasis:names:tc:opendocument:xmlns:meta:1.0}document-statistic'
+ODT_PAGE_COUNT_ATTRIBUTE = '{urn:oasis:names:tc:opendocument:xmlns:meta:1.0}page-count'
+WHITESPACE_RE = re.compile(r'[^\S\n]+')
+BLANK_LINES_RE = re.compile(r'\n{3,}')
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def extract_document(path, name=None):
+    """
+    ``(normalized text, page count or None, word count)`` of the file at ``path``;
+    ``name`` (default: the path) decides the format.
+    """
+    extension = os.path.splitext(name or path)[1].lower()
+    pages = None
+    if extension in PLAIN_TEXT_EXTENSIONS:
+        with open(path, 'rb') as handle:
+            text = handle.read().decode('utf-8', errors='ignore')
+    elif extension in ZIP_DOCUMENTS:
+        text, pages = zip_document(path, extension)
+    elif extension == '.pdf' and PdfReader is not None:
+        text, pages = pdf_document(path)
+    else:
+        text = ''
+    text = normalize_text(text)
+    return text, pages, len(WORD_RE.findall(text))
+
+
+def normalize_text(text):
+    text = unicodedata.normalize('NFKC', text).replace('\r\n', '\n').replace('\r', '\n')
+    lines = (WHITESPACE_RE.sub(' ', line).strip() for line in text.split('\n'))
+    return BLANK_LINES_RE.sub('\n\n', '\n'.join(lines)).strip()
+
+
+def zip_document(path, extension):
+    try:
+        with zipfile.ZipFile(path) as archive:
+            with archive.open(ZIP_DOCUMENTS[extension]) as handle:
+                paragraphs = []
+                # iterparse keeps memory flat on long documents: each paragraph is dropped once read.
+                for _, element in ElementTree.iterparse(handle):
+                    if element.tag in PARAGRAPH_TAGS:
+                        paragraphs.append(''.join(element.itertext()))
+                        element.clear()
+            pages = zip_page_count(archive, extension)
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError):
+        return '', None
+    return '\n'.join(paragraphs), pages
+
+
+def zip_page_count(archive, extension):
+    member = 'docProps/app.xml' if extension == '.docx' else 'meta.xml'
+    try:
+        root = ElementTree.fromstring(archive.read(member))
+    except (KeyError, ElementTree.ParseError):
+        return None
+    if extension == '.docx':
+        value = root.findtext(DOCX_PAGES_TAG)
+    else:
+        statistic = root.find(f'.//{ODT_STATISTIC_TAG}')
+        value = statistic.get(ODT_PAGE_COUNT_ATTRIBUTE) if statistic is not None else None
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def pdf_document(path):
+    try:
+        reader = PdfReader(path)
+        return '\n'.join(page.extract_text() or '' for page in reader.pages), len(reader.pages)
+    except Exception:
+        # Damaged or encrypted PDFs are common uploads; treat them as having no text.
+        return '', None
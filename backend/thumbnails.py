@@ -0,0 +1,35 @@
+"""
+Resizing for image variants. Pillow only, no Django, so it can run in the document process pool.
+"""
+from PIL import Image, ImageOps
+
+SAVE_OPTIONS = {
+    'WEBP': {'quality': 80, 'method': 6},
+    'JPEG': {'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+
+def make_thumbnail(source_path, output_path, size, image_format):
+    """
+    Writes the image at ``source_path`` scaled down to fit ``size`` (never up) to
+    ``output_path`` as ``image_format`` ('WEBP' or 'JPEG'); returns the new dimensions.
+    """
+    with Image.open(source_path) as image:
+        # JPEGs can be decoded at a fraction of their size, which saves most of the work on large photos.
+        image.draft('RGB', size)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = flatten(image)
+        elif image.mode not in ('RGB', 'RGBA', 'L'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+        image.save(output_path, image_format, **SAVE_OPTIONS[image_format])
+        return image.size
+
+
+def flatten(image):
+    """The image on a white background, for formats without transparency."""
+    image = image.convert('RGBA')
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
@@ -0,0 +1,235 @@
+import fcntl
+import hashlib
+import os
+import re
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from .caching import TTLCache
+from .extraction import queue_extraction
+from .models import UploadSession
+
+READ_BLOCK_SIZE = 64 * 1024
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+# session id -> (offset, sha256 of the bytes before it). Chunks arriving in order on the
+# same worker extend the hash; any other worker rebuilds it once from the partial file.
+_hashers = TTLCache(maxsize=256, ttl=3600)
+
+
+class OffsetMismatch(Exception):
+    """The chunk does not start where the session's data ends; the client resumes from ``offset``."""
+
+    def __init__(self, offset):
+        super().__init__(f"Expected a chunk starting at byte {offset}.")
+        self.offset = offset
+
+
+class IncompleteChunk(Exception):
+    """The request body ended before the announced number of bytes arrived."""
+
+
+def upload_dir():
+    default = os.path.join(str(getattr(settings, 'BASE_DIR', os.getcwd())), 'upload_sessions')
+    return getattr(settings, 'UPLOAD_SESSION_DIR', default)
+
+
+def max_upload_size():
+    return getattr(settings, 'UPLOAD_MAX_SIZE', 500 * 1024 * 1024)
+
+
+def max_chunk_size():
+    return getattr(settings, 'UPLOAD_MAX_CHUNK_SIZE', 16 * 1024 * 1024)
+
+
+def session_path(session):
+    return os.path.join(upload_dir(), f'{session.pk.hex}.part')
+
+
+def parse_content_range(value):
+    """``bytes <first>-<last>/<size>`` -> ``(first, last, size)``; raises ValueError when malformed."""
+    match = CONTENT_RANGE_RE.match((value or '').strip())
+    if not match:
+        raise ValueError("Content-Range must look like 'bytes <first>-<last>/<size>'.")
+    first, last, size = (int(part) for part in match.groups())
+    if last < first or last >= size:
+        raise ValueError("Content-Range is out of bounds.")
+    return first, last, size
+
+
+def start_upload(session):
+    os.makedirs(upload_dir(), exist_ok=True)
+    open(session_path(session), 'wb').close()
+    _hashers.set(session.pk, (0, hashlib.sha256()))
+
+
+def hash_state(session):
+    """A sha256 object fed with the session's first ``offset`` bytes."""
+    cached = _hashers.get(session.pk)
+    if cached is not None and cached[0] == session.offset:
+        return cached[1].copy()
+    hasher = hashlib.sha256()
+    remaining = session.offset
+    with open(session_path(session), 'rb') as handle:
+        while remaining:
+            block = handle.read(min(READ_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+@contextmanager
+def locked_partial_file(session):
+    """The session's partial file open for writing, with an exclusive lock: its writers take turns."""
+    with open(session_path(session), 'r+b') as handle:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield handle
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def write_chunk(session, first, stream, length):
+    """
+    Streams ``length`` bytes from ``stream`` into the partial file at ``first`` and moves
+    the session's offset past them; the last chunk also records the file's sha256.
+
+    Writers of a session hold a lock on its partial file from before they check the offset
+    until the offset has moved, so of two requests racing for the same range the second
+    one sees the new offset and gets OffsetMismatch without touching the file.
+    """
+    if session.status != UploadSession.Status.ACTIVE or first != session.offset:
+        raise OffsetMismatch(session.offset)
+    with locked_partial_file(session) as handle:
+        # Another request may have moved the session on while this one waited for the lock.
+        session.refresh_from_db(fields=['offset', 'status', 'sha256'])
+        if session.status != UploadSession.Status.ACTIVE or first != session.offset:
+            raise OffsetMismatch(session.offset)
+        hasher = hash_state(session)
+        written = 0
+        handle.seek(first)
+        while written < length:
+            block = stream.read(min(READ_BLOCK_SIZE, length - written))
+            if not block:
+                break
+            handle.write(block)
+            hasher.update(block)
+            written += len(block)
+        if written != length:
+            raise IncompleteChunk(f"Received {written} of {length} bytes.")
+        end = first + length
+        changes = {'offset': end, 'updated_at': timezone.now()}
+        if end == session.size:
+            changes.update(status=UploadSession.Status.COMPLETE, sha256=hasher.hexdigest())
+        accepted = UploadSession.objects.filter(
+            pk=session.pk, offset=first, status=UploadSession.Status.ACTIVE
+        ).update(**changes)
+        if not accepted:
+            session.refresh_from_db()
+            raise OffsetMismatch(session.offset)
+    for name, value in changes.items():
+        setattr(session, name, value)
+    if session.status == UploadSession.Status.ACTIVE:
+        _hashers.set(session.pk, (end, hasher))
+    else:
+        _hashers.delete(session.pk)
+        queue_extraction(session_path(session), session.filename, session.sha256)
+    return session
+
+
+class UploadedChunkFile(File):
+    """
+    A completed upload assigned to a FileField. FileSystemStorage moves the partial file
+    into place (it looks for ``temporary_file_path``, like Django's own temporary uploads);
+    other storages stream it from disk in chunks. Either way the file is never read into memory.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.path = session_path(session)
+        self.sha256 = session.sha256
+        self._file = None
+        super().__init__(None, name=session.filename)
+        self.size = session.size
+
+    @property
+    def file(self):
+        if self._file is None:
+            self.claim()
+            self._file = open(self.path, 'rb')
+        return self._file
+
+    @file.setter
+    def file(self, value):
+        self._file = value
+
+    def temporary_file_path(self):
+        self.claim()
+        return self.path
+
+    def consume(self):
+        """Claims the upload and drops the partial file, for storages that already hold the same bytes."""
+        self.claim()
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def claim(self):
+        # Runs when storage takes the file, so one upload cannot end up in two places.
+        if self.session.status == UploadSession.Status.ATTACHED:
+            return
+        claimed = UploadSession.objects.filter(
+            pk=self.session.pk, status=UploadSession.Status.COMPLETE
+        ).update(status=UploadSession.Status.ATTACHED, updated_at=timezone.now())
+        if not claimed:
+            raise FileNotFoundError(f"Upload {self.session.pk} has already been used.")
+        self.session.status = UploadSession.Status.ATTACHED
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def get_upload(user, upload_id):
+    """The completed, unused upload ``upload_id`` of ``user`` as a File, or None."""
+    try:
+        upload_id = uuid.UUID(str(upload_id))
+    except ValueError:
+        return None
+    session = UploadSession.objects.filter(pk=upload_id, user=user, status=UploadSession.Status.COMPLETE).first()
+    if session is None or not os.path.exists(session_path(session)):
+        return None
+    return UploadedChunkFile(session)
+
+
+def discard_upload(session):
+    _hashers.delete(session.pk)
+    try:
+        os.remove(session_path(session))
+    except FileNotFoundError:
+        pass
+    session.delete()
+
+
+def purge_stale_uploads(max_age=None):
+    """
+    Deletes sessions untouched for ``max_age`` (UPLOAD_SESSION_TTL_HOURS, 24 by default)
+    together with their partial files. Returns the number of sessions removed.
+    """
+    if max_age is None:
+        max_age = timedelta(hours=getattr(settings, 'UPLOAD_SESSION_TTL_HOURS', 24))
+    stale = UploadSession.objects.filter(updated_at__lt=timezone.now() - max_age)
+    count = 0
+    for session in stale.iterator():
+        discard_upload(session)
+        count += 1
+    return count
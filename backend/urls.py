@@ -6,8 +6,11 @@ from .views import (
     FinancialReportAPIView, ProfileView, SystemSettingsView,
     IssueViewSet, AuditLogViewSet, DashboardSummaryView, ServiceViewSet, ServiceOrderViewSet,
     WriterDashboardSummaryView, WriterArticleViewSet, UDCAssignmentViewSet, WriterUDCOrdersViewSet,
-    PrintedPublicationsViewSet, SohaViewSet
+    PrintedPublicationsViewSet, SohaViewSet, ReportJobViewSet, ArticleSearchView,
+    RankingsView, ArticleCounterView, UploadSessionViewSet, ImageVariantView,
+    RequestMetricsView
 )
+from .authentication import ClaimsTokenObtainPairSerializer, ClaimsTokenRefreshSerializer
 from .click_views import ClickPrepareView, ClickCompleteView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
@@ -27,17 +30,26 @@ router.register(r'udc-assignments', UDCAssignmentViewSet, basename='udc-assignme
 router.register(r'writer-udc-orders', WriterUDCOrdersViewSet, basename='writer-udc-order')
 router.register(r'printed-publications', PrintedPublicationsViewSet, basename='printed-publications')
 router.register(r'soha-fields', SohaViewSet, basename='soha')
+router.register(r'report-jobs', ReportJobViewSet, basename='report-job')
+router.register(r'uploads', UploadSessionViewSet, basename='upload')
 
 
 urlpatterns = [
     path('', include(router.urls)),
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
-    path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/', TokenObtainPairView.as_view(serializer_class=ClaimsTokenObtainPairSerializer),
+         name='token_obtain_pair'),
+    path('token/refresh/', TokenRefreshView.as_view(serializer_class=ClaimsTokenRefreshSerializer),
+         name='token_refresh'),
     path('profile/', ProfileView.as_view(), name='profile'),
     path('financial-report/', FinancialReportAPIView.as_view(), name='financial-report'),
     path('system-settings/', SystemSettingsView.as_view(), name='system-settings'),
+    path('search/articles/', ArticleSearchView.as_view(), name='article-search'),
+    path('article-counters/<int:pk>/<str:kind>/', ArticleCounterView.as_view(), name='article-counter'),
+    path('rankings/', RankingsView.as_view(), name='rankings'),
+    path('image-variants/<str:token>/', ImageVariantView.as_view(), name='image-variant'),
+    path('request-metrics/', RequestMetricsView.as_view(), name='request-metrics'),
     path('dashboard-summary/', DashboardSummaryView.as_view(), name='dashboard-summary'),
     path('writer-dashboard-summary/', WriterDashboardSummaryView.as_view(), name='writer-dashboard-summary'),
     path('click/prepare/', ClickPrepareView.as_view(), name='click-prepare'),
@@ -0,0 +1,51 @@
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Article, ArticleVersion
+
+
+def add_version(article, file, submitter, notes=None):
+    """
+    Appends a new version to ``article``. The article's counter is advanced with ``F()``
+    in the same transaction as the insert: the UPDATE's row lock orders parallel uploads,
+    so each one reads back its own number and no COUNT over the versions is needed.
+    """
+    with transaction.atomic():
+        articles = Article.objects.filter(pk=article.pk)
+        articles.update(latestVersionNumber=F('latestVersionNumber') + 1)
+        number = articles.values_list('latestVersionNumber', flat=True).get()
+        version = ArticleVersion.objects.create(
+            article=article, versionNumber=number, file=file, submitter=submitter, notes=notes
+        )
+        articles.update(latestVersion=version)
+    article.latestVersionNumber = number
+    article.latestVersion = version
+    # A prefetched ``versions`` list would not include the new row.
+    getattr(article, '_prefetched_objects_cache', {}).pop('versions', None)
+    return version
+
+
+def sync_latest_versions():
+    """
+    Renumbers articles whose version numbers collide (oldest upload first) and recomputes
+    every article's counter and latest version. Returns the number of articles renumbered.
+    """
+    with transaction.atomic():
+        seen, colliding = set(), set()
+        for key in ArticleVersion.objects.values_list('article_id', 'versionNumber').order_by():
+            if key in seen:
+                colliding.add(key[0])
+            seen.add(key)
+        for article_id in sorted(colliding):
+            # Only possible before the unique constraint exists, so numbers can be rewritten in place.
+            versions = ArticleVersion.objects.filter(article_id=article_id).order_by('submittedDate', 'id')
+            for number, pk in enumerate(versions.values_list('id', flat=True), start=1):
+                ArticleVersion.objects.filter(pk=pk).update(versionNumber=number)
+
+        latest = ArticleVersion.objects.filter(article=OuterRef('pk')).order_by('-versionNumber')
+        Article.objects.update(
+            latestVersionNumber=Coalesce(Subquery(latest.values('versionNumber')[:1]), 0),
+            latestVersion=Subquery(latest.values('id')[:1]),
+        )
+    return len(colliding)
@@ -3,35 +3,62 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
-from django.db.models import Count, Sum
-from django.db.models.functions import TruncMonth
+from django.db import transaction
+from django.db.models import Case, Count, F, Prefetch, Q, When
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse
-from openpyxl import Workbook
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
-import random
+from django.http import FileResponse, Http404, HttpResponse
 import io
-import time
-from django.conf import settings
+from django.utils import timezone
 from django.contrib.contenttypes.models import ContentType
-from .models import ClickTransaction, Service, ServiceOrder
+from django.core.files.storage import default_storage
+from django.utils.cache import patch_vary_headers
+from .models import (
+    Service, ServiceOrder, Soha, ReportJob, UploadSession, PlagiarismCheck, ArticleVersion, IssueCompilation
+)
 
 from .models import (
     User, Journal, Article, Issue, AuditLog, IntegrationSetting, JournalCategory,
-    ArticleVersion, JournalType, EditorialBoardApplication
+    JournalType, EditorialBoardApplication
 )
 from .serializers import (
-    UserSerializer, JournalSerializer, ArticleSerializer, IssueSerializer, AuditLogSerializer,
-    IntegrationSettingSerializer, JournalCategorySerializer, JournalTypeSerializer,
-    EditorialBoardApplicationSerializer, ServiceSerializer, ServiceOrderSerializer
+    UserSerializer, JournalSerializer, ArticleSerializer, ArticleListSerializer, IssueSerializer,
+    AuditLogSerializer, IntegrationSettingSerializer, JournalCategorySerializer, JournalTypeSerializer,
+    EditorialBoardApplicationSerializer, ServiceSerializer, ServiceOrderSerializer, SohaSerializer,
+    ReportJobSerializer, UploadSessionSerializer, PlagiarismCheckSerializer, IssueCompilationSerializer,
+    get_requested_fields
+)
+from .audit import Action, build_event, log_event, log_events
+from .authentication import ClaimsRefreshToken
+from .audit_archive import attach_users, find_archived, read_audit_log
+from .checkout import PayableItem, article_price, checkout, service_order_price
+from .dashboard import STATE_FIELDS, get_dashboard_summary, record_bulk_transition, state_from_values
+from .issues import enqueue_compilation
+from .jobs import enqueue_report
+from .search import search_articles
+from .rankings import ALL_TIME, BOARDS, get_ranking
+from .reference import ReferenceDataCacheMixin
+from .images import FORMATS, get_variant, read_token, variant_formats
+from .instrumentation import get_stats, reset_stats
+from .counters import COUNTER_KINDS, record_hit
+from .revenue import monthly_revenue
+from .uploads import (
+    IncompleteChunk, OffsetMismatch, discard_upload, get_upload, max_chunk_size, parse_content_range, start_upload,
+    write_chunk
+)
+from .versions import add_version
+from .exports import (
+    APPROVED_ARTICLE_FIELDS, APPROVED_ARTICLE_HEADER, APPROVED_ARTICLE_KEYS, iter_approved_rows, stream_csv,
+    stream_ndjson, write_pdf, xlsx_response
 )
+from .plagiarism import queue_check
+from .pagination import ArticleKeysetPagination, AuditLogKeysetPagination, ServiceOrderKeysetPagination
 from .permissions import IsAdminUser, IsJournalManager, IsClientUser, IsOwnerOrAdmin, IsAssignedEditorOrAdmin, \
     IsAccountantUser, IsWriterUser
 
+# Upper bound on ids per bulk editorial action, to keep each UPDATE and its row locks short.
+BULK_ACTION_LIMIT = 200
+
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
@@ -47,7 +74,8 @@ class LoginView(APIView):
         password = request.data.get('password')
         user = authenticate(phone=phone, password=password)
         if user is not None:
-            refresh = RefreshToken.for_user(user)
+            log_event(AuditLog.AuditActionType.USER_LOGIN, user=user, target=user)
+            refresh = ClaimsRefreshToken.for_user(user)
             user_data = UserSerializer(user).data
             return Response({'refresh': str(refresh), 'access': str(refresh.access_token), 'user': user_data})
         return Response({'error': 'Invalid Credentials'}, status=status.HTTP_401_UNAUTHORIZED)
@@ -59,7 +87,8 @@ class UserViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAdminUser]
 
 
-class JournalTypeViewSet(viewsets.ModelViewSet):
+class JournalTypeViewSet(ReferenceDataCacheMixin, viewsets.ModelViewSet):
+    reference_models = ('JournalType',)
     queryset = JournalType.objects.all()
     serializer_class = JournalTypeSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -72,13 +101,15 @@ class JournalTypeViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
 
-class JournalCategoryViewSet(viewsets.ModelViewSet):
+class JournalCategoryViewSet(ReferenceDataCacheMixin, viewsets.ModelViewSet):
+    reference_models = ('JournalCategory',)
     queryset = JournalCategory.objects.all()
     serializer_class = JournalCategorySerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
-class JournalViewSet(viewsets.ModelViewSet):
+class JournalViewSet(ReferenceDataCacheMixin, viewsets.ModelViewSet):
+    reference_models = ('Journal', 'JournalType', 'JournalCategory')
     queryset = Journal.objects.select_related('journal_type', 'category', 'manager').all()
     serializer_class = JournalSerializer
     parser_classes = [MultiPartParser, FormParser]
@@ -94,15 +125,93 @@ class JournalViewSet(viewsets.ModelViewSet):
         return {'request': self.request}
 
 
-class ArticleViewSet(viewsets.ModelViewSet):
+class ArticleViewMixin:
+    """Behaviour shared by the editorial and the writer article viewsets."""
+
+    def get_serializer_fields(self):
+        fields = get_requested_fields(self.request)
+        if fields is None and self.action == 'list':
+            return self.get_serializer_class().list_fields()
+        return fields
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action == 'list':
+            kwargs.setdefault('fields', self.get_serializer_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_object_for_update(self):
+        """
+        get_object(), reloaded with its row locked until the transaction ends: concurrent
+        transitions of one article take turns, and each one's dashboard counter delta starts
+        from the state the previous one saved.
+        """
+        article = self.get_object()
+        return self.get_queryset().select_for_update(of=('self',)).get(pk=article.pk)
+
+    @action(detail=True, methods=['post'], url_path='submit-revision',
+            parser_classes=[MultiPartParser, FormParser, JSONParser])
+    def submit_revision(self, request, pk=None):
+        with transaction.atomic():
+            article = self.get_object_for_update()
+            if article.author != request.user:
+                return Response({'error': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
+            new_file = request.data.get('file') or get_upload(request.user, request.data.get('file_upload'))
+            if not new_file:
+                return Response({'error': 'A new file is required.'}, status=status.HTTP_400_BAD_REQUEST)
+            version = add_version(article, new_file, request.user)
+            article.status = Article.ArticleStatus.REVIEWING
+            # Filled in by the plagiarism check once the new version has been compared.
+            article.plagiarism_percentage = None
+            # Leave the version columns to add_version; a stale copy here could roll them back.
+            article.save(update_fields=['status', 'plagiarism_percentage'])
+            queue_check(version)
+        return Response(self.get_serializer(article).data)
+
+    @action(detail=True, methods=['get'], url_path='document')
+    def document(self, request, pk=None):
+        """
+        Page and word count of a version's file (``?version=<number>``, default the latest),
+        plus its text with ``?text=1``. Files are parsed once per content and then cached.
+        """
+        article = self.get_object()
+        versions = ArticleVersion.objects.filter(article=article)
+        number = request.query_params.get('version')
+        if number:
+            versions = versions.filter(versionNumber=number) if number.isdigit() else versions.none()
+        version = versions.order_by('-versionNumber').first()
+        if version is None:
+            return Response({'error': 'Version not found.'}, status=status.HTTP_404_NOT_FOUND)
+        data = {
+            'version': version.id,
+            'versionNumber': version.versionNumber,
+            'page_count': version.page_count,
+            'word_count': version.word_count,
+        }
+        if request.query_params.get('text') in ('1', 'true'):
+            data['text'] = version.text
+        return Response(data)
+
+    @action(detail=True, methods=['get'], url_path='plagiarism')
+    def plagiarism(self, request, pk=None):
+        """The plagiarism check of the article's latest version: percentage and matching articles."""
+        article = self.get_object()
+        check = PlagiarismCheck.objects.filter(version_id=article.latestVersion_id).first()
+        if check is None:
+            return Response({'error': 'No version has been checked yet.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(PlagiarismCheckSerializer(check).data)
+
+
+class ArticleViewSet(ArticleViewMixin, viewsets.ModelViewSet):
     serializer_class = ArticleSerializer
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = ArticleKeysetPagination
 
     def get_serializer_context(self):
         return {'request': self.request}
 
     def get_permissions(self):
-        if self.action in ['request_revision', 'reject_article', 'accept_article', 'add_link_or_attachment']:
+        if self.action in ['request_revision', 'reject_article', 'accept_article', 'add_link_or_attachment',
+                           'bulk_request_revision', 'bulk_reject_article', 'bulk_accept_article']:
             self.permission_classes = [IsAdminUser | IsJournalManager]
         elif self.action == 'submit_revision':
             self.permission_classes = [IsClientUser, IsOwnerOrAdmin]
@@ -112,24 +221,32 @@ class ArticleViewSet(viewsets.ModelViewSet):
             self.permission_classes = [permissions.IsAuthenticated]
         return super().get_permissions()
 
-    def get_queryset(self):
+    def get_serializer_class(self):
+        if self.action == 'list' and self.request.query_params.get('view') == 'compact':
+            return ArticleListSerializer
+        return ArticleSerializer
+
+    def scope_queryset(self, queryset):
         user = self.request.user
-        base_queryset = Article.objects.select_related('author', 'journal', 'assignedEditor').prefetch_related(
-            'versions')
 
         if user.role == User.Role.CLIENT:
-            return base_queryset.filter(author=user).order_by('-submittedDate')
+            return queryset.filter(author=user)
 
         if user.role == User.Role.JOURNAL_MANAGER:
-            return base_queryset.filter(
+            return queryset.filter(
                 journal__manager=user,
                 submissionPaymentStatus=Article.PaymentStatus.PAYMENT_COMPLETED
-            ).order_by('-submittedDate')
+            )
 
         if user.role in [User.Role.ADMIN, User.Role.ACCOUNTANT]:
-            return base_queryset.all().order_by('-submittedDate')
+            return queryset.all()
+
+        return queryset.none()
 
-        return Article.objects.none()
+    def get_queryset(self):
+        base_queryset = self.get_serializer_class().setup_queryset(
+            Article.objects.all(), self.get_serializer_fields())
+        return self.scope_queryset(base_queryset).order_by('-submittedDate')
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -141,31 +258,15 @@ class ArticleViewSet(viewsets.ModelViewSet):
 
         assigned_editor = journal.manager if journal else None
 
-        article = serializer.save(
+        article = serializer.build_instance(
+            serializer.validated_data,
             author=self.request.user,
             assignedEditor=assigned_editor,
             status=Article.ArticleStatus.PENDING,
             submissionPaymentStatus=Article.PaymentStatus.PAYMENT_PENDING
         )
-
-        is_partner = 'hamkor' in self.request.user.get_full_name().lower()
-        amount = journal.partner_price if is_partner else journal.regular_price
-
-        transaction = ClickTransaction.objects.create(
-            user=self.request.user,
-            amount=amount,
-            merchant_trans_id=f"article_{article.id}_{int(time.time())}",
-            content_object=article,
-        )
-
-        payment_url = (
-            f"https://my.click.uz/services/pay"
-            f"?service_id={settings.CLICK_SERVICE_ID}"
-            f"&merchant_id={settings.CLICK_MERCHANT_USER_ID}"
-            f"&amount={float(amount)}"
-            f"&transaction_param={transaction.merchant_trans_id}"
-            f"&return_url=http://localhost:5173/#/payment-status"
-        )
+        amount = article_price(self.request.user, journal)
+        _, payment_url = checkout(self.request.user, [PayableItem(article, amount)])
 
         response_serializer = self.get_serializer(article)
         response_data = response_serializer.data
@@ -176,51 +277,98 @@ class ArticleViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'], url_path='request_revision')
     def request_revision(self, request, pk=None):
-        article = self.get_object()
         notes = request.data.get('notes', '')
-        article.status = Article.ArticleStatus.NEEDS_REVISION
-        article.managerNotes = notes
-        article.save()
+        with transaction.atomic():
+            article = self.get_object_for_update()
+            article.status = Article.ArticleStatus.NEEDS_REVISION
+            article.managerNotes = notes
+            article.save()
         return Response(self.get_serializer(article).data)
 
     @action(detail=True, methods=['post'], url_path='reject_article')
     def reject_article(self, request, pk=None):
-        article = self.get_object()
         notes = request.data.get('notes', '')
-        article.status = Article.ArticleStatus.REJECTED
-        article.managerNotes = notes
-        article.save()
+        with transaction.atomic():
+            article = self.get_object_for_update()
+            article.status = Article.ArticleStatus.REJECTED
+            article.managerNotes = notes
+            article.save()
         return Response(self.get_serializer(article).data)
 
-    @action(detail=True, methods=['post'], url_path='accept_article', parser_classes=[MultiPartParser, FormParser])
+    @action(detail=True, methods=['post'], url_path='accept_article',
+            parser_classes=[MultiPartParser, FormParser, JSONParser])
     def accept_article(self, request, pk=None):
-        article = self.get_object()
-        article.status = Article.ArticleStatus.ACCEPTED
-
-        final_file = request.data.get('finalVersionFile')
-        if final_file:
-            article.finalVersionFile = final_file
-
-        if article.finalVersionFile:
-            article.certificate_file = article.finalVersionFile
-
-        article.save()
+        with transaction.atomic():
+            article = self.get_object_for_update()
+            article.status = Article.ArticleStatus.ACCEPTED
+
+            final_file = request.data.get('finalVersionFile')
+            if not final_file and request.data.get('finalVersionFile_upload'):
+                final_file = get_upload(request.user, request.data.get('finalVersionFile_upload'))
+                if final_file is None:
+                    return Response({'error': 'No completed, unused upload with this id.'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+            if final_file:
+                article.finalVersionFile = final_file
+
+            if article.finalVersionFile:
+                article.certificate_file = article.finalVersionFile
+
+            article.save()
         return Response(self.get_serializer(article).data)
 
-    @action(detail=True, methods=['post'], url_path='submit-revision', parser_classes=[MultiPartParser, FormParser])
-    def submit_revision(self, request, pk=None):
-        article = self.get_object()
-        if article.author != request.user:
-            return Response({'error': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
-        new_file = request.data.get('file')
-        if not new_file:
-            return Response({'error': 'A new file is required.'}, status=status.HTTP_400_BAD_REQUEST)
-        ArticleVersion.objects.create(article=article, versionNumber=article.versions.count() + 1, file=new_file,
-                                      submitter=request.user)
-        article.status = Article.ArticleStatus.REVIEWING
-        article.plagiarism_percentage = random.uniform(2.0, 15.0)
-        article.save()
-        return Response(self.get_serializer(article).data)
+    def bulk_transition(self, request, new_status, **changes):
+        """
+        Moves every listed article the user may edit to ``new_status`` with one UPDATE.
+        Ids outside the user's scope are reported as not found, exactly like missing ones.
+        """
+        ids = request.data.get('ids')
+        if not isinstance(ids, list) or not ids:
+            raise serializers.ValidationError({'ids': "A non-empty list of article ids is required."})
+        if len(ids) > BULK_ACTION_LIMIT:
+            raise serializers.ValidationError({'ids': f"At most {BULK_ACTION_LIMIT} articles per request."})
+        try:
+            ids = list(dict.fromkeys(int(pk) for pk in ids))
+        except (TypeError, ValueError):
+            raise serializers.ValidationError({'ids': "Article ids must be whole numbers."})
+
+        with transaction.atomic():
+            rows = list(self.scope_queryset(Article.objects.filter(pk__in=ids)).select_for_update(of=('self',))
+                        .values('id', *STATE_FIELDS))
+            if rows:
+                Article.objects.filter(pk__in=[row['id'] for row in rows]).update(status=new_status, **changes)
+                record_bulk_transition([state_from_values(row) for row in rows], status=new_status)
+                log_events(
+                    build_event(Action.ARTICLE_STATUS_CHANGED, target_type='Article', target_id=row['id'],
+                                details={'from': row['status'], 'to': new_status, 'bulk': True})
+                    for row in rows if row['status'] != new_status
+                )
+
+        updated = {row['id'] for row in rows}
+        return Response({
+            'updated': len(updated),
+            'results': [
+                {'id': pk, 'status': new_status} if pk in updated else {'id': pk, 'error': 'not_found'}
+                for pk in ids
+            ],
+        })
+
+    @action(detail=False, methods=['post'], url_path='bulk_request_revision', parser_classes=[JSONParser])
+    def bulk_request_revision(self, request):
+        return self.bulk_transition(request, Article.ArticleStatus.NEEDS_REVISION,
+                                    managerNotes=request.data.get('notes', ''))
+
+    @action(detail=False, methods=['post'], url_path='bulk_reject_article', parser_classes=[JSONParser])
+    def bulk_reject_article(self, request):
+        return self.bulk_transition(request, Article.ArticleStatus.REJECTED, managerNotes=request.data.get('notes', ''))
+
+    @action(detail=False, methods=['post'], url_path='bulk_accept_article', parser_classes=[JSONParser])
+    def bulk_accept_article(self, request):
+        # Same as accept_article without an upload: an existing final version becomes the certificate.
+        has_final_version = Q(finalVersionFile__isnull=False) & ~Q(finalVersionFile='')
+        return self.bulk_transition(request, Article.ArticleStatus.ACCEPTED, certificate_file=Case(
+            When(has_final_version, then=F('finalVersionFile')), default=F('certificate_file')
+        ))
 
     @action(detail=True, methods=['patch'], url_path='add-link-or-attachment',
             parser_classes=[MultiPartParser, FormParser])
@@ -279,89 +427,221 @@ class EditorialBoardApplicationViewSet(
 
 class FinancialReportAPIView(APIView):
     permission_classes = [IsAdminUser | IsAccountantUser]
+    export_formats = ('excel', 'pdf', 'csv', 'ndjson')
+
+    def perform_content_negotiation(self, request, force=False):
+        # ``?format=`` selects an export here, not a DRF renderer.
+        if request.query_params.get('format') in self.export_formats:
+            force = True
+        return super().perform_content_negotiation(request, force)
 
     def get(self, request, *args, **kwargs):
         export_format = request.query_params.get('format')
 
-        monthly_revenue_qs = Article.objects.filter(
-            submissionPaymentStatus=Article.PaymentStatus.PAYMENT_COMPLETED
-        ).annotate(month=TruncMonth('submittedDate')).values('month').annotate(total=Sum('submission_fee')).order_by(
-            'month')
+        monthly_revenue_qs = monthly_revenue()
 
         approved_articles_qs = Article.objects.filter(
             status=Article.ArticleStatus.ACCEPTED
-        ).select_related('author', 'journal').order_by('-publicationDate')
+        ).order_by('-publicationDate').values(*APPROVED_ARTICLE_FIELDS)
 
+        if export_format in ('excel', 'pdf') and request.query_params.get('async'):
+            job = enqueue_report(ReportJob.Kind.FINANCIAL_REPORT, export_format, user=request.user)
+            return Response(ReportJobSerializer(job, context={'request': request}).data,
+                            status=status.HTTP_202_ACCEPTED)
         if export_format == 'excel':
             return self.export_to_excel(monthly_revenue_qs, approved_articles_qs)
         if export_format == 'pdf':
             return self.export_to_pdf(monthly_revenue_qs, approved_articles_qs)
+        if export_format == 'csv':
+            return stream_csv(iter_approved_rows(approved_articles_qs), APPROVED_ARTICLE_HEADER,
+                              'approved_articles.csv')
+        if export_format == 'ndjson':
+            return stream_ndjson(iter_approved_rows(approved_articles_qs), APPROVED_ARTICLE_KEYS,
+                                 'approved_articles.ndjson')
 
-        request_context = {'request': request}
         data = {
             'monthly_revenue': list(monthly_revenue_qs),
-            'approved_articles_history': ArticleSerializer(approved_articles_qs, many=True,
-                                                           context=request_context).data
+            'approved_articles_history': [
+                {
+                    'id': row['id'],
+                    'title': row['title'],
+                    'author': {'name': row['author__name'], 'surname': row['author__surname']},
+                    'journalName': row['journal__name'],
+                    'publicationDate': row['publicationDate'],
+                }
+                for row in approved_articles_qs
+            ]
         }
         return Response(data)
 
     def export_to_excel(self, monthly_revenue, approved_articles):
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        response['Content-Disposition'] = 'attachment; filename="financial_report.xlsx"'
-        wb = Workbook()
-        ws1 = wb.active
-        ws1.title = "Oylik Daromad"
-        ws1.append(['Oy', 'Jami Daromad (UZS)'])
-        for item in monthly_revenue:
-            ws1.append([item['month'].strftime('%Y-%m'), item['total']])
-        ws2 = wb.create_sheet(title="Tasdiqlangan Maqolalar")
-        ws2.append(['ID', 'Sarlavha', 'Muallif', 'Jurnal', 'Tasdiqlangan Sana'])
-        for article in approved_articles:
-            ws2.append([
-                article.id,
-                article.title,
-                article.author.get_full_name(),
-                article.journal.name if article.journal else 'N/A',
-                article.publicationDate.strftime('%Y-%m-%d') if article.publicationDate else 'N/A'
-            ])
-        wb.save(response)
-        return response
+        return xlsx_response(monthly_revenue, iter_approved_rows(approved_articles), 'financial_report.xlsx')
 
     def export_to_pdf(self, monthly_revenue, approved_articles):
         buffer = io.BytesIO()
-        p = canvas.Canvas(buffer, pagesize=letter)
-        width, height = letter
-        y_position = height - inch
-        p.drawString(inch, y_position, "Moliyaviy Hisobot")
-        y_position -= 0.5 * inch
-        p.drawString(inch, y_position, "Oylik Daromad")
-        y_position -= 0.25 * inch
-        for item in monthly_revenue:
-            p.drawString(inch, y_position, f"{item['month'].strftime('%Y-%m')}: {item['total']} UZS")
-            y_position -= 0.25 * inch
-            if y_position < inch:
-                p.showPage()
-                y_position = height - inch
-        y_position -= 0.5 * inch
-        p.drawString(inch, y_position, "Tasdiqlangan Maqolalar Tarixi")
-        y_position -= 0.25 * inch
-        for article in approved_articles:
-            line = f"ID {article.id}: {article.title[:40]}... ({article.author.get_full_name()})"
-            p.drawString(inch, y_position, line)
-            y_position -= 0.25 * inch
-            if y_position < inch:
-                p.showPage()
-                y_position = height - inch
-        p.save()
+        write_pdf(monthly_revenue, iter_approved_rows(approved_articles), buffer)
         buffer.seek(0)
         return HttpResponse(buffer, content_type='application/pdf')
 
 
+class ReportJobViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin,
+                       viewsets.GenericViewSet):
+    queryset = ReportJob.objects.all()
+    serializer_class = ReportJobSerializer
+    permission_classes = [IsAdminUser | IsAccountantUser]
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = enqueue_report(
+            serializer.validated_data['kind'],
+            serializer.validated_data['export_format'],
+            serializer.validated_data.get('params') or {},
+            user=request.user,
+        )
+        response_status = status.HTTP_200_OK if job.status == ReportJob.Status.DONE else status.HTTP_202_ACCEPTED
+        return Response(self.get_serializer(job).data, status=response_status)
+
+    @action(detail=True, methods=['get'], url_path='download')
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != ReportJob.Status.DONE or not job.artifact:
+            return Response({'status': job.status, 'error': job.error}, status=status.HTTP_409_CONFLICT)
+        filename = job.artifact.name.rsplit('/', 1)[-1]
+        return FileResponse(job.artifact.open('rb'), as_attachment=True, filename=filename)
+
+
+class ArticleSearchView(APIView):
+    permission_classes = [permissions.AllowAny]
+    public_statuses = [Article.ArticleStatus.ACCEPTED, Article.ArticleStatus.PUBLISHED]
+    max_page_size = 100
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = min(max(int(request.query_params.get('page_size', 20)), 1), self.max_page_size)
+            journal_id = int(request.query_params['journal']) if request.query_params.get('journal') else None
+        except ValueError:
+            return Response({'error': 'page, page_size and journal must be integers.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        statuses = [value for value in request.query_params.get('status', '').split(',') if value]
+        user = request.user
+        if not (user.is_authenticated and user.role in [User.Role.ADMIN, User.Role.ACCOUNTANT]):
+            statuses = [value for value in statuses if value in self.public_statuses] or self.public_statuses
+
+        if not query:
+            return Response({'results': [], 'page': page, 'has_next': False})
+
+        # One extra row tells us whether a next page exists without counting every match.
+        hits = search_articles(query, journal_id=journal_id, statuses=statuses, limit=page_size + 1,
+                               offset=(page - 1) * page_size)
+        has_next = len(hits) > page_size
+        ranks = dict(hits[:page_size])
+
+        rows = Article.objects.filter(pk__in=ranks).values(
+            'id', 'title', 'title_en', 'status', 'journal', 'journal__name', 'submittedDate',
+            'author__name', 'author__surname'
+        )
+        by_id = {row['id']: row for row in rows}
+        results = []
+        for article_id, rank in ranks.items():
+            row = by_id.get(article_id)
+            if row is None:
+                continue
+            results.append({
+                'id': row['id'],
+                'title': row['title'],
+                'title_en': row['title_en'],
+                'status': row['status'],
+                'journal': row['journal'],
+                'journalName': row['journal__name'],
+                'submittedDate': row['submittedDate'],
+                'author': {'name': row['author__name'], 'surname': row['author__surname']},
+                'rank': rank,
+            })
+        return Response({'results': results, 'page': page, 'has_next': has_next})
+
+
+class RankingsView(APIView):
+    permission_classes = [permissions.AllowAny]
+    max_limit = 100
+
+    def get(self, request, *args, **kwargs):
+        board = request.query_params.get('board', 'articles_by_citations')
+        if board not in BOARDS:
+            return Response({'error': f"Unknown board. Choose one of: {', '.join(BOARDS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        period = request.query_params.get('period', ALL_TIME)
+        try:
+            journal_id = int(request.query_params['journal']) if request.query_params.get('journal') else None
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), self.max_limit)
+            if period != ALL_TIME:
+                int(period)
+        except ValueError:
+            return Response({'error': 'journal, limit and period must be integers (or period=all).'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        entries = get_ranking(board, journal_id, period)
+        return Response({'board': board, 'journal': journal_id, 'period': period, 'results': entries[:limit]})
+
+
+class ArticleCounterView(APIView):
+    """Records a view or download. Hits are buffered and written in batches by ``counters.buffer``."""
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, pk, kind, *args, **kwargs):
+        if kind not in COUNTER_KINDS:
+            return Response({'error': f"Unknown counter. Choose one of: {', '.join(COUNTER_KINDS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        record_hit(pk, kind)
+        return Response({'queued': True}, status=status.HTTP_202_ACCEPTED)
+
+
+class ImageVariantView(APIView):
+    """
+    A resized copy of an uploaded image (see ``backend.images``). The signed token in the
+    URL is the authorization, so plain ``<img>`` tags can load it.
+    """
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def perform_content_negotiation(self, request, force=False):
+        # Browsers ask for image types, which no renderer offers; errors still go out as JSON.
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, token, *args, **kwargs):
+        source = read_token(token)
+        fmt = 'webp' if 'image/webp' in request.META.get('HTTP_ACCEPT', '') and 'webp' in variant_formats() else 'jpeg'
+        name = get_variant(*source, fmt) if source else None
+        if name is None:
+            return Response({'error': 'Image not found.'}, status=status.HTTP_404_NOT_FOUND)
+        response = FileResponse(default_storage.open(name, 'rb'), content_type=FORMATS[fmt][1])
+        # The token names the source file, so a replaced image gets a new URL.
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        patch_vary_headers(response, ['Accept'])
+        return response
+
+
+class RequestMetricsView(APIView):
+    """Per-endpoint query counts, timings and query budgets of this process; DELETE starts over."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_stats())
+
+    def delete(self, request, *args, **kwargs):
+        reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class ProfileView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        serializer = UserSerializer(request.user)
+        # request.user may be built from token claims; the profile shows the stored row.
+        serializer = UserSerializer(User.objects.get(pk=request.user.pk))
         return Response(serializer.data)
 
 
@@ -393,61 +673,107 @@ class IssueViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        queryset = super().get_queryset().prefetch_related(Prefetch(
+            'articles',
+            queryset=ArticleListSerializer.setup_queryset(Article.objects.all(), extra_columns=('issue',))
+        ))
         if user.role == User.Role.JOURNAL_MANAGER:
-            return Issue.objects.filter(journal__manager=user)
-        return super().get_queryset()
+            return queryset.filter(journal__manager=user)
+        return queryset
+
+    @action(detail=True, methods=['post'], url_path='compile')
+    def compile(self, request, pk=None):
+        """
+        Queues a build of the issue PDF (cover, table of contents and the final PDFs of its
+        accepted articles); the finished file becomes ``compiledIssuePath``.
+        """
+        compilation = enqueue_compilation(self.get_object(), user=request.user)
+        return Response(IssueCompilationSerializer(compilation, context={'request': request}).data,
+                        status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'], url_path='compilation')
+    def compilation(self, request, pk=None):
+        """The issue's latest compilation and its status."""
+        compilation = IssueCompilation.objects.filter(issue=self.get_object()).first()
+        if compilation is None:
+            return Response({'error': 'This issue has not been compiled yet.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(IssueCompilationSerializer(compilation, context={'request': request}).data)
 
 
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = AuditLog.objects.all().order_by('-timestamp')
+    """
+    Recent events live in the AuditLog table; ``archive_audit_log`` moves older months into
+    compressed segments. Paging with ``cursor``/``page_size`` continues from the table into
+    the archive, and single events are found in either. The unpaged list covers the table only.
+    """
+    queryset = AuditLog.objects.select_related('user').order_by('-timestamp')
     serializer_class = AuditLogSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = AuditLogKeysetPagination
+    filter_params = {
+        'user': 'user_id',
+        'actionType': 'actionType',
+        'targetEntityType': 'targetEntityType',
+        'targetEntityId': 'targetEntityId',
+    }
+    integer_filters = ('user_id', 'targetEntityId')
+
+    def get_filters(self):
+        filters = {}
+        for param, field in self.filter_params.items():
+            value = self.request.query_params.get(param)
+            if not value:
+                continue
+            if field in self.integer_filters:
+                try:
+                    value = int(value)
+                except ValueError:
+                    raise serializers.ValidationError({param: "A whole number is required."})
+            filters[field] = value
+        return filters
+
+    def get_queryset(self):
+        return super().get_queryset().filter(**self.get_filters())
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        filters = self.get_filters()
+        paginator = self.paginator
+        entries = paginator.paginate_fetch(
+            lambda cursor, descending, limit: read_audit_log(
+                paginator.fetch_queryset(queryset, cursor, descending, limit), filters, cursor, descending, limit
+            ),
+            AuditLog, request,
+        )
+        if entries is None:
+            return Response(self.get_serializer(queryset, many=True).data)
+        attach_users(entries)
+        return paginator.get_paginated_response(self.get_serializer(entries, many=True).data)
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            try:
+                entry = find_archived(int(self.kwargs['pk']))
+            except ValueError:
+                entry = None
+            if entry is None:
+                raise
+            return attach_users([entry])[0]
 
 
 class DashboardSummaryView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        user = self.request.user
-        data = {}
-        request_context = {'request': request}
+        if request.user.role == User.Role.WRITER:
+            return Response({})
+        return Response(get_dashboard_summary(request.user))
 
-        if user.role == User.Role.CLIENT:
-            data = {
-                'pending': Article.objects.filter(author=user, status=Article.ArticleStatus.PENDING).count(),
-                'revision': Article.objects.filter(author=user, status=Article.ArticleStatus.NEEDS_REVISION).count(),
-                'accepted': Article.objects.filter(author=user, status=Article.ArticleStatus.ACCEPTED).count(),
-            }
-        elif user.role == User.Role.JOURNAL_MANAGER:
-            data = {
-                'newSubmissions': Article.objects.filter(
-                    journal__manager=user,
-                    status=Article.ArticleStatus.REVIEWING,
-                    submissionPaymentStatus=Article.PaymentStatus.PAYMENT_COMPLETED
-                ).count(),
-                'reviewing': Article.objects.filter(
-                    journal__manager=user,
-                    status=Article.ArticleStatus.REVIEWING,
-                    submissionPaymentStatus=Article.PaymentStatus.PAYMENT_COMPLETED
-                ).count(),
-            }
-        elif user.role in [User.Role.ACCOUNTANT, User.Role.ADMIN]:
-            all_articles = Article.objects.all()
-            data = {
-                'totalUsers': User.objects.count() if user.role == User.Role.ADMIN else None,
-                'totalJournals': Journal.objects.count() if user.role == User.Role.ADMIN else None,
-                'totalArticles': all_articles.count(),
-                'pendingAll': all_articles.filter(
-                    status=Article.ArticleStatus.PENDING).count() if user.role == User.Role.ADMIN else None,
-                'payments_pending_approval': 0,
-                'pending_payments_list': [],
-                'total_submission_fees': all_articles.aggregate(Sum('submission_fee'))['submission_fee__sum'] or 0,
-                'total_publication_fees': all_articles.aggregate(Sum('publication_fee'))['publication_fee__sum'] or 0,
-            }
-        return Response(data)
 
-
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(ReferenceDataCacheMixin, viewsets.ModelViewSet):
+    reference_models = ('Service',)
     queryset = Service.objects.filter(is_active=True)
     serializer_class = ServiceSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -473,111 +799,119 @@ class ServiceOrderViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        service = serializer.validated_data['service']
-        
-        # Calculate dynamic price for printed publications based on page count
-        form_data_str = request.data.get('form_data_str', '{}')
-        try:
-            form_data = json.loads(form_data_str)
-        except json.JSONDecodeError:
-            form_data = {}
-            
-        if service.slug == 'printed-publications':
-            # Calculate price based on pages
-            book_pages = form_data.get('bookPages', 0)
-            quantity = form_data.get('quantity', 1)
-            try:
-                book_pages = int(book_pages)
-                quantity = int(quantity)
-            except (ValueError, TypeError):
-                book_pages = 0
-                quantity = 1
-                
-            # Base price calculation: 400 UZS per page
-            base_price = book_pages * 400
-            
-            # Add cover type premium
-            cover_type = form_data.get('coverType', 'soft')
-            if cover_type == 'hard':
-                base_price += 25000  # Additional 25,000 UZS for hard cover
-            elif cover_type == 'soft':
-                base_price += 10000  # Additional 10,000 UZS for soft cover
-                
-            # Add ISBN price if requested
-            include_isbn = form_data.get('includeISBN', False)
-            if include_isbn:
-                base_price += 600000  # Additional 600,000 UZS for ISBN
-                
-            # Multiply by quantity
-            total_price = base_price * quantity
-            
-            # Minimum price of 4000 UZS
-            if total_price < 4000:
-                total_price = 4000
-                
-            service_price = total_price
-        else:
-            service_price = float(service.price)
-
-        service_order = serializer.save(
+        service_order = serializer.build_instance(
+            serializer.validated_data,
             user=self.request.user,
             status=ServiceOrder.Status.PENDING_PAYMENT,
-            calculated_price=service_price
         )
-
-        transaction = ClickTransaction.objects.create(
-            user=self.request.user,
-            amount=service_price,
-            merchant_trans_id=f"service_{service_order.id}_{int(time.time())}",
-            content_object=service_order,
-        )
-
-        payment_url = (
-            f"https://my.click.uz/services/pay"
-            f"?service_id={settings.CLICK_SERVICE_ID}"
-            f"&merchant_id={settings.CLICK_MERCHANT_USER_ID}"
-            f"&amount={service_price}"
-            f"&transaction_param={transaction.merchant_trans_id}"
-            f"&return_url=http://localhost:5173/#/payment-status"
+        service_order.calculated_price = service_order_price(
+            service_order.service, service_order.form_data, service_order.attached_file
         )
+        _, payment_url = checkout(self.request.user, [PayableItem(service_order, service_order.calculated_price)])
 
-        response_data = serializer.data
+        response_data = self.get_serializer(service_order).data
         response_data['payment_url'] = payment_url
 
         headers = self.get_success_headers(response_data)
         return Response(response_data, status=status.HTTP_201_CREATED, headers=headers)
 
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser])
+    def checkout(self, request):
+        """Orders a cart of services (``{"items": [{"service_id", "form_data_str"}, ...]}``) with one payment."""
+        serializer = self.get_serializer(data=request.data.get('items'), many=True, allow_empty=False)
+        serializer.is_valid(raise_exception=True)
+
+        orders = []
+        for validated_data in serializer.validated_data:
+            order = serializer.child.build_instance(
+                validated_data, user=request.user, status=ServiceOrder.Status.PENDING_PAYMENT
+            )
+            order.calculated_price = service_order_price(order.service, order.form_data, order.attached_file)
+            orders.append(order)
+        click_transaction, payment_url = checkout(
+            request.user, [PayableItem(order, order.calculated_price) for order in orders]
+        )
+
+        return Response({
+            'orders': self.get_serializer(orders, many=True).data,
+            'amount': str(click_transaction.amount),
+            'merchant_trans_id': click_transaction.merchant_trans_id,
+            'payment_url': payment_url,
+        }, status=status.HTTP_201_CREATED)
+
+
+class UploadSessionViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin,
+                          viewsets.GenericViewSet):
+    """
+    Resumable uploads. POST ``{filename, size}`` opens a session, then each PUT carries the
+    raw bytes of one chunk placed by ``Content-Range: bytes <first>-<last>/<size>``. GET
+    reports the offset to resume from. Once complete, the session id can be sent as
+    ``<field>_upload`` wherever the API takes a manuscript or attachment file.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [JSONParser]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        start_upload(serializer.save(user=self.request.user))
+
+    def update(self, request, *args, **kwargs):
+        session = self.get_object()
+        try:
+            first, last, size = parse_content_range(request.META.get('HTTP_CONTENT_RANGE'))
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        length = last - first + 1
+        if size != session.size:
+            return Response({'error': f"This upload is {session.size} bytes long."}, status=status.HTTP_400_BAD_REQUEST)
+        if length > max_chunk_size():
+            return Response({'error': f"Chunks may be at most {max_chunk_size()} bytes."},
+                            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        if int(request.META.get('CONTENT_LENGTH') or 0) != length:
+            return Response({'error': "Content-Length does not match Content-Range."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            write_chunk(session, first, request.stream, length)
+        except OffsetMismatch as exc:
+            return Response({'error': str(exc), 'offset': exc.offset}, status=status.HTTP_409_CONFLICT)
+        except IncompleteChunk as exc:
+            return Response({'error': str(exc), 'offset': session.offset}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(session).data)
+
+    def perform_destroy(self, instance):
+        discard_upload(instance)
+
 
 class WriterDashboardSummaryView(APIView):
     permission_classes = [IsWriterUser]
 
     def get(self, request, *args, **kwargs):
-        user = self.request.user
-        data = {}
-        request_context = {'request': request}
-
-        if user.role == User.Role.WRITER:
-            data = {
-                'pending': Article.objects.filter(author=user, status=Article.ArticleStatus.PENDING).count(),
-                'revision': Article.objects.filter(author=user, status=Article.ArticleStatus.NEEDS_REVISION).count(),
-                'accepted': Article.objects.filter(author=user, status=Article.ArticleStatus.ACCEPTED).count(),
-                'totalArticles': Article.objects.filter(author=user).count(),
-            }
-        return Response(data)
+        return Response(get_dashboard_summary(request.user))
 
 
-class WriterArticleViewSet(viewsets.ModelViewSet):
+class WriterArticleViewSet(ArticleViewMixin, viewsets.ModelViewSet):
     serializer_class = ArticleSerializer
     parser_classes = [MultiPartParser, FormParser]
     permission_classes = [IsWriterUser]
+    pagination_class = ArticleKeysetPagination
 
     def get_serializer_context(self):
         return {'request': self.request}
 
+    def get_serializer_class(self):
+        if self.action == 'list' and self.request.query_params.get('view') == 'compact':
+            return ArticleListSerializer
+        return ArticleSerializer
+
     def get_queryset(self):
         user = self.request.user
-        return Article.objects.select_related('author', 'journal', 'assignedEditor').prefetch_related(
-            'versions').filter(author=user).order_by('-submittedDate')
+        return self.get_serializer_class().setup_queryset(
+            Article.objects.all(), self.get_serializer_fields()
+        ).filter(author=user).order_by('-submittedDate')
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -589,31 +923,15 @@ class WriterArticleViewSet(viewsets.ModelViewSet):
 
         assigned_editor = journal.manager if journal else None
 
-        article = serializer.save(
+        article = serializer.build_instance(
+            serializer.validated_data,
             author=self.request.user,
             assignedEditor=assigned_editor,
             status=Article.ArticleStatus.PENDING,
             submissionPaymentStatus=Article.PaymentStatus.PAYMENT_PENDING
         )
-
-        is_partner = 'hamkor' in self.request.user.get_full_name().lower()
-        amount = journal.partner_price if is_partner else journal.regular_price
-
-        transaction = ClickTransaction.objects.create(
-            user=self.request.user,
-            amount=amount,
-            merchant_trans_id=f"article_{article.id}_{int(time.time())}",
-            content_object=article,
-        )
-
-        payment_url = (
-            f"https://my.click.uz/services/pay"
-            f"?service_id={settings.CLICK_SERVICE_ID}"
-            f"&merchant_id={settings.CLICK_MERCHANT_USER_ID}"
-            f"&amount={float(amount)}"
-            f"&transaction_param={transaction.merchant_trans_id}"
-            f"&return_url=http://localhost:5173/#/payment-status"
-        )
+        amount = article_price(self.request.user, journal)
+        _, payment_url = checkout(self.request.user, [PayableItem(article, amount)])
 
         response_serializer = self.get_serializer(article)
         response_data = response_serializer.data
@@ -622,25 +940,11 @@ class WriterArticleViewSet(viewsets.ModelViewSet):
         headers = self.get_success_headers(response_data)
         return Response(response_data, status=status.HTTP_201_CREATED, headers=headers)
 
-    @action(detail=True, methods=['post'], url_path='submit-revision', parser_classes=[MultiPartParser, FormParser])
-    def submit_revision(self, request, pk=None):
-        article = self.get_object()
-        if article.author != request.user:
-            return Response({'error': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
-        new_file = request.data.get('file')
-        if not new_file:
-            return Response({'error': 'A new file is required.'}, status=status.HTTP_400_BAD_REQUEST)
-        ArticleVersion.objects.create(article=article, versionNumber=article.versions.count() + 1, file=new_file,
-                                      submitter=request.user)
-        article.status = Article.ArticleStatus.REVIEWING
-        article.plagiarism_percentage = random.uniform(2.0, 15.0)
-        article.save()
-        return Response(self.get_serializer(article).data)
-
 
 class UDCAssignmentViewSet(viewsets.ModelViewSet):
     serializer_class = ServiceOrderSerializer
     permission_classes = [IsWriterUser]
+    pagination_class = ServiceOrderKeysetPagination
     
     def get_queryset(self):
         # Writers can only see UDC classification orders that are pending assignment (IN_PROGRESS)
@@ -681,6 +985,7 @@ class UDCAssignmentViewSet(viewsets.ModelViewSet):
 class WriterUDCOrdersViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ServiceOrderSerializer
     permission_classes = [IsWriterUser]
+    pagination_class = ServiceOrderKeysetPagination
     
     def get_queryset(self):
         # Writers can see all their assigned UDC orders
@@ -689,7 +994,8 @@ class WriterUDCOrdersViewSet(viewsets.ReadOnlyModelViewSet):
             service__slug='udc-classification'
         ).select_related('user', 'service').order_by('-created_at')
 
-class SohaViewSet(viewsets.ModelViewSet):
+class SohaViewSet(ReferenceDataCacheMixin, viewsets.ModelViewSet):
+    reference_models = ('Soha',)
     queryset = Soha.objects.all().order_by('name')
     serializer_class = SohaSerializer
     permission_classes = [IsAdminUser]
@@ -706,6 +1012,7 @@ class SohaViewSet(viewsets.ModelViewSet):
 class PrintedPublicationsViewSet(viewsets.ModelViewSet):
     serializer_class = ServiceOrderSerializer
     permission_classes = [IsWriterUser | IsAdminUser]
+    pagination_class = ServiceOrderKeysetPagination
     
     def get_queryset(self):
         # Both writers and admins can see printed publications orders
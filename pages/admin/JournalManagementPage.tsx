@@ -217,7 +217,7 @@ const JournalManagementPage: React.FC = () => {
             >
               <div>
                 <img 
-                  src={journal.image_url || 'https://via.placeholder.com/400x200'} 
+                  src={journal.image_variants?.card || journal.image_url || 'https://via.placeholder.com/400x200'} 
                   alt={journal.name} 
                   className="w-full h-32 object-cover rounded-md mb-3" 
                 />
@@ -182,7 +182,7 @@ const SubmitArticlePage: React.FC = () => {
             >
               <div className="relative">
                 <img 
-                  src={journal.image_url || 'https://via.placeholder.com/400x200?text=Jurnal+Rasmi'} 
+                  src={journal.image_variants?.card || journal.image_url || 'https://via.placeholder.com/400x200?text=Jurnal+Rasmi'} 
                   alt={journal.name} 
                   className="w-full h-40 object-cover rounded-t-lg" 
                 />
@@ -252,7 +252,7 @@ const SubmitArticlePage: React.FC = () => {
               <div className="flex justify-between items-start mb-4">
                 <div className="flex items-start p-4 bg-slate-800 rounded-lg gap-4 border border-slate-700 w-full">
                   <img 
-                    src={selectedJournal?.image_url || 'https://via.placeholder.com/150x80'} 
+                    src={selectedJournal?.image_variants?.thumb || selectedJournal?.image_url || 'https://via.placeholder.com/150x80'} 
                     alt={selectedJournal?.name} 
                     className="w-24 h-16 object-cover rounded-md flex-shrink-0" 
                   />
@@ -137,7 +137,7 @@ const JournalArticleSubmissionPage: React.FC = () => {
       <Card title="" icon={null}>
         <div className="flex items-start p-4 bg-slate-800 rounded-lg gap-4 border border-slate-700 mb-6">
           <img 
-            src={journal.image_url || 'https://via.placeholder.com/150x80'} 
+            src={journal.image_variants?.thumb || journal.image_url || 'https://via.placeholder.com/150x80'} 
             alt={journal.name} 
             className="w-32 h-20 object-cover rounded-md flex-shrink-0" 
           />
@@ -79,7 +79,7 @@ const JournalsPage: React.FC = () => {
             className="bg-slate-800 rounded-lg border border-slate-700 overflow-hidden cursor-pointer transition-all duration-300 hover:border-accent-purple hover:shadow-lg hover:shadow-accent-purple/10 transform hover:-translate-y-1 flex flex-col"
           >
             <img 
-              src={journal.image_url || 'https://via.placeholder.com/400x200?text=Jurnal+Rasmi'} 
+              src={journal.image_variants?.card || journal.image_url || 'https://via.placeholder.com/400x200?text=Jurnal+Rasmi'} 
               alt={journal.name} 
               className="w-full h-40 object-cover" 
             />
@@ -12,7 +12,6 @@ import apiService from '../../services/apiService';
 const PublicSearchPage: React.FC = () => {
     const { translate } = useLanguage();
     const [searchTerm, setSearchTerm] = useState('');
-    const [allArticles, setAllArticles] = useState<Article[]>([]);
     const [results, setResults] = useState<Article[]>([]);
     const [isLoading, setIsLoading] = useState(false);
     const [hasSearched, setHasSearched] = useState(false);
@@ -25,32 +24,16 @@ const PublicSearchPage: React.FC = () => {
         setResults([]); 
 
         try {
-            // If we haven't fetched articles yet, fetch them.
-            if (allArticles.length === 0) {
-                const response = await apiService.get<Article[]>('/articles/'); 
-                setAllArticles(response.data);
-                filterArticles(searchTerm, response.data);
-            } else {
-                filterArticles(searchTerm, allArticles);
-            }
+            const response = await apiService.get<{ results: Article[] }>('/search/articles/', {
+                params: { q: searchTerm.trim() },
+            });
+            setResults(response.data.results);
         } catch (error) {
             console.error("Search failed:", error);
         } finally {
             setIsLoading(false);
         }
     };
-    
-    const filterArticles = (term: string, articles: Article[]) => {
-        const lowercasedTerm = term.toLowerCase();
-        const filtered = articles.filter(
-            art => art.title?.toLowerCase().includes(lowercasedTerm) || 
-                   (art as any).abstract_en?.toLowerCase().includes(lowercasedTerm) ||
-                   art.journalName?.toLowerCase().includes(lowercasedTerm) ||
-                   art.author.name?.toLowerCase().includes(lowercasedTerm) ||
-                   art.author.surname?.toLowerCase().includes(lowercasedTerm)
-        );
-        setResults(filtered);
-    }
 
     return (
         <div className="min-h-screen bg-gradient-to-br from-primary-dark via-slate-900 to-secondary-dark text-light-text p-4 md:p-8">
@@ -101,19 +84,7 @@ const PublicSearchPage: React.FC = () => {
 
                 {/* Search Stats */}
                 {hasSearched && !isLoading && (
-                    <div className="grid grid-cols-1 md:grid-cols-3 gap-6 mb-10">
-                        <div className="bg-gradient-to-br from-slate-800 to-slate-900 rounded-xl p-5 border border-slate-700 shadow-lg">
-                            <div className="flex items-center">
-                                <div className="p-3 rounded-lg bg-purple-500/10 mr-4">
-                                    <DocumentTextIcon className="h-6 w-6 text-purple-400" />
-                                </div>
-                                <div>
-                                    <p className="text-sm text-medium-text">Jami maqolalar</p>
-                                    <p className="text-2xl font-bold text-light-text">{allArticles.length}</p>
-                                </div>
-                            </div>
-                        </div>
-                        
+                    <div className="grid grid-cols-1 md:grid-cols-2 gap-6 mb-10">
                         <div className="bg-gradient-to-br from-slate-800 to-slate-900 rounded-xl p-5 border border-slate-700 shadow-lg">
                             <div className="flex items-center">
                                 <div className="p-3 rounded-lg bg-sky-500/10 mr-4">
@@ -41,6 +41,12 @@ export interface JournalCategory {
   name: string;
 }
 
+// Resized copies of an uploaded image (bounding boxes of 160px and 480px).
+export interface ImageVariants {
+  thumb: string;
+  card: string;
+}
+
 export interface Journal {
   id: number;
   journal_type: JournalType;
@@ -49,6 +55,7 @@ export interface Journal {
   manager?: User;
   category?: JournalCategory;
   image_url?: string;
+  image_variants?: ImageVariants | null;
   regular_price: string;
   partner_price: string;
 }
@@ -102,6 +109,7 @@ export interface EditorialBoardApplication {
     user: User;
     passport_file_url: string;
     photo_3x4_url: string;
+    photo_3x4_variants?: ImageVariants | null;
     diploma_file_url: string;
     status: 'pending' | 'approved' | 'rejected';
     submitted_at: string;